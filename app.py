@@ -1,13 +1,13 @@
 # app.py
 import os
+import json
+import time
 import traceback
 import re
 
-# ⬇️ PREVIEW IMPORTS (OpenAI-driven preview)
-from preview.preview_generator import (
-    build_weekly_preview_cards,
-    generate_week_preview,
-)
+import artifact_store
+import pdf_export
+import tracing
 
 os.environ["STREAMLIT_SERVER_FILE_WATCHER_TYPE"] = "poll"
 os.environ["STREAMLIT_SERVER_RUN_ON_SAVE"] = "false"
@@ -17,7 +17,6 @@ import streamlit as st
 os.environ["STREAMLIT_SERVER_RUN_ON_SAVE"] = "false"
 st.set_page_config(page_title="LLM Commissioner 2", page_icon="🏈", layout="wide")
 st.title("Fantasy Football Commissioner – Weekly Recaps")
-st.cache_data.clear()
 
 # -------------------- Secrets/env bootstrap --------------------
 def _maybe_env_from_secrets(key: str):
@@ -30,18 +29,35 @@ def _maybe_env_from_secrets(key: str):
 for _k in ("OPENAI_API_KEY", "ESPN_S2", "SWID"):
     _maybe_env_from_secrets(_k)
 
+# Detect PDF backends once per server process, in the background (not on a bare `import app`).
+if st.runtime.exists():
+    pdf_export.warm_up()
+
 # -------------------- Lazy imports so import errors don't kill the app --------------------
+# ESPN (espn_api) and LLM (openai) modules load on first use, so a page load that
+# doesn't fetch or generate anything never pays for them.
 _import_error = None
 def _load_modules():
-    global get_week_matchups, generate_week_recap
+    global _import_error, get_week_matchups, stream_week_recap
+    global build_weekly_preview_cards, stream_week_preview_from_cards
+    global forget_league, get_league, invalidate_live, season_is_final
     try:
         from espn_fetcher import get_week_matchups
-        from gpt_summarizer import generate_week_recap
-        return None
+        from gpt_summarizer import stream_week_recap
+        from preview.preview_generator import build_weekly_preview_cards, stream_week_preview_from_cards
+        from espn_cache import forget_league, get_league, invalidate_live, season_is_final
+        _import_error = None
     except Exception as e:
-        return e
+        _import_error = e
+    return _import_error
 
-_import_error = _load_modules()
+def _require_modules():
+    """Load the ESPN/LLM modules, or show the import error and stop this run."""
+    if _load_modules():
+        st.error("Import failure: could not load a module.")
+        with st.expander("Import error details"):
+            st.code("".join(traceback.format_exception(type(_import_error), _import_error, _import_error.__traceback__)))
+        st.stop()
 
 # -------------------- Sidebar (no OpenAI key field) --------------------
 with st.sidebar:
@@ -62,8 +78,10 @@ with st.sidebar:
             "OPENAI_API_KEY set?": bool(os.getenv("OPENAI_API_KEY")),
             "ESPN_S2 set?": bool(os.getenv("ESPN_S2")),
             "SWID set?": bool(os.getenv("SWID")),
-            "Import error?": str(_import_error) if _import_error else "None",
         })
+        if st.button("Check module imports"):
+            st.write({"Import error?": str(_load_modules() or "None")})
+        _timing_panel = st.container()  # filled in at the end of the run, so it includes this run's work
 
 # -------------------- Inputs --------------------
 col1, col2, col3 = st.columns(3)
@@ -75,6 +93,11 @@ with col3:
     week = st.number_input("Week", min_value=1, max_value=18, value=1, step=1)
 
 st.caption("We’ll summarize **every matchup** for the selected week. ESPN cookies are optional for public leagues.")
+regenerate = st.checkbox(
+    "Regenerate LLM text",
+    value=False,
+    help="Reruns of the same league/week are served from the LLM cache. Tick to pay for fresh completions.",
+)
 
 # -------------------- Helpers --------------------
 def _need_openai() -> bool:
@@ -90,104 +113,125 @@ def _render(text: str):
     else:
         st.markdown(text)
 
-@st.cache_data(show_spinner=False, ttl=1)
-def _fetch_matchups_cached(_league_id: int, _year: int, _week: int):
-    return get_week_matchups(_league_id, _year, _week)
-
-# ---------- PDF Export Helpers (Markdown → PDF with emoji support) ----------
-def _build_pdf_html(md_text: str, title: str) -> str:
-    from markdown import markdown as md_to_html
-    body_html = md_to_html(md_text or "", extensions=["tables", "fenced_code"])
-    return f"""<!doctype html>
-<html>
-<head>
-<meta charset="utf-8">
-<title>{title}</title>
-</head>
-<body>
-{body_html}
-</body>
-</html>"""
-
-def _emoji_css() -> str:
-    """
-    Font stack tries native color emoji on each OS, then falls back to Noto Emoji if present.
-    You can vendor a TTF (e.g., ./fonts/NotoEmoji-Regular.ttf or ./fonts/NotoColorEmoji.ttf).
-    """
-    import os
-    faces = []
-    for candidate in [
-        "./fonts/NotoEmoji-Regular.ttf",
-        "./fonts/NotoColorEmoji.ttf",
-        "/usr/share/fonts/truetype/noto/NotoColorEmoji.ttf",
-        "/System/Library/Fonts/Apple Color Emoji.ttf",
-        "C:/Windows/Fonts/seguiemj.ttf",
-    ]:
-        if os.path.exists(candidate):
-            faces.append(
-                f"@font-face {{ font-family: 'LocalEmoji'; src: url('file://{os.path.abspath(candidate)}'); }}"
-            )
-
-    base_css = """
-    @page { size: letter; margin: 0.6in; }
-    body {
-      font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Helvetica, Arial,
-                   'LocalEmoji', 'Noto Color Emoji', 'Apple Color Emoji', 'Segoe UI Emoji', 'Noto Emoji',
-                   'Noto Sans Symbols 2', sans-serif;
-      line-height: 1.35; color: #111; word-break: break-word;
-    }
-    h1, h2, h3 { color: #0b3558; margin-top: 0.8em; }
-    h1 { font-size: 22pt; }
-    h2 { font-size: 16pt; }
-    h3 { font-size: 13pt; }
-    p  { font-size: 11pt; margin: 0.4em 0; }
-    ul, ol { margin: 0.3em 0 0.5em 1.2em; }
-    li { margin: 0.15em 0; }
-    code, pre { background: #f6f8fa; font-size: 10pt; }
-    blockquote { color: #444; border-left: 3px solid #ddd; margin: 0.5em 0; padding: 0.1em 0 0.1em 0.8em; }
-    hr { border: none; border-top: 1px solid #ddd; margin: 0.8em 0; }
-    strong { color: #0b3558; }
-    table { border-collapse: collapse; width: 100%; margin: 0.4em 0; }
-    th, td { border: 1px solid #ddd; padding: 6px 8px; font-size: 10pt; }
-    th { background: #f2f4f7; text-align: left; }
-    """
-    return "\n".join(faces) + base_css
-
-def _md_to_pdf_bytes(md_text: str, title: str = "Weekly Preview") -> bytes:
-    """
-    Prefer WeasyPrint for emoji support; fall back to xhtml2pdf if unavailable.
-    """
-    html = _build_pdf_html(md_text, title)
-
-    # Try WeasyPrint first (better Unicode/emoji rendering)
+def _stream_into(placeholder, chunks, min_interval: float = 0.05) -> str:
+    """Render streamed markdown progressively (throttled redraws); returns the full text."""
+    text = ""
+    last = 0.0
+    for chunk in chunks:
+        text += chunk
+        now = time.monotonic()
+        if now - last >= min_interval:
+            placeholder.markdown(text + " ▌")
+            last = now
+    placeholder.markdown(text)
+    return text
+
+# -------------------- ESPN data cache policy --------------------
+# Finished weeks never change: cached for the life of the server, shared by every session.
+# The live week expires after ESPN_CACHE_LIVE_TTL. League objects come from the process-wide
+# pool in espn_cache (which expires in-season leagues on the same TTL).
+# Credentials are part of every key, so a private league is never served to a session without them.
+LIVE_TTL = int(os.getenv("ESPN_CACHE_LIVE_TTL", "300"))
+
+def _espn_creds():
+    return os.getenv("ESPN_S2") or None, os.getenv("SWID", os.getenv("ESPN_SWID")) or None
+
+def _shared_league(league_id: int, year: int):
+    """One League per (league, season, credentials), shared by recap + preview and across sessions."""
+    espn_s2, swid = _espn_creds()
+    return get_league(int(league_id), int(year), espn_s2=espn_s2, swid=swid)
+
+def _week_is_final(league, year: int, week: int) -> bool:
+    return season_is_final(year) or int(week) < int(league.current_week)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _final_matchups(league_id: int, year: int, week: int, espn_s2, swid, _league):
+    return get_week_matchups(league_id, year, week, league=_league)
+
+@st.cache_data(show_spinner=False, ttl=LIVE_TTL, max_entries=64)
+def _live_matchups(league_id: int, year: int, week: int, espn_s2, swid, _league):
+    return get_week_matchups(league_id, year, week, league=_league)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _final_cards(league_id: int, year: int, week: int, espn_s2, swid, _league):
+    return build_weekly_preview_cards(league_id, year, week, league=_league)
+
+@st.cache_data(show_spinner=False, ttl=LIVE_TTL, max_entries=64)
+def _live_cards(league_id: int, year: int, week: int, espn_s2, swid, _league):
+    return build_weekly_preview_cards(league_id, year, week, league=_league)
+
+def _fetch_matchups_cached(league_id: int, year: int, week: int):
+    league = _shared_league(league_id, year)
+    fetch = _final_matchups if _week_is_final(league, year, week) else _live_matchups
+    return fetch(league_id, year, week, *_espn_creds(), league)
+
+def _preview_cards_cached(league_id: int, year: int, week: int):
+    league = _shared_league(league_id, year)
+    fetch = _final_cards if _week_is_final(league, year, week) else _live_cards
+    return fetch(league_id, year, week, *_espn_creds(), league)
+
+def _refresh_espn_data(league_id: int, year: int) -> bool:
+    """Forget live ESPN data (in-process caches + on-disk responses). False if the season is final."""
+    if season_is_final(year):
+        return False
     try:
-        from weasyprint import HTML, CSS
-        css = CSS(string=_emoji_css())
-        pdf_bytes = HTML(string=html, base_url=".").write_pdf(stylesheets=[css])
-        return pdf_bytes
-    except Exception as weasy_err:
-        # Fallback: xhtml2pdf (limited emoji support; may render boxes for some glyphs)
-        try:
-            from xhtml2pdf import pisa
-        except Exception as e:
-            raise RuntimeError(
-                "Neither WeasyPrint nor xhtml2pdf is available. Install weasyprint>=61 or xhtml2pdf>=0.2.13."
-            ) from e
+        current_week = _shared_league(league_id, year).current_week
+    except Exception:
+        current_week = None
+    invalidate_live(league_id, year, current_week)
+    forget_league(league_id, year)
+    for cached in (_live_matchups, _live_cards):
+        cached.clear()
+    return True
+
+if st.button(
+    "Refresh ESPN data",
+    help="Finished weeks are cached for good; the live week refreshes every few minutes. Force it now.",
+):
+    _require_modules()
+    with tracing.span("app.refresh", league=int(league_id)):
+        refreshed = _refresh_espn_data(int(league_id), int(year))
+    if refreshed:
+        st.success("Live ESPN data cleared — the next run refetches it.")
+    else:
+        st.info("That season is final; its cached data is already complete.")
 
-        html_with_css = html.replace(
-            "</head>",
-            f"<style>{_emoji_css()}</style></head>"
+# ---------- Downloads (rendered once, served from artifact_store) ----------
+def _download_buttons(files: dict, label: str, file_stem: str, key_prefix: str = ""):
+    if "md" in files:
+        st.download_button(
+            f"Download {label} (Markdown)",
+            data=files["md"],
+            file_name=f"{file_stem}.md",
+            mime="text/markdown",
+            key=f"{key_prefix}{file_stem}.md",
+        )
+    if "pdf" in files:
+        st.download_button(
+            f"Download {label} (PDF)",
+            data=files["pdf"],
+            file_name=f"{file_stem}.pdf",
+            mime="application/pdf",
+            key=f"{key_prefix}{file_stem}.pdf",
         )
 
-        import io
-        out = io.BytesIO()
-        pisa_status = pisa.CreatePDF(src=html_with_css, dest=out)
-        if pisa_status.err:
-            raise RuntimeError(
-                "xhtml2pdf failed to create PDF. Emojis may require WeasyPrint or an embedded emoji font."
-            ) from weasy_err
-        out.seek(0)
-        return out.read()
+def _artifact_downloads(kind: str, doc: str, title: str, label: str, file_stem: str):
+    """Markdown + PDF downloads for `doc`; the PDF is only rendered the first time this text is seen."""
+    files = artifact_store.render(int(league_id), int(year), int(week), kind, doc, title, formats=("md",))
+    try:
+        files.update(artifact_store.render(int(league_id), int(year), int(week), kind, doc, title, formats=("pdf",)))
+    except Exception as e:
+        st.warning("Couldn't generate a PDF with emojis. See details below.")
+        with st.expander("PDF error details"):
+            st.code("".join(traceback.format_exception(type(e), e, e.__traceback__)))
+    _download_buttons(files, label, file_stem)
+
+def _prerendered_downloads(kind: str, label: str, file_stem: str):
+    """Downloads for this week's document already rendered in this ARTIFACT_DIR, if any."""
+    files = artifact_store.latest(int(league_id), int(year), int(week), kind, formats=("md", "pdf"))
+    if files:
+        with st.expander(f"{label} already rendered for this week"):
+            _download_buttons(files, label, file_stem, key_prefix="ready-")
 
 # ---------- Recap “extra spice” (adds emojis & puns; does not change logic) ----------
 def _spice_up_recap(md_text: str, week_val: int) -> str:
@@ -223,13 +267,10 @@ def _spice_up_recap(md_text: str, week_val: int) -> str:
     return text
 
 # -------------------- Main Recap action (UNCHANGED summarizer) --------------------
-disabled = _import_error is not None or not bool(os.getenv("OPENAI_API_KEY"))
+disabled = not bool(os.getenv("OPENAI_API_KEY"))
+_prerendered_downloads("recap", "Recap", f"weekly_recap_{league_id}_{year}_w{week}")
 if st.button("Generate Weekly Recap", type="primary", disabled=disabled):
-    if _import_error:
-        st.error("Import failure: could not load a module.")
-        with st.expander("Import error details"):
-            st.code("".join(traceback.format_exception(type(_import_error), _import_error, _import_error.__traceback__)))
-        st.stop()
+    _require_modules()
 
     if not league_id or not year or not week:
         st.error("Please fill in League ID, Year, and Week.")
@@ -241,9 +282,10 @@ if st.button("Generate Weekly Recap", type="primary", disabled=disabled):
     if not os.getenv("ESPN_S2") or not os.getenv("SWID"):
         st.warning("No ESPN cookies found — public leagues may work; private leagues will not.")
 
-    with st.spinner("Pulling ESPN data and writing recaps…"):
+    with st.spinner("Pulling ESPN data…"):
         try:
-            matchups = _fetch_matchups_cached(int(league_id), int(year), int(week))
+            with tracing.span("app.fetch_matchups", league=int(league_id), week=int(week)):
+                matchups = _fetch_matchups_cached(int(league_id), int(year), int(week))
         except Exception as e:
             st.error("Failed while fetching ESPN data.")
             with st.expander("Error details"):
@@ -257,37 +299,32 @@ if st.button("Generate Weekly Recap", type="primary", disabled=disabled):
         with st.expander("Show raw matchup data"):
             st.write(matchups)
 
-        try:
-            try:
-                recap = generate_week_recap(matchups, league_id=int(league_id), year=int(year), week=int(week))
-            except TypeError:
-                recap = generate_week_recap(matchups)
-        except Exception as e:
-            st.error("LLM recap generation failed.")
-            with st.expander("Error details"):
-                st.code("".join(traceback.format_exception(type(e), e, e.__traceback__)))
-            st.stop()
+    # Stream the recap in as it's written (first matchup shows after one LLM round-trip)
+    recap_box = st.empty()
+    try:
+        with tracing.span("app.recap", league=int(league_id), week=int(week), matchups=len(matchups)):
+            recap = _stream_into(recap_box, stream_week_recap(
+                matchups, league_id=int(league_id), year=int(year), week=int(week), regenerate=regenerate
+            ))
+    except Exception as e:
+        st.error("LLM recap generation failed.")
+        with st.expander("Error details"):
+            st.code("".join(traceback.format_exception(type(e), e, e.__traceback__)))
+        st.stop()
 
     recap = _spice_up_recap(recap, int(week))
 
     st.success("Recap generated!")
-    _render(recap)
+    with recap_box.container():
+        _render(recap)
 
-    st.download_button(
-        "Download Recap (Markdown)",
-        data=(recap or "").encode("utf-8"),
-        file_name=f"weekly_recap_{league_id}_{year}_w{week}.md",
-        mime="text/markdown",
+    _artifact_downloads(
+        "recap", recap, f"Weekly Recap – Week {int(week)}", "Recap", f"weekly_recap_{league_id}_{year}_w{week}"
     )
 
 # If the button is disabled, show why (without exposing secrets)
 if disabled:
-    msgs = []
-    if _import_error is not None:
-        msgs.append("module import failure")
-    if not bool(os.getenv("OPENAI_API_KEY")):
-        msgs.append("OPENAI_API_KEY missing")
-    st.info("Generate button disabled: " + ", ".join(msgs))
+    st.info("Generate button disabled: OPENAI_API_KEY missing")
 
 # -------------------- Weekly Preview (LLM-driven; mirrors Recap UX) --------------------
 st.header("Weekly Preview")
@@ -296,7 +333,10 @@ st.header("Weekly Preview")
 espn_s2 = os.getenv("ESPN_S2", None)
 swid = os.getenv("SWID", os.getenv("ESPN_SWID", None))
 
+_prerendered_downloads("preview", "Preview", f"weekly_preview_{league_id}_{year}_w{week}")
 if st.button("Build Weekly Preview", type="secondary", disabled=not bool(os.getenv("OPENAI_API_KEY"))):
+    _require_modules()
+
     if not league_id or not year or not week:
         st.error("Please fill in League ID, Year, and Week.")
         st.stop()
@@ -310,7 +350,8 @@ if st.button("Build Weekly Preview", type="secondary", disabled=not bool(os.gete
     # 1) Pull raw preview cards (context passed to LLM)
     with st.spinner("Pulling ESPN data and computing projections…"):
         try:
-            cards = build_weekly_preview_cards(int(league_id), int(year), int(week), espn_s2=espn_s2, swid=swid)
+            with tracing.span("app.preview_cards", league=int(league_id), week=int(week)):
+                cards = _preview_cards_cached(int(league_id), int(year), int(week))
         except Exception as e:
             st.error("Preview failed while fetching data.")
             with st.expander("Error details"):
@@ -324,37 +365,44 @@ if st.button("Build Weekly Preview", type="secondary", disabled=not bool(os.gete
     with st.expander("Show raw preview context"):
         st.write(cards)
 
-    # 2) LLM generate (single doc, like recap)
-    with st.spinner("Assembling Weekly Preview with LLM…"):
-        try:
-            preview_doc = generate_week_preview(int(league_id), int(year), int(week), espn_s2=espn_s2, swid=swid)
-        except Exception as e:
-            st.error("LLM preview generation failed.")
-            with st.expander("Error details"):
-                st.code("".join(traceback.format_exception(type(e), e, e.__traceback__)))
-            st.stop()
+    # 2) LLM generate (single doc, like recap) — reuse the cards pulled above; matchups appear as they stream in
+    preview_box = st.empty()
+    try:
+        with tracing.span("app.preview", league=int(league_id), week=int(week), matchups=len(cards)):
+            preview_doc = _stream_into(preview_box, stream_week_preview_from_cards(
+                cards, int(league_id), int(year), int(week), regenerate=regenerate
+            ))
+    except Exception as e:
+        st.error("LLM preview generation failed.")
+        with st.expander("Error details"):
+            st.code("".join(traceback.format_exception(type(e), e, e.__traceback__)))
+        st.stop()
 
     st.success("Weekly Preview generated!")
-    _render(preview_doc)
+    with preview_box.container():
+        _render(preview_doc)
 
     # ---- Downloads ----
-    st.download_button(
-        "Download Preview (Markdown)",
-        data=(preview_doc or "").encode("utf-8"),
-        file_name=f"weekly_preview_{league_id}_{year}_w{week}.md",
-        mime="text/markdown",
+    _artifact_downloads(
+        "preview", preview_doc, f"Weekly Preview – Week {int(week)}", "Preview",
+        f"weekly_preview_{league_id}_{year}_w{week}",
     )
 
-    # PDF export with emoji support
-    try:
-        pdf_bytes = _md_to_pdf_bytes(preview_doc, title=f"Weekly Preview – Week {int(week)}")
+# -------------------- Diagnostics: timings (process-wide, since the last reset) --------------------
+with _timing_panel:
+    st.markdown("**Timings**")
+    if st.button("Reset timings"):
+        tracing.reset()
+    _trace = tracing.report()
+    if _trace["spans"]:
+        st.dataframe(tracing.span_rows(_trace), hide_index=True)
+        st.write(_trace["counters"])
         st.download_button(
-            "Download Preview (PDF)",
-            data=pdf_bytes,
-            file_name=f"weekly_preview_{league_id}_{year}_w{week}.pdf",
-            mime="application/pdf",
+            "Download run report (JSON)",
+            data=json.dumps(_trace, indent=2, default=str),
+            file_name=f"run_report_{_trace['run_id']}.json",
+            mime="application/json",
+            key="dl_run_report",
         )
-    except Exception as e:
-        st.warning("Couldn't generate a PDF with emojis. See details below.")
-        with st.expander("PDF error details"):
-            st.code("".join(traceback.format_exception(type(e), e, e.__traceback__)))
+    else:
+        st.caption("Nothing timed yet — generate a recap or preview.")
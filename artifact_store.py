@@ -0,0 +1,138 @@
+# artifact_store.py
+"""
+Rendered weekly documents (recap / preview) as Markdown, HTML and PDF, rendered once.
+
+Files are keyed by (league, year, week, kind, content hash), where the hash
+covers the Markdown, the document title and RENDER_VERSION:
+
+    .artifacts/<league_id>/<year>/w05/recap-3f2a9c1d0b7e4a61.md|.html|.pdf
+    .artifacts/<league_id>/<year>/w05/recap.latest     (hash of the newest render)
+
+The same text always maps to the same files, so a process renders each document
+once: within a scheduled run the send step reuses what the --dry-run pre-render
+stored, and the app reuses its own earlier renders. The store is a local
+directory, not shared between hosts: the scheduled job runs on a CI runner (its
+.artifacts/ is only uploaded as a build artifact), so the app renders its
+downloads itself.
+
+Environment:
+- ARTIFACT_DIR          where files live (default: ./.artifacts)
+- ARTIFACTS_DISABLED=1  render every time, store nothing
+"""
+import os
+import hashlib
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+import tracing
+
+RENDER_VERSION = "1"  # bump when the HTML/PDF rendering changes so old renders aren't served
+FORMATS = ("md", "html", "pdf")
+
+
+# ===============================
+# Configuration
+# ===============================
+def _artifact_dir() -> str:
+    return os.getenv("ARTIFACT_DIR", ".artifacts")
+
+def _disabled() -> bool:
+    return os.getenv("ARTIFACTS_DISABLED", "") == "1"
+
+
+# ===============================
+# Keys + files
+# ===============================
+def content_hash(markdown: str, title: str = "") -> str:
+    raw = "\0".join([RENDER_VERSION, title, markdown or ""])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+def _week_dir(league_id: int, year: int, week: int) -> str:
+    return os.path.join(_artifact_dir(), str(league_id), str(year), f"w{int(week):02d}")
+
+def artifact_path(league_id: int, year: int, week: int, kind: str, digest: str, fmt: str) -> str:
+    return os.path.join(_week_dir(league_id, year, week), f"{kind}-{digest}.{fmt}")
+
+def _read(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+def _write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)  # atomic: concurrent readers never see a half-written file
+
+
+# ===============================
+# Renderers (markdown, title) -> bytes
+# ===============================
+def _render_md(markdown: str, title: str) -> bytes:
+    return (markdown or "").encode("utf-8")
+
+def _render_html(markdown: str, title: str) -> bytes:
+    from emailer import markdown_as_html
+    return markdown_as_html(markdown).encode("utf-8")
+
+def _render_pdf(markdown: str, title: str) -> bytes:
+    from pdf_export import md_to_pdf_bytes
+    return md_to_pdf_bytes(markdown, title=title)
+
+RENDERERS: Dict[str, Callable[[str, str], bytes]] = {
+    "md": _render_md,
+    "html": _render_html,
+    "pdf": _render_pdf,
+}
+
+
+# ===============================
+# Public API
+# ===============================
+def render(
+    league_id: int,
+    year: int,
+    week: int,
+    kind: str,
+    markdown: str,
+    title: str = "",
+    formats: Iterable[str] = FORMATS,
+) -> Dict[str, bytes]:
+    """
+    {format: bytes} for this document, rendering (and storing) only the formats not stored yet.
+    Also marks this render as the week's latest `kind`.
+    """
+    digest = content_hash(markdown, title)
+    out: Dict[str, bytes] = {}
+    for fmt in formats:
+        path = artifact_path(league_id, year, week, kind, digest, fmt)
+        data = None if _disabled() else _read(path)
+        tracing.incr("artifacts.hits" if data is not None else "artifacts.renders")
+        if data is None:
+            data = RENDERERS[fmt](markdown, title)
+            if not _disabled():
+                _write(path, data)
+        out[fmt] = data
+    if not _disabled():
+        pointer = os.path.join(_week_dir(league_id, year, week), f"{kind}.latest")
+        if _read(pointer) != digest.encode("ascii"):
+            _write(pointer, digest.encode("ascii"))
+    return out
+
+def latest(league_id: int, year: int, week: int, kind: str, formats: Iterable[str] = FORMATS) -> Dict[str, bytes]:
+    """Stored files of the week's most recent `kind` render ({} if nothing was rendered yet)."""
+    if _disabled():
+        return {}
+    pointer = _read(os.path.join(_week_dir(league_id, year, week), f"{kind}.latest"))
+    if not pointer:
+        return {}
+    digest = pointer.decode("ascii").strip()
+    out: Dict[str, bytes] = {}
+    for fmt in formats:
+        data = _read(artifact_path(league_id, year, week, kind, digest, fmt))
+        if data is not None:
+            out[fmt] = data
+    return out
@@ -0,0 +1,263 @@
+# batch_runner.py
+"""
+Multi-league weekly recap pipeline.
+
+Each job (league_id, year, week, recipients) flows through four stages:
+
+    fetch (ESPN / local DB) -> generate (LLM) -> render (artifact_store) -> deliver (SMTP)
+
+Every stage has its own bounded thread pool, and a job moves on to the next
+stage as soon as it clears the previous one. A league stuck on a slow ESPN or
+LLM call only occupies one slot of that stage; other leagues keep flowing.
+A failure stops that job only and is reported with the stage it failed in.
+
+Environment (pool sizes):
+- BATCH_FETCH_WORKERS   (default: 4)
+- BATCH_LLM_WORKERS     (default: 2; each recap already fans out per matchup)
+- BATCH_RENDER_WORKERS  (default: 2)
+- BATCH_DELIVER_WORKERS (default: 2)
+"""
+import os
+import time
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import tracing
+
+STAGES = ("fetch", "generate", "render", "deliver")
+OUTPUT_KEYS = ("written", "sent_to", "subject", "pdf_error", "delivery")  # context kept on JobResult.output
+
+DEFAULT_WORKERS: Dict[str, int] = {
+    "fetch": int(os.getenv("BATCH_FETCH_WORKERS", "4")),
+    "generate": int(os.getenv("BATCH_LLM_WORKERS", "2")),
+    "render": int(os.getenv("BATCH_RENDER_WORKERS", "2")),
+    "deliver": int(os.getenv("BATCH_DELIVER_WORKERS", "2")),
+}
+
+
+@dataclass
+class Job:
+    league_id: int
+    year: int
+    week: Optional[int] = None  # None = last completed week
+    recipients: List[str] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        return f"league {self.league_id} {self.year} wk {self.week if self.week is not None else '?'}"
+
+
+@dataclass
+class JobResult:
+    job: Job
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    failed_stage: Optional[str] = None
+    error: Optional[str] = None
+    output: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.failed_stage is None
+
+
+@dataclass
+class StageStats:
+    workers: int
+    ok: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    first_start: Optional[float] = None
+    last_end: Optional[float] = None
+
+    @property
+    def jobs_per_second(self) -> float:
+        if self.first_start is None or self.last_end is None or self.last_end <= self.first_start:
+            return 0.0
+        return self.ok / (self.last_end - self.first_start)
+
+
+def current_season(today: Optional[date] = None) -> int:
+    """NFL season year: Jan/Feb games still belong to last year's season."""
+    today = today or date.today()
+    return today.year if today.month >= 3 else today.year - 1
+
+
+# ===============================
+# Stages (each takes the job + its context dict and fills in the context)
+# ===============================
+def resolve_week(job: Job) -> int:
+    """Fill in job.week (last completed week) if it wasn't given."""
+    if job.week is None:
+        from espn_cache import get_league
+
+        league = get_league(job.league_id, job.year)
+        job.week = max(1, int(league.current_week) - 1)
+    return job.week
+
+def fetch_stage(job: Job, ctx: Dict[str, Any]) -> None:
+    from espn_fetcher import get_week_matchups
+
+    resolve_week(job)
+    ctx["matchups"] = get_week_matchups(job.league_id, job.year, job.week)
+    if not ctx["matchups"]:
+        raise RuntimeError("no matchups found")
+
+def generate_stage(job: Job, ctx: Dict[str, Any]) -> None:
+    from gpt_summarizer import generate_week_recap
+
+    ctx["recap"] = generate_week_recap(ctx["matchups"], league_id=job.league_id, year=job.year, week=job.week)
+
+def render_stage(job: Job, ctx: Dict[str, Any]) -> None:
+    """Email body from the artifact store; the PDF is rendered there too (best effort) for app downloads."""
+    import artifact_store
+
+    ctx["subject"] = f"LLM-Commissioner Recap – Week {job.week}"
+    ctx["text"] = f"LLM-Commissioner Recap\n\n{ctx['recap']}"
+    args = (job.league_id, job.year, job.week, "recap", ctx["recap"], ctx["subject"])
+    ctx["html"] = artifact_store.render(*args, formats=("md", "html"))["html"].decode("utf-8")
+    try:
+        artifact_store.render(*args, formats=("pdf",))
+    except Exception as e:
+        ctx["pdf_error"] = f"{type(e).__name__}: {e}"
+
+def make_deliver_stage(dry_run: bool = False, out_dir: Optional[str] = None) -> Callable[[Job, Dict[str, Any]], None]:
+    """SMTP delivery; with dry_run (or no recipients) the rendered recap is written to out_dir instead."""
+    def deliver_stage(job: Job, ctx: Dict[str, Any]) -> None:
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+            base = os.path.join(out_dir, f"recap_{job.league_id}_{job.year}_w{int(job.week):02d}")
+            with open(f"{base}.md", "w", encoding="utf-8") as f:
+                f.write(ctx["recap"])
+            with open(f"{base}.html", "w", encoding="utf-8") as f:
+                f.write(ctx["html"])
+            ctx["written"] = base
+        if dry_run or not job.recipients:
+            return
+        from emailer import deliver, render_email
+
+        # rendered once per league, then one copy per manager over the shared SMTP pool.
+        # Recipients already in ctx["sent_to"] (an earlier, partly failed attempt) are skipped.
+        already = list(ctx.get("sent_to") or [])
+        pending = [r for r in job.recipients if r not in already]
+        if not pending:
+            return
+        report = deliver(render_email(ctx["subject"], ctx["text"], ctx["html"]), pending)
+        ctx["sent_to"] = already + report.sent
+        ctx["delivery"] = f"{len(report.sent)} sent, {report.msgs_per_second:.1f} msgs/s"
+        if report.failed:
+            raise RuntimeError(f"{len(report.failed)}/{len(job.recipients)} not delivered: "
+                               + "; ".join(f"{r} ({err})" for r, err in report.failed[:5]))
+    return deliver_stage
+
+
+# ===============================
+# Pipeline
+# ===============================
+class BatchRunner:
+    """Runs jobs through per-stage bounded pools; see module docstring."""
+
+    def __init__(
+        self,
+        workers: Optional[Dict[str, int]] = None,
+        stages: Optional[Dict[str, Callable[[Job, Dict[str, Any]], None]]] = None,
+        dry_run: bool = False,
+        out_dir: Optional[str] = None,
+    ):
+        self.workers = {**DEFAULT_WORKERS, **(workers or {})}
+        self.stages = stages or {
+            "fetch": fetch_stage,
+            "generate": generate_stage,
+            "render": render_stage,
+            "deliver": make_deliver_stage(dry_run=dry_run, out_dir=out_dir),
+        }
+        self.stats: Dict[str, StageStats] = {s: StageStats(workers=max(1, self.workers[s])) for s in STAGES}
+        self._lock = threading.Lock()
+
+    def _record(self, stage: str, start: float, end: float, ok: bool) -> None:
+        with self._lock:
+            st = self.stats[stage]
+            st.busy_seconds += end - start
+            st.first_start = start if st.first_start is None else min(st.first_start, start)
+            st.last_end = end if st.last_end is None else max(st.last_end, end)
+            if ok:
+                st.ok += 1
+            else:
+                st.failed += 1
+
+    def run(self, jobs: List[Job]) -> List[JobResult]:
+        results = [JobResult(job=j) for j in jobs]
+        done: "queue.Queue[int]" = queue.Queue()
+        pools = {
+            s: ThreadPoolExecutor(max_workers=self.stats[s].workers, thread_name_prefix=f"batch-{s}")
+            for s in STAGES
+        }
+
+        def step(index: int, stage_no: int, ctx: Dict[str, Any]) -> None:
+            stage = STAGES[stage_no]
+            result = results[index]
+            start = time.perf_counter()
+            try:
+                with tracing.span(f"stage.{stage}", job=result.job.label):
+                    self.stages[stage](result.job, ctx)
+            except Exception as e:
+                end = time.perf_counter()
+                self._record(stage, start, end, ok=False)
+                result.stage_seconds[stage] = end - start
+                result.failed_stage = stage
+                result.error = f"{type(e).__name__}: {e}"
+                result.output["traceback"] = traceback.format_exc()
+                done.put(index)
+                return
+            end = time.perf_counter()
+            self._record(stage, start, end, ok=True)
+            result.stage_seconds[stage] = end - start
+
+            if stage_no + 1 < len(STAGES):
+                pools[STAGES[stage_no + 1]].submit(step, index, stage_no + 1, ctx)
+            else:
+                result.output = {k: v for k, v in ctx.items() if k in OUTPUT_KEYS}
+                done.put(index)
+
+        try:
+            for i in range(len(jobs)):
+                pools[STAGES[0]].submit(step, i, 0, {})
+            for _ in range(len(jobs)):
+                done.get()
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+        return results
+
+
+# ===============================
+# Reporting
+# ===============================
+def format_report(results: List[JobResult], stats: Dict[str, StageStats], wall_seconds: float) -> str:
+    lines = [f"{'stage':<10}{'workers':>8}{'ok':>6}{'failed':>8}{'busy s':>9}{'jobs/s':>9}"]
+    for stage in STAGES:
+        st = stats[stage]
+        lines.append(f"{stage:<10}{st.workers:>8}{st.ok:>6}{st.failed:>8}{st.busy_seconds:>9.2f}{st.jobs_per_second:>9.2f}")
+
+    ok = sum(r.ok for r in results)
+    lines.append(f"\n{ok}/{len(results)} jobs completed in {wall_seconds:.2f}s wall clock")
+    for r in results:
+        timings = " ".join(f"{s}={r.stage_seconds[s]:.2f}s" for s in STAGES if s in r.stage_seconds)
+        status = "ok" if r.ok else f"FAILED in {r.failed_stage}: {r.error}"
+        if r.output.get("delivery"):
+            status += f" [{r.output['delivery']}]"
+        if r.output.get("pdf_error"):
+            status += f" (no PDF: {r.output['pdf_error']})"
+        lines.append(f"- {r.job.label}: {status} ({timings})")
+    return "\n".join(lines)
+
+
+def run_jobs(jobs: List[Job], **kwargs) -> Tuple[List[JobResult], Dict[str, StageStats], float]:
+    runner = BatchRunner(**kwargs)
+    t0 = time.perf_counter()
+    results = runner.run(jobs)
+    return results, runner.stats, time.perf_counter() - t0
@@ -0,0 +1,142 @@
+# benchmarks/bench_history_queries.py
+"""
+History DB query benchmark: schema v1 (AUTOINCREMENT rows, natural-key uniques only)
+vs the current schema (season-scoped clustered keys + covering indexes).
+
+    python benchmarks/bench_history_queries.py [--leagues 3] [--seasons 8] [--iterations 200]
+
+Builds both databases from the same synthetic history in a temp dir, then times
+the real access paths: one (league, year, week), one fantasy team across seasons,
+and one player across seasons.
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import history_db  # noqa: E402
+
+TEAMS = 12
+PLAYERS_PER_TEAM = 16
+WEEKS = range(1, 18)
+
+QUERIES: Dict[str, str] = {
+    "week (league, year, week)": """
+        SELECT team_a_id, team_b_id, score_a, score_b, winner_id
+        FROM matchups WHERE league_id = ? AND year = ? AND week = ?""",
+    "week player lines": """
+        SELECT fantasy_team_id, player_name, points
+        FROM player_scores WHERE league_id = ? AND year = ? AND week = ?""",
+    "team across seasons": """
+        SELECT year, week, score_a, score_b FROM matchups WHERE league_id = ? AND team_a_id = ?
+        UNION ALL
+        SELECT year, week, score_b, score_a FROM matchups WHERE league_id = ? AND team_b_id = ?""",
+    "team standings across seasons": """
+        SELECT year, week, wins, losses, rank FROM standings WHERE league_id = ? AND team_id = ?""",
+    "player across seasons": """
+        SELECT year, week, points FROM player_scores WHERE player_id = ?""",
+}
+
+
+def synthetic_rows(leagues: int, seasons: int) -> Dict[str, List[Tuple]]:
+    rnd = random.Random(7)
+    rows: Dict[str, List[Tuple]] = {"matchups": [], "player_scores": [], "standings": []}
+    for league_id in range(1, leagues + 1):
+        for year in range(2024 - seasons + 1, 2025):
+            for week in WEEKS:
+                order = list(range(1, TEAMS + 1))
+                rnd.shuffle(order)
+                for i in range(0, TEAMS, 2):
+                    a, b = order[i], order[i + 1]
+                    sa, sb = round(rnd.uniform(60, 180), 2), round(rnd.uniform(60, 180), 2)
+                    rows["matchups"].append((league_id, year, week, a, b, sa, sb, a if sa > sb else b))
+                for team in range(1, TEAMS + 1):
+                    rows["standings"].append((league_id, year, week, team, 0, 0, 0, 0.0, 0.0, team))
+                    for slot in range(PLAYERS_PER_TEAM):
+                        player_id = str(1000 + (team * 37 + slot * 11 + year) % 900)
+                        rows["player_scores"].append((league_id, year, week, team, player_id, f"Player {player_id}",
+                                                      1, round(rnd.uniform(0, 30), 2), "RB"))
+    return rows
+
+
+def build(path: str, version: int, rows: Dict[str, List[Tuple]]) -> None:
+    conn = sqlite3.connect(path, isolation_level=None)
+    history_db.migrate(conn, target=version)
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO matchups (league_id, year, week, team_a_id, team_b_id, score_a, score_b, winner_id) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows["matchups"])
+    conn.executemany(
+        "INSERT INTO standings (league_id, year, week, team_id, wins, losses, ties, points_for, points_against, rank) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows["standings"])
+    conn.executemany(
+        "INSERT OR IGNORE INTO player_scores (league_id, year, week, fantasy_team_id, player_id, player_name, "
+        "team_id, points, position) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows["player_scores"])
+    conn.execute("COMMIT")
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def _params(name: str, rnd: random.Random, leagues: int, seasons: int) -> Tuple:
+    league = rnd.randint(1, leagues)
+    year = rnd.randint(2024 - seasons + 1, 2024)
+    team = rnd.randint(1, TEAMS)
+    if name.startswith("week"):
+        return (league, year, rnd.choice(list(WEEKS)))
+    if name == "team across seasons":
+        return (league, team, league, team)
+    if name == "team standings across seasons":
+        return (league, team)
+    return (str(1000 + rnd.randint(0, 899)),)
+
+
+def time_queries(path: str, iterations: int, leagues: int, seasons: int) -> Dict[str, Tuple[float, str]]:
+    conn = sqlite3.connect(path)
+    out: Dict[str, Tuple[float, str]] = {}
+    for name, sql in QUERIES.items():
+        rnd = random.Random(42)
+        params = [_params(name, rnd, leagues, seasons) for _ in range(iterations)]
+        plan = "; ".join(r[-1] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, params[0]))
+        t0 = time.perf_counter()
+        for p in params:
+            conn.execute(sql, p).fetchall()
+        out[name] = ((time.perf_counter() - t0) * 1000 / iterations, plan)
+    conn.close()
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--leagues", type=int, default=3)
+    parser.add_argument("--seasons", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    rows = synthetic_rows(args.leagues, args.seasons)
+    print(f"rows: matchups={len(rows['matchups'])} player_scores={len(rows['player_scores'])} "
+          f"standings={len(rows['standings'])}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for label, version in (("before (v1)", 1), ("after (v2)", len(history_db.MIGRATIONS))):
+            path = os.path.join(tmp, f"history_v{version}.db")
+            build(path, version, rows)
+            results[label] = time_queries(path, args.iterations, args.leagues, args.seasons)
+
+    before, after = results["before (v1)"], results["after (v2)"]
+    print(f"\n{'query':<32}{'before ms':>11}{'after ms':>11}{'speedup':>9}")
+    for name in QUERIES:
+        b, a = before[name][0], after[name][0]
+        print(f"{name:<32}{b:>11.3f}{a:>11.3f}{(b / a if a else float('inf')):>8.1f}x")
+    print("\nquery plans (after):")
+    for name in QUERIES:
+        print(f"- {name}: {after[name][1]}")
+
+
+if __name__ == "__main__":
+    main()
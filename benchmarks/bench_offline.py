@@ -0,0 +1,276 @@
+# benchmarks/bench_offline.py
+"""
+End-to-end timings with no network: recap, preview, history import and PDF export
+for 8/10/12/14-team leagues.
+
+    python benchmarks/bench_offline.py [--teams 8 10 12 14] [--runs 3] [--json out.json]
+    python benchmarks/bench_offline.py --json new.json --baseline old.json --max-regression 0.25
+
+ESPN: synthetic leagues are recorded once into an espn_cache directory
+(espn_fixtures.py) and replayed by espn_stub_server.py through ESPN_BASE_URL,
+so the real espn_api `League` parses them exactly as it would live payloads.
+`--fixtures DIR --league-id ID --year Y` replays a cache recorded from a real
+league instead. OpenAI: fake_llm_server.py through OPENAI_BASE_URL, with
+`--llm-latency` seconds to the first token and `--llm-per-token` per token.
+
+Every run starts cold: a fresh ESPN cache directory, no pooled League objects,
+and the LLM cache and artifact store disabled. Scenarios:
+- recap    fetch + generate + render stages of batch_runner (no delivery)
+- preview  generate_week_preview (cards + quotes)
+- import   import_espn_history.backfill of one season into a temporary DB
+- pdf      pdf_export.md_to_pdf_bytes of that league's recap
+
+Results (median/min/max seconds plus span and counter totals from tracing) go
+to --json. With --baseline, exits 1 when a median is more than
+--max-regression slower than the baseline's.
+"""
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ["LLM_CACHE_DISABLED"] = "1"
+os.environ["ARTIFACTS_DISABLED"] = "1"
+os.environ["MATCHUP_SOURCES"] = "espn"
+os.environ["OPENAI_API_KEY"] = "offline"  # only the fake server sees it
+os.environ.pop("ESPN_S2", None)
+os.environ.pop("ESPN_SWID", None)
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+import tracing  # noqa: E402
+import espn_fixtures  # noqa: E402
+from espn_stub_server import StubServer  # noqa: E402
+from fake_llm_server import FakeLlm  # noqa: E402
+
+SCENARIOS = ("recap", "preview", "import", "pdf")
+
+
+# ===============================
+# Scenarios (league_id, year, week, state) -> detail dict
+# ===============================
+def _recap_text(league_id: int, year: int, week: int, state: Dict[str, Any]) -> str:
+    from batch_runner import Job, fetch_stage, generate_stage
+
+    if "recap" not in state:
+        ctx: Dict[str, Any] = {}
+        job = Job(league_id, year, week)
+        fetch_stage(job, ctx)
+        generate_stage(job, ctx)
+        state["recap"] = ctx["recap"]
+    return state["recap"]
+
+def run_recap(league_id: int, year: int, week: int, state: Dict[str, Any]) -> Dict[str, Any]:
+    from batch_runner import Job, fetch_stage, generate_stage, render_stage
+
+    ctx: Dict[str, Any] = {}
+    job = Job(league_id, year, week)
+    fetch_stage(job, ctx)
+    generate_stage(job, ctx)
+    render_stage(job, ctx)
+    state["recap"] = ctx["recap"]
+    return {"matchups": len(ctx["matchups"]), "html_bytes": len(ctx["html"])}
+
+def run_preview(league_id: int, year: int, week: int, state: Dict[str, Any]) -> Dict[str, Any]:
+    from preview.preview_generator import generate_week_preview
+
+    text = generate_week_preview(league_id, year, week + 1)
+    return {"chars": len(text)}
+
+def run_import(league_id: int, year: int, week: int, state: Dict[str, Any]) -> Dict[str, Any]:
+    import import_espn_history
+
+    db_dir = tempfile.mkdtemp(prefix="bench-db-")
+    try:
+        log = io.StringIO()
+        with redirect_stdout(log):
+            stats = import_espn_history.backfill(league_id, year, year, db_path=os.path.join(db_dir, "history.db"))
+        if "Failed" in log.getvalue():
+            raise RuntimeError(log.getvalue().strip().splitlines()[-1])
+        return {"tables": len(stats)}
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+def run_pdf(league_id: int, year: int, week: int, state: Dict[str, Any]) -> Dict[str, Any]:
+    from pdf_export import md_to_pdf_bytes
+
+    recap = state["recap"]  # from the recap scenario, or generated untimed by bench_league
+    return {"pdf_bytes": len(md_to_pdf_bytes(recap, title=f"Week {week} Recap"))}
+
+RUNNERS: Dict[str, Callable[[int, int, int, Dict[str, Any]], Dict[str, Any]]] = {
+    "recap": run_recap, "preview": run_preview, "import": run_import, "pdf": run_pdf,
+}
+
+
+# ===============================
+# Harness
+# ===============================
+def _warm_imports() -> None:
+    """Import-time cost is bench_startup.py's job; keep it out of the first timed run."""
+    import openai  # noqa: F401
+    import espn_api.football  # noqa: F401
+    import batch_runner  # noqa: F401
+    import import_espn_history  # noqa: F401
+    import preview.preview_generator  # noqa: F401
+    from pdf_export import get_renderer
+
+    get_renderer()
+    logging.getLogger("xhtml2pdf").setLevel(logging.ERROR)
+
+def _cold_start(cache_root: str) -> str:
+    """Fresh ESPN cache dir, no pooled leagues, empty tracing; returns the cache dir."""
+    import espn_cache
+
+    espn_cache._registry.clear()
+    tracing.reset()
+    path = tempfile.mkdtemp(prefix="espn-", dir=cache_root)
+    os.environ["ESPN_CACHE_DIR"] = path
+    return path
+
+def _summary(seconds: List[float]) -> Dict[str, float]:
+    return {"median": round(statistics.median(seconds), 4), "min": round(min(seconds), 4),
+            "max": round(max(seconds), 4)}
+
+def bench_league(league_id: int, year: int, week: int, scenarios: List[str], runs: int,
+                 stub: StubServer, cache_root: str) -> Dict[str, Any]:
+    state: Dict[str, Any] = {}
+    results: Dict[str, Any] = {}
+    for scenario in scenarios:
+        if scenario == "pdf" and "recap" not in state:
+            _cold_start(cache_root)
+            _recap_text(league_id, year, week, state)
+        seconds: List[float] = []
+        entry: Dict[str, Any] = {}
+        for _ in range(runs):
+            _cold_start(cache_root)
+            requests, misses = stub.requests, len(stub.misses)
+            t0 = time.perf_counter()
+            try:
+                entry["detail"] = RUNNERS[scenario](league_id, year, week, state)
+            except Exception as e:
+                entry["error"] = f"{type(e).__name__}: {e}"
+                break
+            seconds.append(time.perf_counter() - t0)
+            report = tracing.report()
+            entry["espn_requests"] = stub.requests - requests
+            entry["counters"] = report["counters"]
+            entry["spans_ms"] = {name: st["total_ms"] for name, st in report["spans"].items()}
+            if len(stub.misses) > misses:
+                entry["error"] = f"{len(stub.misses) - misses} ESPN requests not in the fixtures: " \
+                                 f"{stub.misses[misses]}"
+                break
+        if seconds and "error" not in entry:
+            entry.update(_summary(seconds), runs=len(seconds))
+        results[scenario] = entry
+    return results
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Medians more than max_regression slower than the baseline's (same league size + scenario)."""
+    slower = []
+    for size, scenarios in current["leagues"].items():
+        for scenario, entry in scenarios.items():
+            before = baseline.get("leagues", {}).get(size, {}).get(scenario, {}).get("median")
+            if before and "median" in entry and entry["median"] > before * (1 + max_regression):
+                slower.append(f"{size} teams {scenario}: {entry['median']:.3f}s vs {before:.3f}s "
+                              f"({(entry['median'] / before - 1) * 100:+.0f}%)")
+    return slower
+
+def format_results(data: Dict[str, Any]) -> str:
+    scenarios = data["args"]["scenarios"]
+    lines = [f"{'teams':<8}" + "".join(f"{s:>12}" for s in scenarios) + f"{'espn req':>10}"]
+    for size, results in data["leagues"].items():
+        cells = "".join(f"{results[s]['median']:>11.3f}s" if "median" in results[s] else f"{'error':>12}"
+                        for s in scenarios)
+        requests = sum(results[s].get("espn_requests", 0) for s in scenarios)
+        lines.append(f"{size:<8}{cells}{requests:>10}")
+    for size, results in data["leagues"].items():
+        for s in scenarios:
+            if "error" in results[s]:
+                lines.append(f"! {size} teams {s}: {results[s]['error']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmarks (replayed ESPN + fake LLM).")
+    parser.add_argument("--teams", type=int, nargs="+", default=[8, 10, 12, 14])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--espn-latency", type=float, default=0.02, help="seconds added to every ESPN response")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="fake LLM seconds to first token")
+    parser.add_argument("--llm-per-token", type=float, default=0.002, help="fake LLM seconds per output token")
+    parser.add_argument("--fixtures", help="espn_cache dir to replay (default: record synthetic leagues)")
+    parser.add_argument("--league-id", type=int, help="with --fixtures: the recorded league (replaces --teams)")
+    parser.add_argument("--year", type=int, default=espn_fixtures.YEAR)
+    parser.add_argument("--week", type=int, default=espn_fixtures.WEEKS - 1, help="recap week (preview: week + 1)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="earlier --json output to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    work = tempfile.mkdtemp(prefix="bench-offline-")
+    fixtures = args.fixtures or os.path.join(work, "fixtures")
+    if args.league_id:
+        leagues = {"recorded": args.league_id}
+    elif args.fixtures:
+        leagues = {str(t): espn_fixtures.league_id_for(t) for t in args.teams}
+    else:
+        print(f"Recording synthetic leagues ({', '.join(map(str, args.teams))} teams)...")
+        leagues = {str(t): espn_fixtures.record(fixtures, t, args.year) for t in args.teams}
+
+    stub = StubServer(fixtures, latency=args.espn_latency).start()
+    llm = FakeLlm(latency=args.llm_latency, per_token=args.llm_per_token).start()
+    os.environ["ESPN_BASE_URL"] = stub.url
+    os.environ["OPENAI_BASE_URL"] = llm.base_url
+    data: Dict[str, Any] = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": vars(args),
+        "leagues": {},
+    }
+    try:
+        _warm_imports()
+        for size, league_id in leagues.items():
+            print(f"{size} teams (league {league_id})...")
+            data["leagues"][size] = bench_league(league_id, args.year, args.week, args.scenarios, args.runs,
+                                                 stub, work)
+    finally:
+        stub.stop()
+        llm.stop()
+        shutil.rmtree(work, ignore_errors=True)
+    data["llm"] = {"requests": llm.requests, "prompt_tokens": llm.prompt_tokens,
+                   "completion_tokens": llm.completion_tokens}
+
+    print()
+    print(format_results(data))
+    failed = any("error" in entry for results in data["leagues"].values() for entry in results.values())
+    if args.baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                slower = compare(data, json.load(f), args.max_regression)
+            data["regressions"] = slower
+            for line in slower:
+                print(f"REGRESSION {line}")
+            failed = failed or bool(slower)
+        else:
+            print(f"(no baseline at {args.baseline}; nothing to compare)")
+    if args.json:
+        if os.path.dirname(args.json):
+            os.makedirs(os.path.dirname(args.json), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/bench_pdf_render.py
+"""
+PDF export cost in ms per page, per backend: cold (all setup per export, like the
+old app code), warm (one shared PdfRenderer) and a process pool (render_many).
+
+    python benchmarks/bench_pdf_render.py [--docs 8] [--matchups 6] [--workers 4] [--json out.json]
+
+Backends that can't load here are reported as unavailable.
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pdf_export  # noqa: E402
+
+_PAGE = re.compile(rb"/Type\s*/Page(?!s)")
+
+
+def page_count(pdf: bytes) -> int:
+    return len(_PAGE.findall(pdf)) or 1
+
+
+def synthetic_doc(matchups: int, seed: int) -> Tuple[str, str]:
+    rnd = random.Random(seed)
+    lines = [f"# 🏈🔥 Weekly Recap — Week {seed} 🔥🏈", "_Tape don’t lie — but it does rewind._ 🎬✨", ""]
+    for i in range(matchups):
+        a, b = round(rnd.uniform(80, 150), 2), round(rnd.uniform(80, 150), 2)
+        lines += [f"## Team {2 * i + 1} vs Team {2 * i + 2} 🏈💥", f"**Final:** {a} – {b}", ""]
+        lines += [" ".join(rnd.choice(["clutch ⏱️", "boom 💣", "MVP ⭐", "gritty", "week", "bench", "points"])
+                           for _ in range(90)), ""]
+        lines += ["| Player | Slot | Pts |", "|---|---|---|"]
+        lines += [f"| Player {rnd.randint(1, 500)} | WR | {rnd.uniform(0, 30):.1f} |" for _ in range(6)]
+        lines.append("")
+    return "\n".join(lines), f"Weekly Recap – Week {seed}"
+
+
+def _measure(render, docs) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    pdfs = render(docs)
+    ms = (time.perf_counter() - t0) * 1000
+    pages = sum(page_count(p) for p in pdfs)
+    return {"ms_total": round(ms, 1), "pages": pages, "ms_per_page": round(ms / pages, 2)}
+
+
+def bench_backend(backend: str, docs, workers: int) -> Dict[str, Any]:
+    def cold(batch):
+        # what every export used to do: detect, locate fonts, parse CSS
+        out = []
+        for md_text, title in batch:
+            pdf_export.emoji_css.cache_clear()
+            pdf_export.detect_backends()
+            out.append(pdf_export.PdfRenderer([backend]).render(md_text, title))
+        return out
+
+    warm_renderer = pdf_export.PdfRenderer([backend])
+    warm_renderer.render(*docs[0])  # setup cost paid before timing
+
+    return {
+        "backend": backend,
+        "cold": _measure(cold, docs),
+        "warm": _measure(lambda batch: [warm_renderer.render(*d) for d in batch], docs),
+        f"pool_{workers}": _measure(lambda batch: pdf_export.render_many(batch, workers=workers, backend=backend), docs),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PDF export ms/page per backend.")
+    parser.add_argument("--docs", type=int, default=8)
+    parser.add_argument("--matchups", type=int, default=6)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    docs = [synthetic_doc(args.matchups, seed) for seed in range(1, args.docs + 1)]
+    available = {
+        "weasyprint": pdf_export._weasyprint_available(),
+        "xhtml2pdf": pdf_export._xhtml2pdf_available(),
+    }
+    results: List[Dict[str, Any]] = [bench_backend(b, docs, args.workers) for b, ok in available.items() if ok]
+
+    print(f"{args.docs} docs x {args.matchups} matchups\n")
+    print(f"{'backend':<12}{'mode':<10}{'pages':>7}{'total ms':>11}{'ms/page':>10}")
+    for r in results:
+        for mode in ("cold", "warm", f"pool_{args.workers}"):
+            m = r[mode]
+            print(f"{r['backend']:<12}{mode:<10}{m['pages']:>7}{m['ms_total']:>11.1f}{m['ms_per_page']:>10.2f}")
+    for b, ok in available.items():
+        if not ok:
+            print(f"{b:<12}unavailable")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"docs": args.docs, "matchups": args.matchups, "available": available, "results": results},
+                      f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_preview_cards.py
+"""
+Box-score pulls per preview week: build_weekly_preview_cards vs one pull per team.
+
+    python benchmarks/bench_preview_cards.py [--teams 8 10 12 14] [--runs 3] [--check]
+
+Offline: each league is a synthetic one (espn_fixtures.py) answered in-process,
+with the ESPN disk cache disabled so every box_scores() call is a real pull.
+--check exits 1 unless building a week's cards calls league.box_scores exactly once.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from typing import Any, Dict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ["ESPN_CACHE_DISABLED"] = "1"
+os.environ.pop("ESPN_BASE_URL", None)
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+import espn_fixtures  # noqa: E402
+from espn_cache import load_league  # noqa: E402
+from preview import preview_generator  # noqa: E402
+
+
+class CountingLeague:
+    """Wraps a League and counts box_scores() calls."""
+
+    def __init__(self, league):
+        self._league = league
+        self.box_score_calls = 0
+
+    def box_scores(self, *args, **kwargs):
+        self.box_score_calls += 1
+        return self._league.box_scores(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._league, name)
+
+
+def _per_team(league, week: int) -> None:
+    """The pre-index approach: one box-score pull per team."""
+    meta = preview_generator._get_team_meta(league)
+    for team_id in meta:
+        preview_generator._get_team_week_projection(league, week, team_id, meta)
+
+
+def bench(teams: int, runs: int, week: int) -> Dict[str, Any]:
+    with espn_fixtures.serving(espn_fixtures.synthetic_league(teams)):
+        league = load_league(espn_fixtures.league_id_for(teams), espn_fixtures.YEAR)
+        row: Dict[str, Any] = {"teams": teams}
+        for label, fn in (("cards", lambda lg: preview_generator.build_weekly_preview_cards(
+                              0, espn_fixtures.YEAR, week, league=lg)),
+                          ("per_team", lambda lg: _per_team(lg, week))):
+            seconds = []
+            for _ in range(runs):
+                counting = CountingLeague(league)
+                t0 = time.perf_counter()
+                fn(counting)
+                seconds.append(time.perf_counter() - t0)
+            row[f"{label}_box_score_calls"] = counting.box_score_calls
+            row[f"{label}_ms"] = round(statistics.median(seconds) * 1000, 1)
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Box-score pulls per preview week.")
+    parser.add_argument("--teams", type=int, nargs="+", default=[8, 10, 12, 14])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--week", type=int, default=espn_fixtures.WEEKS)
+    parser.add_argument("--check", action="store_true", help="exit 1 unless cards pull box scores once per week")
+    args = parser.parse_args(argv)
+
+    rows = [bench(t, args.runs, args.week) for t in args.teams]
+    print(f"{'teams':<7}{'cards pulls':>12}{'cards ms':>10}{'per-team pulls':>16}{'per-team ms':>13}")
+    for r in rows:
+        print(f"{r['teams']:<7}{r['cards_box_score_calls']:>12}{r['cards_ms']:>10.1f}"
+              f"{r['per_team_box_score_calls']:>16}{r['per_team_ms']:>13.1f}")
+    if args.check and any(r["cards_box_score_calls"] != 1 for r in rows):
+        print("FAIL: build_weekly_preview_cards should call league.box_scores once per week")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/bench_prompt_tokens.py
+"""
+Prompt tokens per matchup request: the original verbose prompt vs the compact one.
+
+    python benchmarks/bench_prompt_tokens.py [--teams 12] [--budget 0] [--json out.json]
+
+Offline: the prompts are built for a synthetic week and counted locally
+(tiktoken when installed, else token_count's estimate). Both formats use the
+same seed, so they describe the same jokes. For billed tokens and latency
+against a real or stub server, run bench_recap_batching.py once per
+RECAP_PROMPT_FORMAT.
+"""
+import os
+import sys
+import json
+import argparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("OPENAI_API_KEY", "unused")  # nothing is sent
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+import gpt_summarizer  # noqa: E402
+from bench_recap_batching import synthetic_week  # noqa: E402
+
+
+def _pct(before: int, after: int) -> str:
+    return f"{(after - before) / before * 100:+.0f}%" if before else "n/a"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verbose vs compact recap prompt size.")
+    parser.add_argument("--teams", type=int, default=12)
+    parser.add_argument("--budget", type=int, default=gpt_summarizer.PROMPT_BUDGET,
+                        help="RECAP_PROMPT_BUDGET for the compact FACTS table (0 = no limit)")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    gpt_summarizer.PROMPT_BUDGET = args.budget
+    report = gpt_summarizer.prompt_token_report(synthetic_week(args.teams), league_id=1, year=2024, week=1)
+    before, after = report["formats"]["verbose"], report["formats"]["compact"]
+
+    print(f"model {report['model']}, counts {'exact (tiktoken)' if report['exact'] else 'estimated'}\n")
+    print(f"{'matchup':<10}{'verbose':>9}{'compact':>9}{'change':>8}")
+    for i, (b, a) in enumerate(zip(before["per_matchup"], after["per_matchup"]), start=1):
+        print(f"{i:<10}{b:>9}{a:>9}{_pct(b, a):>8}")
+    for key, label in (("total", "per-matchup calls"), ("batched", "one batched call"),
+                       ("static_prefix", "system prompt")):
+        print(f"{label:<20}{before[key]:>9}{after[key]:>9}{_pct(before[key], after[key]):>8}")
+    if after["static_prefix"] < gpt_summarizer.PROMPT_CACHE_MIN_TOKENS:
+        print(f"\nnote: the system prompt is under {gpt_summarizer.PROMPT_CACHE_MIN_TOKENS} tokens, "
+              "so provider prompt caching won't apply to it yet")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), **report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/bench_recap_batching.py
+"""
+Per-matchup vs batched recap generation: tokens and latency for one week.
+
+    python benchmarks/bench_recap_batching.py [--teams 12] [--runs 3] [--workers 4]
+
+Talks to whatever OPENAI_BASE_URL / OPENAI_API_KEY point at (the real API, or a
+local stub for offline runs). The LLM cache is disabled so every run pays for
+its completions. Token counts come from the API's `usage` field. The prompt
+size is also counted locally (token_count: tiktoken if installed, else an
+estimate), so it can be compared without a server. RECAP_PROMPT_FORMAT=verbose
+measures the original prompt.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+import threading
+from typing import Any, Dict, List
+
+os.environ["LLM_CACHE_DISABLED"] = "1"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import gpt_summarizer  # noqa: E402
+
+SLOTS = ["QB", "RB", "RB", "WR", "WR", "TE", "RB/WR/TE", "D/ST", "K"]
+
+
+def synthetic_week(teams: int, seed: int = 3) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    names = list(gpt_summarizer.PUN_SEEDS) + [f"Player {i}" for i in range(200)]
+    matchups = []
+    for i in range(0, teams, 2):
+        def side():
+            return [{"name": rnd.choice(names), "slot": s, "points": round(rnd.uniform(0, 30), 2)} for s in SLOTS]
+        home, away = side(), side()
+        hs, as_ = round(sum(p["points"] for p in home), 2), round(sum(p["points"] for p in away), 2)
+        m = {"home_team": f"Team {i + 1}", "home_score": hs, "away_team": f"Team {i + 2}", "away_score": as_,
+             "margin": round(hs - as_, 2)}
+        if hs != as_:
+            m["winner"] = m["home_team"] if hs > as_ else m["away_team"]
+        matchups.append({"week": 1, "matchup": m, "home_starters": home, "away_starters": away})
+    return matchups
+
+
+def _local_tokens(messages: List[Dict[str, str]]) -> int:
+    from token_count import count_message_tokens
+    return count_message_tokens(messages, gpt_summarizer.MODEL)
+
+
+class UsageRecorder:
+    """Wraps client.chat.completions.create to collect usage + local prompt size per call."""
+
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._create = gpt_summarizer.get_client().chat.completions.create
+
+    def __enter__(self):
+        def create(*args, **kwargs):
+            t0 = time.perf_counter()
+            resp = self._create(*args, **kwargs)
+            usage = getattr(resp, "usage", None)
+            with self._lock:
+                self.calls.append({
+                    "seconds": time.perf_counter() - t0,
+                    "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+                    "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+                    "local_prompt_tokens": _local_tokens(kwargs.get("messages", [])),
+                })
+            return resp
+        gpt_summarizer.get_client().chat.completions.create = create
+        return self
+
+    def __exit__(self, *exc):
+        gpt_summarizer.get_client().chat.completions.create = self._create
+
+
+def run_mode(matchups, batched: bool, workers: int, runs: int) -> Dict[str, Any]:
+    walls, calls = [], []
+    for run in range(runs):
+        with UsageRecorder() as rec:
+            t0 = time.perf_counter()
+            gpt_summarizer.generate_week_recap(
+                matchups, league_id=1, year=2024, week=run + 1, max_workers=workers, batched=batched
+            )
+            walls.append(time.perf_counter() - t0)
+        calls.append(rec.calls)
+    last = calls[-1]
+    return {
+        "mode": "batched" if batched else "per_matchup",
+        "requests": len(last),
+        "prompt_tokens": sum(c["prompt_tokens"] for c in last),
+        "local_prompt_tokens": sum(c["local_prompt_tokens"] for c in last),
+        "completion_tokens": sum(c["completion_tokens"] for c in last),
+        "wall_seconds_median": round(statistics.median(walls), 3),
+        "wall_seconds_all": [round(w, 3) for w in walls],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-matchup vs batched recap generation.")
+    parser.add_argument("--teams", type=int, default=12)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=gpt_summarizer.MAX_WORKERS)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    matchups = synthetic_week(args.teams)
+    results = [run_mode(matchups, batched=b, workers=args.workers, runs=args.runs) for b in (False, True)]
+
+    print(f"{len(matchups)} matchups, {args.runs} runs, model {gpt_summarizer.MODEL}\n")
+    print(f"{'mode':<13}{'requests':>9}{'prompt tok':>12}{'(local)':>9}{'compl tok':>11}{'median s':>10}")
+    for r in results:
+        print(f"{r['mode']:<13}{r['requests']:>9}{r['prompt_tokens']:>12}{r['local_prompt_tokens']:>9}"
+              f"{r['completion_tokens']:>11}{r['wall_seconds_median']:>10.2f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"matchups": len(matchups), "runs": args.runs, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
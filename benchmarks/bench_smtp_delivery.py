@@ -0,0 +1,99 @@
+# benchmarks/bench_smtp_delivery.py
+"""
+League-wide email blast: one connection per message vs emailer's pooled delivery.
+
+    python benchmarks/bench_smtp_delivery.py [--leagues 12] [--managers 12] [--login-delay 0.05]
+                                            [--pool 3] [--drop-every 0] [--json out.json]
+
+Runs against benchmarks/smtp_stub_server.py, started in-process. `--login-delay`
+stands in for the TLS handshake + login that a real server charges per connection.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Any, Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+from smtp_stub_server import SmtpStub  # noqa: E402
+
+
+def _recap(league: int) -> str:
+    return f"# Week 5 Recap – League {league}\n\n" + "\n\n".join(
+        f"## Team {2 * i + 1} vs Team {2 * i + 2}\n" + "Somebody got cooked. 🏈🔥 " * 40 for i in range(6)
+    )
+
+
+def run_mode(mode: str, leagues: int, managers: int, pool_size: int, stub: SmtpStub) -> Dict[str, Any]:
+    import emailer
+
+    c0, l0, m0 = stub.connections, stub.logins, len(stub.messages)
+    renders = 0
+    t0 = time.perf_counter()
+    failed = 0
+    pool = emailer.SmtpPool(size=pool_size) if mode == "pooled" else None
+    for league in range(1, leagues + 1):
+        recipients = [f"manager{m}@league{league}.test" for m in range(1, managers + 1)]
+        subject, recap = f"LLM-Commissioner Recap – Week 5 (league {league})", _recap(league)
+        if mode == "pooled":
+            email = emailer.render_email(subject, recap, emailer.markdown_as_html(recap))
+            renders += 1
+            failed += len(emailer.deliver(email, recipients, pool=pool).failed)
+        else:
+            for r in recipients:  # what test_email.py / the old deliver stage did, per recipient
+                msg = emailer.build_message(subject, [r], recap, emailer.markdown_as_html(recap))
+                renders += 1
+                emailer.send_message(msg, [r])
+    if pool is not None:
+        pool.close()
+    seconds = time.perf_counter() - t0
+    sent = len(stub.messages) - m0
+    return {
+        "mode": mode,
+        "messages": sent,
+        "failed": failed,
+        "renders": renders,
+        "connections": stub.connections - c0,
+        "logins": stub.logins - l0,
+        "reconnects": pool.reconnects if pool is not None else 0,
+        "seconds": round(seconds, 3),
+        "msgs_per_second": round(sent / seconds, 1) if seconds else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-message SMTP connections vs pooled delivery.")
+    parser.add_argument("--leagues", type=int, default=12)
+    parser.add_argument("--managers", type=int, default=12)
+    parser.add_argument("--login-delay", type=float, default=0.05)
+    parser.add_argument("--message-delay", type=float, default=0.002)
+    parser.add_argument("--pool", type=int, default=3)
+    parser.add_argument("--drop-every", type=int, default=0, help="stub hangs up after every Nth message")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    stub = SmtpStub(login_delay=args.login_delay, message_delay=args.message_delay, drop_every=args.drop_every).start()
+    os.environ.update(SMTP_HOST="127.0.0.1", SMTP_PORT=str(stub.port), SMTP_SECURITY="none",
+                      SMTP_USER="bench@example.test", SMTP_PASS="x")
+    try:
+        results: List[Dict[str, Any]] = [
+            run_mode(mode, args.leagues, args.managers, args.pool, stub) for mode in ("per_message", "pooled")
+        ]
+    finally:
+        stub.stop()
+
+    print(f"{args.leagues} leagues x {args.managers} managers, login delay {args.login_delay}s\n")
+    print(f"{'mode':<13}{'msgs':>6}{'failed':>8}{'renders':>9}{'conns':>7}{'logins':>8}{'seconds':>9}{'msgs/s':>9}")
+    for r in results:
+        print(f"{r['mode']:<13}{r['messages']:>6}{r['failed']:>8}{r['renders']:>9}{r['connections']:>7}"
+              f"{r['logins']:>8}{r['seconds']:>9.2f}{r['msgs_per_second']:>9.1f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start import cost per entry point, from `python -X importtime`.
+
+    python benchmarks/bench_startup.py [--runs 3] [--top 8] [--json out.json] [--check]
+
+Each module is imported in a fresh interpreter. The report shows wall time, the
+module's cumulative import time and its heaviest imports. --check exits 1 when
+an entry point eagerly imports a heavy dependency that should load on first use
+(openai, espn_api, markdown, weasyprint, ...).
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from typing import Any, Dict, List, Tuple
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ("openai", "espn_api", "markdown", "weasyprint", "xhtml2pdf")
+
+# entry point -> heavy modules it must not import at startup
+TARGETS: Dict[str, Tuple[str, ...]] = {
+    "app": HEAVY,
+    "main": HEAVY,
+    "batch_runner": HEAVY,
+    "job_queue": HEAVY,
+    "gpt_summarizer": ("openai", "espn_api", "markdown", "weasyprint", "xhtml2pdf"),
+    "artifact_store": HEAVY,
+    "pdf_export": ("markdown", "weasyprint", "xhtml2pdf"),
+    "emailer": ("markdown",),
+}
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def import_profile(module: str) -> Tuple[float, List[Tuple[int, int, str]]]:
+    """(wall seconds, [(depth, cumulative_us, name), ...]) for one fresh `import module`."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((len(m.group(3)) // 2, int(m.group(2)), m.group(4)))
+    return wall, rows
+
+
+def profile_target(module: str, forbidden: Tuple[str, ...], runs: int, top: int) -> Dict[str, Any]:
+    walls, rows = [], []
+    for _ in range(runs):
+        wall, rows = import_profile(module)
+        walls.append(wall)
+    # children are listed before their parent: the target's subtree is everything after the previous root
+    end = next(i for i, (depth, _, name) in enumerate(rows) if depth == 0 and name == module)
+    start = max((i for i in range(end) if rows[i][0] == 0), default=-1) + 1
+    subtree = rows[start:end + 1]
+    names = {name for _, _, name in subtree}
+    cumulative = rows[end][1]
+    heaviest = sorted(((us, name) for depth, us, name in subtree if depth == 1), reverse=True)[:top]
+    return {
+        "module": module,
+        "wall_ms_median": round(statistics.median(walls) * 1000, 1),
+        "import_ms": round(cumulative / 1000, 1),
+        "heaviest": [{"module": name, "ms": round(us / 1000, 1)} for us, name in heaviest],
+        "eager_heavy_imports": sorted(h for h in forbidden if h in names),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time profile of the project's entry points.")
+    parser.add_argument("modules", nargs="*", default=list(TARGETS))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--json", help="also write results to this file")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a heavy dependency loads at import")
+    args = parser.parse_args(argv)
+
+    results = [profile_target(m, TARGETS.get(m, HEAVY), args.runs, args.top) for m in args.modules]
+
+    for r in results:
+        flag = f"  EAGER: {', '.join(r['eager_heavy_imports'])}" if r["eager_heavy_imports"] else ""
+        print(f"{r['module']:<16} wall {r['wall_ms_median']:>7.1f} ms   import {r['import_ms']:>7.1f} ms{flag}")
+        for h in r["heaviest"]:
+            print(f"    {h['ms']:>8.1f} ms  {h['module']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"runs": args.runs, "results": results}, f, indent=2)
+
+    if args.check and any(r["eager_heavy_imports"] for r in results):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
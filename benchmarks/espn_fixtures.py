@@ -0,0 +1,190 @@
+# benchmarks/espn_fixtures.py
+"""
+Synthetic ESPN fantasy leagues, recorded into an espn_cache directory.
+
+    python benchmarks/espn_fixtures.py --out .bench/fixtures --teams 8 10 12 14
+
+Each league is generated as the raw JSON payloads ESPN would return (league
+settings, teams, rosters, a full schedule with box-score lineups, points and
+projections, the pro schedule). `record()` runs the real espn_api `League`
+against those payloads and writes every response through espn_cache, so the
+directory looks exactly like one filled by a live run. Serve it with
+espn_stub_server.py to replay it over HTTP. A cache directory recorded from a
+real league can be used in its place.
+"""
+import os
+import sys
+import json
+import random
+import argparse
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# (lineupSlotId, starters) in an ESPN standard lineup; bench is slot 20, IR slot 21
+LINEUP = [(0, 1), (2, 2), (4, 2), (6, 1), (23, 1), (16, 1), (17, 1)]
+DEFAULT_POSITION = {0: 1, 2: 2, 4: 3, 6: 4, 23: 2, 16: 16, 17: 5}
+YEAR = 2023
+WEEKS = 14              # regular-season matchup periods
+CURRENT_WEEK = 15       # the season is over: every week is final
+LAST_SCORING_PERIOD = 17
+
+Responder = Callable[[str, Optional[dict], Optional[dict], str], Any]
+
+
+def league_id_for(teams: int) -> int:
+    return 900000 + teams
+
+
+def synthetic_league(teams: int, year: int = YEAR, seed: int = 1) -> Responder:
+    """A responder(kind, params, headers, extend) answering espn_api's requests for one league."""
+    if teams % 2:
+        raise ValueError("teams must be even")
+    rnd = random.Random(seed * 100 + teams)
+    team_ids = list(range(1, teams + 1))
+    rosters: Dict[int, List[Tuple[int, int, int]]] = {}
+    pid = 1000
+    for t in team_ids:
+        slots = [slot for slot, count in LINEUP for _ in range(count)] + [20] * 6 + [21]
+        rosters[t] = []
+        for slot in slots:
+            pid += 1
+            rosters[t].append((pid, slot, rnd.randint(1, 30)))
+
+    def entry(player: Tuple[int, int, int], week: int) -> Dict[str, Any]:
+        player_id, slot, pro_team = player
+        r = random.Random(player_id * 100 + week)
+        position = slot if slot not in (20, 21, 23) else 2
+        return {"lineupSlotId": slot, "playerId": player_id, "playerPoolEntry": {"player": {
+            "id": player_id, "fullName": f"Player {player_id}", "proTeamId": pro_team,
+            "defaultPositionId": DEFAULT_POSITION.get(position, 2), "eligibleSlots": [position, 20, 21],
+            "stats": [
+                {"seasonId": year, "scoringPeriodId": week, "statSourceId": 0,
+                 "appliedTotal": round(r.uniform(0, 30), 2), "proTeamId": pro_team, "stats": {}},
+                {"seasonId": year, "scoringPeriodId": week, "statSourceId": 1,
+                 "appliedTotal": round(r.uniform(3, 20), 2), "stats": {}},
+            ],
+        }}}
+
+    def side(t: int, week: int) -> Dict[str, Any]:
+        entries = [entry(p, week) for p in rosters[t]]
+        total = sum(e["playerPoolEntry"]["player"]["stats"][0]["appliedTotal"]
+                    for e in entries if e["lineupSlotId"] not in (20, 21))
+        return {"teamId": t, "totalPoints": round(total, 2), "rosterForCurrentScoringPeriod": {"entries": entries}}
+
+    schedule = []
+    for week in range(1, WEEKS + 1):
+        order = team_ids[:]
+        random.Random(seed * 1000 + week).shuffle(order)
+        for i in range(0, teams, 2):
+            home, away = side(order[i], week), side(order[i + 1], week)
+            winner = "HOME" if home["totalPoints"] > away["totalPoints"] else "AWAY"
+            schedule.append({"id": len(schedule) + 1, "matchupPeriodId": week, "home": home, "away": away,
+                             "winner": winner, "playoffTierType": "NONE"})
+
+    record = {"wins": 0, "losses": 0, "ties": 0, "pointsFor": 0.0, "pointsAgainst": 0.0,
+              "streakLength": 1, "streakType": "WIN"}
+    league = {
+        "status": {"currentMatchupPeriod": WEEKS, "firstScoringPeriod": 1, "finalScoringPeriod": LAST_SCORING_PERIOD,
+                   "previousSeasons": [], "latestScoringPeriod": CURRENT_WEEK},
+        "scoringPeriodId": CURRENT_WEEK,
+        "seasonId": year,
+        "settings": {
+            "name": f"Synthetic {teams}-team League", "size": teams,
+            "scheduleSettings": {"matchupPeriodCount": WEEKS,
+                                 "matchupPeriods": {str(w): [w] for w in range(1, WEEKS + 1)},
+                                 "playoffTeamCount": 4, "playoffSeedingRule": "TOTAL_POINTS_SCORED", "divisions": []},
+            "tradeSettings": {"vetoVotesRequired": 4}, "draftSettings": {"keeperCount": 0},
+            "scoringSettings": {"matchupTieRule": "NONE", "playoffMatchupTieRule": "NONE", "scoringItems": []},
+            "acquisitionSettings": {"isUsingAcquisitionBudget": False}, "rosterSettings": {"lineupSlotCounts": {}},
+        },
+        "members": [],
+        "teams": [
+            {"id": t, "abbrev": f"T{t}", "name": f"Team {t}", "divisionId": 0, "record": {"overall": record},
+             "playoffSeed": t, "rankCalculatedFinal": 0, "owners": [f"{{OWNER-{t}}}"],
+             "roster": {"entries": [entry(p, WEEKS) for p in rosters[t]]}}
+            for t in team_ids
+        ],
+        "schedule": schedule,
+    }
+    pro_schedule = {"settings": {"proTeams": [
+        {"id": t, "proGamesByScoringPeriod": {
+            str(w): [{"homeProTeamId": t, "awayProTeamId": t % 30 + 1, "date": 1700000000000}]
+            for w in range(1, LAST_SCORING_PERIOD + 1)}}
+        for t in range(1, 31)
+    ]}}
+    players = [{"id": p[0], "fullName": f"Player {p[0]}"} for t in team_ids for p in rosters[t]]
+
+    def respond(kind: str, params: Optional[dict] = None, headers: Optional[dict] = None, extend: str = "") -> Any:
+        params = params or {}
+        view = params.get("view")
+        if kind == "get":
+            return players if extend == "/players" else pro_schedule
+        if view == "mDraftDetail":
+            return {"draftDetail": {"drafted": False}}
+        if view == "mPositionalRatings":
+            return {"positionAgainstOpponent": {"positionalRatings": {}}}
+        if view == "mMatchupScore":
+            return {"schedule": schedule}
+        if isinstance(view, list) and "mScoreboard" in view:
+            wanted = json.loads(headers["x-fantasy-filter"])["schedule"]["filterMatchupPeriodIds"]["value"]
+            return {"schedule": [m for m in schedule if m["matchupPeriodId"] in {int(w) for w in wanted}]}
+        return league
+    return respond
+
+
+@contextmanager
+def serving(respond: Responder) -> Iterator[None]:
+    """Answer espn_api's blocking requests from `respond` instead of the network (recording only)."""
+    from espn_api.requests.espn_requests import EspnFantasyRequests
+
+    saved = EspnFantasyRequests.league_get, EspnFantasyRequests.get
+    EspnFantasyRequests.league_get = lambda self, params=None, headers=None, extend="": \
+        respond("league_get", params, headers, extend)
+    EspnFantasyRequests.get = lambda self, params=None, headers=None, extend="": respond("get", params, headers, extend)
+    try:
+        yield
+    finally:
+        EspnFantasyRequests.league_get, EspnFantasyRequests.get = saved
+
+
+def record(cache_dir: str, teams: int, year: int = YEAR, preview_week: int = WEEKS) -> int:
+    """
+    Write a synthetic league's responses into `cache_dir` (an espn_cache layout), covering
+    what the recap, preview and history import paths request. Returns the league id.
+    """
+    from espn_cache import load_league
+    from preview.preview_generator import build_weekly_preview_cards
+
+    league_id = league_id_for(teams)
+    saved = os.environ.get("ESPN_CACHE_DIR")
+    os.environ["ESPN_CACHE_DIR"] = cache_dir
+    try:
+        with serving(synthetic_league(teams, year)):
+            league = load_league(league_id, year)
+            for week in range(1, LAST_SCORING_PERIOD + 1):
+                league.box_scores(week)
+                league.scoreboard(week)
+            build_weekly_preview_cards(league_id, year, preview_week, league=league)
+    finally:
+        if saved is None:
+            os.environ.pop("ESPN_CACHE_DIR", None)
+        else:
+            os.environ["ESPN_CACHE_DIR"] = saved
+    return league_id
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record synthetic ESPN leagues into an espn_cache directory.")
+    parser.add_argument("--out", default=".bench/fixtures")
+    parser.add_argument("--teams", type=int, nargs="+", default=[8, 10, 12, 14])
+    parser.add_argument("--year", type=int, default=YEAR)
+    args = parser.parse_args(argv)
+    for teams in args.teams:
+        league_id = record(args.out, teams, args.year)
+        print(f"{teams} teams: league {league_id}, season {args.year} -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# benchmarks/espn_stub_server.py
+"""
+Local stand-in for ESPN's fantasy API that replays responses recorded by espn_cache.
+
+    python benchmarks/espn_stub_server.py --cache-dir .espn_cache --port 8765 --latency 0.15
+    ESPN_BASE_URL=http://127.0.0.1:8765 ESPN_CACHE_DIR=/tmp/fresh python ...
+
+Requests are mapped back to the cache file the sync path would have written
+(same scope / year / week / endpoint_name; the espn_s2/SWID cookies pick the
+credential scope), so any run that populated the
+cache can be replayed offline. Unknown requests get a 404. HTTP/1.1 keep-alive
+is supported, and `connections` counts the TCP connections that were opened.
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from espn_cache import _cache_dir, cache_path, endpoint_name, league_scope  # noqa: E402
+
+_LEAGUE = re.compile(r"^/apis/v3/games/\w+/seasons/(\d+)/segments/0/leagues/(\d+)(/.*)?$")
+_HISTORY = re.compile(r"^/apis/v3/games/\w+/leagueHistory/(\d+)(/.*)?$")
+_SEASON = re.compile(r"^/apis/v3/games/\w+/seasons/(\d+)(/.*)?$")
+
+
+def _value(v: str):
+    return int(v) if v.isdigit() else v
+
+
+def resolve(cache_dir: str, raw_path: str, filter_header: Optional[str], cookie_header: Optional[str] = None) -> Optional[str]:
+    """Recorded file for this request, or None."""
+    url = urlsplit(raw_path)
+    params: dict = {}
+    for key, value in parse_qsl(url.query, keep_blank_values=True):
+        if key in params:
+            params[key] = (params[key] if isinstance(params[key], list) else [params[key]]) + [value]
+        else:
+            params[key] = value
+
+    m = _LEAGUE.match(url.path)
+    h = _HISTORY.match(url.path)
+    s = _SEASON.match(url.path)
+    if m:
+        year, scope, extend = m.group(1), m.group(2), m.group(3) or ""
+    elif h:
+        scope, extend, year = h.group(1), h.group(2) or "", str(params.pop("seasonId", ""))
+    elif s:
+        year, scope, extend = s.group(1), "_espn", s.group(2) or ""
+    else:
+        return None
+
+    if scope != "_espn":
+        cookies = SimpleCookie(cookie_header or "")
+        scope = league_scope(scope, *(cookies[k].value if k in cookies else None for k in ("espn_s2", "SWID")))
+    week = params.get("scoringPeriodId")
+    shaped = {k: (v if isinstance(v, list) else _value(v)) for k, v in params.items()}
+    headers = {"x-fantasy-filter": filter_header} if filter_header else None
+    path = cache_path(scope, year, _value(week) if week else None, endpoint_name(shaped, headers, extend))
+    return os.path.join(cache_dir, os.path.relpath(path, _cache_dir()))
+
+
+class StubServer:
+    def __init__(self, cache_dir: str, port: int = 0, latency: float = 0.0):
+        self.cache_dir = cache_dir
+        self.latency = latency
+        self.requests = 0
+        self.connections = 0
+        self.misses = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                time.sleep(stub.latency)
+                path = resolve(stub.cache_dir, self.path, self.headers.get("x-fantasy-filter"),
+                               self.headers.get("Cookie"))
+                entry = None
+                if path and os.path.exists(path):
+                    with open(path, "r", encoding="utf-8") as f:
+                        entry = json.load(f)
+                if entry is None:
+                    with stub._lock:
+                        stub.misses.append(self.path)
+                    body, status = b'{"messages": ["not recorded"]}', 404
+                else:
+                    body, status = json.dumps(entry["response"]).encode("utf-8"), 200
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def start(self) -> "StubServer":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded ESPN responses over HTTP.")
+    parser.add_argument("--cache-dir", default=os.getenv("ESPN_CACHE_DIR", ".espn_cache"))
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args(argv)
+    stub = StubServer(args.cache_dir, args.port, args.latency)
+    print(f"Replaying {args.cache_dir} on {stub.url} (Ctrl+C to stop)")
+    try:
+        stub.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
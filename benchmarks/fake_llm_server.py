@@ -0,0 +1,169 @@
+# benchmarks/fake_llm_server.py
+"""
+Local stand-in for the OpenAI chat completions API, with configurable latency.
+
+    python benchmarks/fake_llm_server.py --port 8766 --latency 0.3 --per-token 0.002
+    OPENAI_BASE_URL=http://127.0.0.1:8766/v1 OPENAI_API_KEY=x python main.py ...
+
+Answers POST /v1/chat/completions, plain or streamed (SSE), with canned text
+shaped like what each caller parses:
+- preview quotes (a JSON payload with "items") get a JSON list of quote records
+- batched recaps ("=== MATCHUP n ===" blocks) get the JSON list of {index, recap}
+- anything else gets a ~180-word markdown recap
+
+`latency` is the time to the first token and `per_token` the generation time per
+output token, so a reply costs about latency + per_token * tokens. The
+`usage` field is filled from token_count (streamed replies send it in a final
+chunk when stream_options.include_usage is set, like the real API). `fail_every` answers every Nth
+request with a 429 to exercise retries.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from token_count import count_message_tokens, count_tokens  # noqa: E402
+
+_RECAP = (
+    "{hook}\n\n**Turning Point**: One drive flipped the whole matchup and the bench never recovered.\n\n"
+    "**Studs & Duds**:\n- The QB played like rent was due.\n- The flex spot filed a missing-persons report.\n"
+    "- The kicker did kicker things.\n\n**Takeaway**: Set your lineup before kickoff. 😉\n\n"
+) + "Filler analysis about targets, snaps and vibes. " * 14
+
+
+def _reply(messages) -> str:
+    user = messages[-1]["content"] if messages else ""
+    if user.startswith("{") and '"items"' in user:
+        items = json.loads(user).get("items", [])
+        return json.dumps([
+            {"home_team": i.get("home_team"), "away_team": i.get("away_team"),
+             "home_quote": f"We win the trenches in week {k}", "away_quote": f"Our speed travels, game {k}",
+             "closer": f"Buckle up for matchup {k}"}
+            for k, i in enumerate(items, start=1)
+        ])
+    if "=== MATCHUP " in user:
+        count = user.count("=== MATCHUP ")
+        return json.dumps([{"index": k, "recap": _RECAP.format(hook=f"Matchup {k} was a heist.")}
+                           for k in range(1, count + 1)])
+    facts = [line for line in user.splitlines() if line.strip() and line.strip() != "FACTS:"]
+    return _RECAP.format(hook=f"Cold open: {facts[1] if len(facts) > 1 else 'what a week'}.")
+
+
+class FakeLlm:
+    def __init__(self, port: int = 0, latency: float = 0.3, per_token: float = 0.0, fail_every: int = 0):
+        self.latency = latency
+        self.per_token = per_token
+        self.fail_every = fail_every
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, status: int, payload: dict) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 429:
+                    self.send_header("retry-after-ms", "10")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with fake._lock:
+                    fake.requests += 1
+                    n = fake.requests
+                if fake.fail_every and n % fake.fail_every == 0:
+                    self._json(429, {"error": {"message": "rate limited (fake)", "type": "rate_limit_error"}})
+                    return
+
+                messages = body.get("messages", [])
+                content = _reply(messages)
+                prompt_tokens, completion_tokens = count_message_tokens(messages), count_tokens(content)
+                with fake._lock:
+                    fake.prompt_tokens += prompt_tokens
+                    fake.completion_tokens += completion_tokens
+                time.sleep(fake.latency)
+                if not body.get("stream"):
+                    time.sleep(fake.per_token * completion_tokens)
+                    self._json(200, {
+                        "id": f"fake-{n}", "object": "chat.completion", "created": int(time.time()),
+                        "model": body.get("model", "fake"),
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                     "finish_reason": "stop"}],
+                        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                                  "total_tokens": prompt_tokens + completion_tokens},
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                step = 16  # characters per chunk, ~4 tokens
+                for i in range(0, len(content), step):
+                    chunk = {"id": f"fake-{n}", "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": body.get("model", "fake"),
+                             "choices": [{"index": 0, "delta": {"content": content[i:i + step]}, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    time.sleep(fake.per_token * 4)
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    chunk = {"id": f"fake-{n}", "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": body.get("model", "fake"), "choices": [],
+                             "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                                       "total_tokens": prompt_tokens + completion_tokens}}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def start(self) -> "FakeLlm":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local fake of the OpenAI chat completions API.")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds to the first token")
+    parser.add_argument("--per-token", type=float, default=0.0, help="seconds per generated token")
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every Nth request with a 429")
+    args = parser.parse_args(argv)
+    fake = FakeLlm(args.port, args.latency, args.per_token, args.fail_every)
+    print(f"Fake LLM on {fake.base_url} (Ctrl+C to stop)")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"{fake.requests} requests, {fake.prompt_tokens} prompt / {fake.completion_tokens} completion tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# benchmarks/smtp_stub_server.py
+"""
+Local SMTP stand-in (plain TCP, no TLS) for exercising emailer's delivery pool.
+
+    python benchmarks/smtp_stub_server.py --port 8025 --login-delay 0.05
+    SMTP_HOST=127.0.0.1 SMTP_PORT=8025 SMTP_SECURITY=none python main.py ...
+
+Speaks the subset of ESMTP that smtplib uses (EHLO/HELO, AUTH PLAIN,
+MAIL, RCPT, DATA, RSET, NOOP, QUIT) and accepts everything. Messages are kept
+in memory. `login_delay` stands in for the TLS handshake + login a real server
+costs per connection, and `drop_every` hangs up after every Nth message to
+exercise reconnects. `aiosmtpd` works too if you have it installed; this one
+just needs the standard library.
+"""
+import time
+import argparse
+import threading
+import socketserver
+from typing import List, Tuple
+
+
+class SmtpStub:
+    def __init__(self, port: int = 0, login_delay: float = 0.0, message_delay: float = 0.0, drop_every: int = 0):
+        self.login_delay = login_delay
+        self.message_delay = message_delay
+        self.drop_every = drop_every
+        self.connections = 0
+        self.logins = 0
+        self.messages: List[Tuple[str, List[str], bytes]] = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str) -> None:
+                self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+            def handle(self):
+                with stub._lock:
+                    stub.connections += 1
+                time.sleep(stub.login_delay)  # handshake cost, paid once per connection
+                self.reply("220 stub ESMTP")
+                sender, rcpts = "", []
+                while True:
+                    raw = self.rfile.readline()
+                    if not raw:
+                        return
+                    line = raw.decode("utf-8", "replace").rstrip("\r\n")
+                    verb = line.split(" ", 1)[0].upper()
+                    if verb == "EHLO":
+                        self.wfile.write(b"250-stub\r\n250-AUTH PLAIN\r\n250 8BITMIME\r\n")
+                    elif verb == "HELO":
+                        self.reply("250 stub")
+                    elif verb == "AUTH":
+                        if len(line.split()) == 2:  # no initial response: ask for the credentials
+                            self.reply("334 ")
+                            self.rfile.readline()
+                        with stub._lock:
+                            stub.logins += 1
+                        self.reply("235 ok")
+                    elif verb == "MAIL":
+                        sender, rcpts = line.split(":", 1)[1].strip(), []
+                        self.reply("250 ok")
+                    elif verb == "RCPT":
+                        rcpts.append(line.split(":", 1)[1].strip().strip("<>"))
+                        self.reply("250 ok")
+                    elif verb == "DATA":
+                        self.reply("354 end with .")
+                        data = []
+                        while True:
+                            chunk = self.rfile.readline()
+                            if chunk in (b".\r\n", b".\n", b""):
+                                break
+                            data.append(chunk)
+                        time.sleep(stub.message_delay)
+                        with stub._lock:
+                            stub.messages.append((sender, rcpts, b"".join(data)))
+                            count = len(stub.messages)
+                        self.reply("250 queued")
+                        if stub.drop_every and count % stub.drop_every == 0:
+                            return  # hang up without a goodbye
+                    elif verb in ("RSET", "NOOP"):
+                        self.reply("250 ok")
+                    elif verb == "QUIT":
+                        self.reply("221 bye")
+                        return
+                    else:
+                        self.reply("502 not implemented")
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self) -> "SmtpStub":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local SMTP stand-in that accepts every message.")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--login-delay", type=float, default=0.0, help="seconds per new connection")
+    parser.add_argument("--message-delay", type=float, default=0.0, help="seconds per message")
+    parser.add_argument("--drop-every", type=int, default=0, help="hang up after every Nth message")
+    args = parser.parse_args(argv)
+    stub = SmtpStub(args.port, args.login_delay, args.message_delay, args.drop_every)
+    print(f"SMTP stub on 127.0.0.1:{stub.port} (Ctrl+C to stop)")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"{stub.connections} connections, {stub.logins} logins, {len(stub.messages)} messages")
+
+
+if __name__ == "__main__":
+    main()
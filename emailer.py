@@ -0,0 +1,292 @@
+# emailer.py
+"""
+Email rendering + SMTP delivery, shared by the batch runner (main.py) and test_email.py.
+
+Bulk sends go through `deliver`: a league's email is rendered once (`render_email`)
+and sent to each recipient over a small pool of logged-in connections
+(`SmtpPool`). Each worker sends a batch over one connection, a connection is
+recycled after SMTP_MAX_PER_CONNECTION messages, and a dropped connection is
+reopened and the message retried.
+
+Environment:
+- SMTP_HOST                (default: smtp.gmail.com)
+- SMTP_PORT                465 = SSL, 587 = STARTTLS (default: 465)
+- SMTP_SECURITY            ssl | starttls | none (default: from the port; none is for local test servers)
+- SMTP_USER                sender address (full Gmail address)
+- SMTP_PASS                Gmail App Password
+- SMTP_POOL_SIZE           open connections (default: 3)
+- SMTP_MAX_PER_CONNECTION  messages before a connection is recycled (default: 50)
+- SMTP_BATCH_SIZE          messages a worker sends per connection checkout (default: 20)
+"""
+import os
+import ssl
+import time
+import queue
+import atexit
+import smtplib
+import threading
+import html as _html
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from typing import Callable, List, Optional, Tuple
+
+import tracing
+
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_SECURITY = os.getenv("SMTP_SECURITY", "ssl" if SMTP_PORT == 465 else "starttls")
+SENDER = os.getenv("SMTP_USER")
+PASS = os.getenv("SMTP_PASS")
+
+POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "3"))
+MAX_PER_CONNECTION = int(os.getenv("SMTP_MAX_PER_CONNECTION", "50"))
+BATCH_SIZE = int(os.getenv("SMTP_BATCH_SIZE", "20"))
+
+_FONT = "system-ui,-apple-system,Segoe UI,Roboto,Arial,sans-serif"
+
+
+# ===============================
+# Rendering
+# ===============================
+def recap_as_html(content: str) -> str:
+    """Return content as safe HTML. If already HTML-ish, pass through."""
+    if not isinstance(content, str):
+        content = str(content)
+    looks_like_html = ("<" in content and ">" in content) or content.strip().lower().startswith("<html")
+    if looks_like_html:
+        return content
+    # Escape and preserve newlines
+    return f"<div style='white-space:pre-wrap; font-family:{_FONT}'>{_html.escape(content)}</div>"
+
+def markdown_as_html(md_text: str) -> str:
+    """Markdown recap -> HTML fragment (plain escaped text if `markdown` isn't installed)."""
+    try:
+        from markdown import markdown as md_to_html
+    except ImportError:
+        return recap_as_html(md_text)
+    with tracing.span("render.html"):
+        return f"<div style='font-family:{_FONT}'>{md_to_html(md_text or '', extensions=['tables'])}</div>"
+
+def build_message(subject: str, recipients: List[str], text: str, html_body: str,
+                  sender: Optional[str] = None) -> MIMEMultipart:
+    """"alternative" container so clients prefer HTML but have a plaintext fallback."""
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = sender or SENDER or ""
+    msg["To"] = ", ".join(recipients)
+    msg.attach(MIMEText(text, "plain"))
+    msg.attach(MIMEText(f"""<html><body>
+      <h2 style="margin:0 0 12px 0;font-family:{_FONT}">LLM-Commissioner</h2>
+      {html_body}
+    </body></html>""", "html"))
+    return msg
+
+
+@dataclass
+class RenderedEmail:
+    """A MIME message serialized once, without a To header; addressed per recipient at send time."""
+    sender: str
+    body: str
+
+    def for_recipient(self, recipient: str) -> str:
+        return f"To: {recipient}\n{self.body}"
+
+def render_email(subject: str, text: str, html_body: str, sender: Optional[str] = None) -> RenderedEmail:
+    msg = build_message(subject, [], text, html_body, sender)
+    del msg["To"]
+    return RenderedEmail(sender=msg["From"], body=msg.as_string())
+
+
+# ===============================
+# Connections
+# ===============================
+def require_smtp_credentials() -> None:
+    if not SENDER or not PASS:
+        raise RuntimeError("SMTP_USER and/or SMTP_PASS not set. Use Gmail address and App Password.")
+
+def open_connection(debug: bool = False) -> smtplib.SMTP:
+    """Connected (and, when SMTP_USER/SMTP_PASS are set, logged-in) SMTP session."""
+    context = ssl.create_default_context()
+    if SMTP_SECURITY == "ssl":
+        s = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, context=context, timeout=60)
+    else:
+        s = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=60)
+    s.set_debuglevel(1 if debug else 0)
+    if SMTP_SECURITY == "starttls":
+        s.ehlo()
+        s.starttls(context=context)
+        s.ehlo()
+    if SENDER and PASS:
+        s.login(SENDER, PASS)
+    return s
+
+def _connection_lost(e: Exception) -> bool:
+    """Errors after which the connection is unusable (as opposed to a refused recipient)."""
+    if isinstance(e, smtplib.SMTPResponseException):
+        return e.smtp_code == 421  # "service closing transmission channel"
+    return isinstance(e, (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError))
+
+def _close(smtp: smtplib.SMTP) -> None:
+    try:
+        smtp.quit()
+    except Exception:
+        smtp.close()
+
+def send_message(msg: MIMEMultipart, recipients: List[str], debug: bool = False) -> None:
+    """Log in and send one message on its own connection (SSL on 465, STARTTLS otherwise)."""
+    require_smtp_credentials()
+    smtp = open_connection(debug=debug)
+    try:
+        smtp.sendmail(SENDER, recipients, msg.as_string())
+    finally:
+        _close(smtp)
+
+
+class _Connection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+
+
+class SmtpPool:
+    """At most `size` open connections, reused across sends; see module docstring."""
+
+    def __init__(
+        self,
+        size: int = POOL_SIZE,
+        max_per_connection: int = MAX_PER_CONNECTION,
+        connect: Optional[Callable[[], smtplib.SMTP]] = None,
+        retries: int = 2,
+    ):
+        self.size = max(1, size)
+        self.max_per_connection = max(1, max_per_connection)
+        self.retries = retries
+        self.connections_opened = 0
+        self.reconnects = 0
+        self._connect = connect or open_connection
+        self._idle: "queue.LifoQueue[_Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+
+    def _open(self) -> _Connection:
+        with tracing.span("smtp.connect"):
+            conn = _Connection(self._connect())
+        with self._lock:
+            self.connections_opened += 1
+        return conn
+
+    def _checkout(self) -> _Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._open()
+
+    def _checkin(self, conn: _Connection) -> None:
+        if conn.sent >= self.max_per_connection:
+            _close(conn.smtp)
+        else:
+            self._idle.put(conn)
+
+    def send_batch(self, sender: str, messages: List[Tuple[str, str]]) -> List[Tuple[str, Optional[str]]]:
+        """
+        Send (recipient, message) pairs over one checked-out connection.
+        Returns (recipient, error or None) per message; a lost connection is reopened and the message retried.
+        """
+        results: List[Tuple[str, Optional[str]]] = []
+        with self._slots:
+            conn: Optional[_Connection] = None
+            try:
+                for recipient, message in messages:
+                    error = None
+                    for attempt in range(self.retries + 1):
+                        try:
+                            if conn is not None and conn.sent >= self.max_per_connection:
+                                _close(conn.smtp)
+                                conn = None
+                            if conn is None:
+                                conn = self._checkout()
+                            conn.smtp.sendmail(sender, [recipient], message)
+                            conn.sent += 1
+                            error = None
+                            break
+                        except Exception as e:
+                            error = f"{type(e).__name__}: {e}"
+                            if conn is not None and not _connection_lost(e):
+                                break  # refused recipient / bad data: the connection is still fine
+                            if conn is not None:
+                                conn.smtp.close()
+                                conn = None
+                            if attempt < self.retries:
+                                with self._lock:
+                                    self.reconnects += 1
+                                tracing.incr("smtp.reconnects")
+                    tracing.incr("smtp.messages" if error is None else "smtp.failed")
+                    results.append((recipient, error))
+            finally:
+                if conn is not None:
+                    self._checkin(conn)
+        return results
+
+    def close(self) -> None:
+        while True:
+            try:
+                _close(self._idle.get_nowait().smtp)
+            except queue.Empty:
+                return
+
+
+_pool: Optional[SmtpPool] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> SmtpPool:
+    """The process-wide pool (closed at exit)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if SMTP_SECURITY != "none":
+                require_smtp_credentials()
+            _pool = SmtpPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+# ===============================
+# Delivery
+# ===============================
+@dataclass
+class DeliveryReport:
+    sent: List[str] = field(default_factory=list)
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def msgs_per_second(self) -> float:
+        return len(self.sent) / self.seconds if self.seconds > 0 else 0.0
+
+def deliver(
+    email: RenderedEmail,
+    recipients: List[str],
+    pool: Optional[SmtpPool] = None,
+    batch_size: int = BATCH_SIZE,
+) -> DeliveryReport:
+    """One copy of `email` per recipient, sent in batches across the pool's connections."""
+    pool = pool or get_pool()
+    batch_size = max(1, batch_size)  # SMTP_BATCH_SIZE=0 (or negative) means one message per batch
+    batches = [
+        [(r, email.for_recipient(r)) for r in recipients[i:i + batch_size]]
+        for i in range(0, len(recipients), batch_size)
+    ]
+    report = DeliveryReport()
+    t0 = time.perf_counter()
+    with tracing.span("smtp.deliver", recipients=len(recipients)), \
+            ThreadPoolExecutor(max_workers=min(pool.size, len(batches)) or 1) as workers:
+        for results in workers.map(lambda batch: pool.send_batch(email.sender, batch), batches):
+            for recipient, error in results:
+                if error is None:
+                    report.sent.append(recipient)
+                else:
+                    report.failed.append((recipient, error))
+    report.seconds = time.perf_counter() - t0
+    return report
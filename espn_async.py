@@ -0,0 +1,208 @@
+# espn_async.py
+"""
+Async, pooled ESPN fetching that fills the on-disk cache (espn_cache).
+
+espn_api only knows how to make one blocking request at a time. Here we let
+espn_api *plan* its requests instead: a League call (box_scores(week),
+scoreboard(week), ...) runs against a request object that serves whatever is
+already cached and records what's missing. The missing requests are fetched
+concurrently on one keep-alive aiohttp session, written to the cache, and the
+calls are replayed until they complete. So callers get the exact objects
+espn_api returns today (BoxScore, Matchup, Team), and cache keys always match
+what the synchronous path would use.
+
+    boxes = prefetch_box_scores(league, weeks=range(1, 15))    # {week: [BoxScore, ...]}
+
+Environment:
+- ESPN_ASYNC_CONCURRENCY  max requests in flight (default: 8)
+- ESPN_BASE_URL           see espn_cache (point at a stub server to replay recorded JSON)
+"""
+from __future__ import annotations
+
+import os
+import copy
+import asyncio
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+from espn_api.football import League
+from espn_api.requests.espn_requests import ESPNAccessDenied, ESPNInvalidLeague, ESPNUnknownError
+
+import tracing
+from espn_cache import CachedEspnRequests, load_league
+
+DEFAULT_CONCURRENCY = int(os.getenv("ESPN_ASYNC_CONCURRENCY", "8"))
+
+# (scope, params, headers, extend) — scope is "_espn" for season-wide data, else the league's cache scope
+Request = Tuple[str, Optional[dict], Optional[dict], str]
+
+
+class _NeedFetch(Exception):
+    """Raised inside a planned call when a response isn't cached yet."""
+
+
+class _PlanningRequests(CachedEspnRequests):
+    """Serves cached responses; on a miss records the request and aborts the call."""
+
+    def __init__(self, inner: CachedEspnRequests, missing: List[Request]):
+        self.__dict__.update(inner.__dict__)  # shares the inner object's memo
+        self._missing = missing
+
+    def _cached(self, scope: str, params, headers, extend: str, fetch) -> Any:
+        def plan():
+            self._missing.append((scope, params, headers, extend))
+            raise _NeedFetch()
+        return super()._cached(scope, params, headers, extend, plan)
+
+
+# ===============================
+# HTTP
+# ===============================
+def _query(params: Optional[dict]) -> List[Tuple[str, str]]:
+    """requests-style encoding: list values become repeated keys."""
+    pairs: List[Tuple[str, str]] = []
+    for key, value in (params or {}).items():
+        for v in value if isinstance(value, (list, tuple)) else [value]:
+            pairs.append((key, str(v)))
+    return pairs
+
+
+class AsyncEspnClient:
+    """One keep-alive connection pool, at most `concurrency` requests in flight."""
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY):
+        self.concurrency = max(1, concurrency)
+        self.requests_made = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncEspnClient":
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+        self._session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60))
+        self._slots = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self._session.close()
+
+    async def fetch_into(self, target: CachedEspnRequests, request: Request) -> None:
+        """GET one planned request the way espn_api would, and record it in `target`'s cache."""
+        scope, params, headers, extend = request
+        league_scoped = scope != "_espn"
+        url = (target.LEAGUE_ENDPOINT if league_scoped else target.ENDPOINT) + extend
+        async with self._slots:
+            tracing.incr("espn.requests")
+            with tracing.span("espn.request", endpoint=extend or "league", pooled=True):
+                async with self._session.get(url, params=_query(params), headers=headers or {},
+                                             cookies=target.cookies or {}) as resp:
+                    self.requests_made += 1
+                    status = resp.status
+                    data = await resp.json(content_type=None) if status == 200 else None
+
+        if status == 401 and league_scoped:
+            # espn_api retries private/historical leagues on an alternate endpoint; let it.
+            data = await asyncio.to_thread(
+                super(CachedEspnRequests, target).league_get, params=params, headers=headers, extend=extend)
+        elif status == 401:
+            raise ESPNAccessDenied("espn_s2 and swid are required")
+        elif status == 404:
+            raise ESPNInvalidLeague(f"League {target.league_id} does not exist")
+        elif status != 200:
+            raise ESPNUnknownError(f"ESPN returned an HTTP {status}")
+
+        if league_scoped and isinstance(data, list):
+            data = data[0]
+        target.store(scope, params, headers, extend, data)
+
+
+# ===============================
+# Planning loop
+# ===============================
+async def run_planned(
+    league: League,
+    calls: List[Callable[[League], Any]],
+    client: AsyncEspnClient,
+) -> List[Any]:
+    """
+    Run espn_api calls against `league`, fetching every response they need concurrently.
+    Each round replays the unfinished calls; all of their missing requests are fetched in parallel.
+    """
+    inner = league.espn_request
+    if not isinstance(inner, CachedEspnRequests):
+        return [call(league) for call in calls]  # cache disabled: nothing to warm, stay synchronous
+
+    results: List[Any] = [None] * len(calls)
+    pending = list(range(len(calls)))
+    while pending:
+        missing: List[Request] = []
+        planner = copy.copy(league)
+        planner.espn_request = _PlanningRequests(inner, missing)
+        still_pending = []
+        for i in pending:
+            try:
+                results[i] = calls[i](planner)
+            except _NeedFetch:
+                still_pending.append(i)
+        pending = still_pending
+        if not pending:
+            break
+
+        unique: Dict[str, Request] = {}
+        for req in missing:
+            unique.setdefault(inner.request_path(*req), req)
+        await asyncio.gather(*(client.fetch_into(inner, req) for req in unique.values()))
+    return results
+
+
+async def fetch_box_scores_async(league: League, weeks: Iterable[int], client: AsyncEspnClient) -> Dict[int, list]:
+    weeks = list(weeks)
+    boxes = await run_planned(league, [lambda lg, w=w: lg.box_scores(w) for w in weeks], client)
+    return dict(zip(weeks, boxes))
+
+async def fetch_scoreboards_async(league: League, weeks: Iterable[int], client: AsyncEspnClient) -> Dict[int, list]:
+    weeks = list(weeks)
+    boards = await run_planned(league, [lambda lg, w=w: lg.scoreboard(week=w) for w in weeks], client)
+    return dict(zip(weeks, boards))
+
+async def load_leagues_async(
+    specs: Iterable[Tuple[int, int]],
+    client: AsyncEspnClient,
+    espn_s2: str | None = None,
+    swid: str | None = None,
+) -> List[League]:
+    """
+    Bootstrap several (league_id, year) leagues (settings, teams, members) at once.
+    Each bootstrap is a short chain of requests; the chains of different leagues overlap.
+    """
+    async def one(league_id: int, year: int) -> League:
+        league = load_league(league_id, year, espn_s2=espn_s2, swid=swid, fetch=False)
+        if not isinstance(league.espn_request, CachedEspnRequests):
+            await asyncio.to_thread(league.fetch_league)
+            return league
+        await run_planned(league, [lambda lg: lg.fetch_league()], client)
+        league.fetch_league()  # every response is cached now: this only parses
+        return league
+    return list(await asyncio.gather(*(one(lid, year) for lid, year in specs)))
+
+
+# ===============================
+# Sync entry points
+# ===============================
+def _run(coro_factory: Callable[[AsyncEspnClient], Any], concurrency: Optional[int]) -> Any:
+    async def main():
+        async with AsyncEspnClient(concurrency or DEFAULT_CONCURRENCY) as client:
+            return await coro_factory(client)
+    return asyncio.run(main())
+
+def prefetch_box_scores(league: League, weeks: Iterable[int], concurrency: Optional[int] = None) -> Dict[int, list]:
+    """{week: league.box_scores(week)} with all ESPN requests made concurrently."""
+    return _run(lambda client: fetch_box_scores_async(league, weeks, client), concurrency)
+
+def prefetch_scoreboards(league: League, weeks: Iterable[int], concurrency: Optional[int] = None) -> Dict[int, list]:
+    """{week: league.scoreboard(week)} with all ESPN requests made concurrently."""
+    return _run(lambda client: fetch_scoreboards_async(league, weeks, client), concurrency)
+
+def load_leagues(specs: Iterable[Tuple[int, int]], espn_s2: str | None = None, swid: str | None = None,
+                 concurrency: Optional[int] = None) -> List[League]:
+    """`load_league` for several (league_id, year) pairs, bootstrapped concurrently."""
+    return _run(lambda client: load_leagues_async(specs, client, espn_s2=espn_s2, swid=swid), concurrency)
@@ -0,0 +1,372 @@
+# espn_cache.py
+"""
+Persistent on-disk cache for ESPN fantasy API responses.
+
+Every `League(...)` bootstrap, scoreboard and box-score pull goes through
+`EspnFantasyRequests.league_get` / `.get`. We swap that object for a caching
+subclass, so espn_api keeps doing all the parsing and we only skip the network.
+
+Cache key: (league scope, year, week, endpoint) -> one JSON file on disk. The
+scope is the league id, plus a digest of the espn_s2/SWID cookies when they
+were sent (see `league_scope`), so a private league's responses are only ever
+served back to a caller with the same credentials.
+
+Freshness rules:
+- Past seasons never expire (nothing changes after the season is over).
+- Completed weeks of the current season (week < league's current week) never expire.
+- Everything else (current week, whole-season views) gets a short TTL.
+
+Environment:
+- ESPN_CACHE_DIR       where files live (default: ./.espn_cache)
+- ESPN_CACHE_LIVE_TTL  TTL in seconds for live data (default: 300)
+- ESPN_CACHE_OFFLINE=1 never hit the network; serve recorded files regardless
+                       of age and raise EspnCacheMiss when one is missing
+- ESPN_CACHE_DISABLED=1 bypass the cache entirely
+- ESPN_BASE_URL        send requests to this host instead of ESPN's (e.g. a local
+                       stub replaying recorded responses)
+
+Bootstrapped `League` objects are also pooled per process (see `get_league`):
+- ESPN_LEAGUE_POOL_SIZE  max pooled leagues, least recently used evicted (default: 16)
+- ESPN_LEAGUE_IDLE_TTL   seconds an unused league stays pooled (default: 900)
+"""
+from __future__ import annotations
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from espn_api.football import League
+from espn_api.requests.constant import FANTASY_BASE_ENDPOINT
+from espn_api.requests.espn_requests import EspnFantasyRequests
+
+import tracing
+
+
+# ===============================
+# Configuration
+# ===============================
+def _cache_dir() -> str:
+    return os.getenv("ESPN_CACHE_DIR", ".espn_cache")
+
+def _live_ttl() -> int:
+    return int(os.getenv("ESPN_CACHE_LIVE_TTL", "300"))
+
+def _offline() -> bool:
+    return os.getenv("ESPN_CACHE_OFFLINE", "") == "1"
+
+def _disabled() -> bool:
+    return os.getenv("ESPN_CACHE_DISABLED", "") == "1"
+
+def _base_url() -> Optional[str]:
+    return os.getenv("ESPN_BASE_URL") or None
+
+def _pool_size() -> int:
+    return int(os.getenv("ESPN_LEAGUE_POOL_SIZE", "16"))
+
+def _idle_ttl() -> float:
+    return float(os.getenv("ESPN_LEAGUE_IDLE_TTL", "900"))
+
+
+class EspnCacheMiss(RuntimeError):
+    """Raised in offline mode when a response was never recorded."""
+
+
+# ===============================
+# Keys + freshness
+# ===============================
+def season_is_final(year: int, today: Optional[date] = None) -> bool:
+    """An NFL season (incl. fantasy playoffs) is over well before March of the next year."""
+    today = today or date.today()
+    return today >= date(int(year) + 1, 3, 1)
+
+def endpoint_name(params: Optional[dict], headers: Optional[dict], extend: str = "") -> str:
+    """
+    Stable, filesystem-safe endpoint id, e.g. 'league.mMatchupScore+mScoreboard.3f2a9c1d'.
+    The week (scoringPeriodId) is part of the key path, not the endpoint name.
+    """
+    params = dict(params or {})
+    params.pop("scoringPeriodId", None)
+    view = params.pop("view", "")
+    if isinstance(view, (list, tuple)):
+        view = "+".join(view)
+
+    base = (extend or "").strip("/").replace("/", "_") or "league"
+    name = f"{base}.{view}" if view else base
+
+    # Anything else that shapes the response (filters, offsets) goes into a short digest.
+    extra = {"params": params, "headers": headers or {}}
+    if params or headers:
+        digest = hashlib.sha1(json.dumps(extra, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+        name = f"{name}.{digest}"
+    return name
+
+def credentials_digest(espn_s2: str | None, swid: str | None) -> str:
+    return hashlib.sha256(f"{espn_s2 or ''}|{swid or ''}".encode("utf-8")).hexdigest()
+
+def league_scope(league_id: int, espn_s2: str | None = None, swid: str | None = None) -> str:
+    """Cache directory for a league: '<league_id>' without cookies, '<league_id>-<digest>' with them."""
+    if not (espn_s2 or swid):
+        return str(league_id)
+    return f"{league_id}-{credentials_digest(espn_s2, swid)[:12]}"
+
+def cache_path(scope: str, year: int, week: Optional[int], endpoint: str) -> str:
+    week_dir = f"w{int(week):02d}" if week is not None else "season"
+    return os.path.join(_cache_dir(), str(scope), str(year), week_dir, f"{endpoint}.json")
+
+def _read(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write(path: str, response: Any) -> Dict[str, Any]:
+    entry = {"fetched_at": time.time(), "response": response}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    os.replace(tmp, path)  # atomic: concurrent readers never see a half-written file
+    return entry
+
+
+# ===============================
+# Caching request object
+# ===============================
+class CachedEspnRequests(EspnFantasyRequests):
+    """
+    Drop-in replacement for espn_api's request object.
+    All higher-level helpers (get_league, get_pro_schedule, ...) route through
+    `league_get` / `get`, so overriding those two is enough.
+    """
+
+    def __init__(self, inner: EspnFantasyRequests):
+        # Adopt the configured endpoints/cookies/logger of the original object.
+        self.__dict__.update(inner.__dict__)
+        base = _base_url()
+        if base:
+            espn_host = FANTASY_BASE_ENDPOINT.split("/apis/")[0]
+            self.ENDPOINT = self.ENDPOINT.replace(espn_host, base.rstrip("/"), 1)
+            self.LEAGUE_ENDPOINT = self.LEAGUE_ENDPOINT.replace(espn_host, base.rstrip("/"), 1)
+        cookies = self.cookies or {}
+        self.scope = league_scope(self.league_id, cookies.get("espn_s2"), cookies.get("SWID"))
+        self.current_week: Optional[int] = None
+        self._memo: Dict[str, Dict[str, Any]] = {}  # path -> entry, saves re-parsing the same file
+
+    def _is_final(self, week: Optional[int]) -> bool:
+        if season_is_final(self.year):
+            return True
+        if week is None or self.current_week is None:
+            return False
+        return int(week) < int(self.current_week)
+
+    def request_path(self, scope: str, params, headers, extend: str) -> str:
+        week = (params or {}).get("scoringPeriodId")
+        return cache_path(scope, self.year, week, endpoint_name(params, headers, extend))
+
+    def store(self, scope: str, params, headers, extend: str, response: Any) -> None:
+        """Record a response fetched elsewhere (e.g. by espn_async) as if this object had fetched it."""
+        path = self.request_path(scope, params, headers, extend)
+        self._memo[path] = _write(path, response)
+        self._note_current_week(response)
+
+    def _cached(self, scope: str, params, headers, extend: str, fetch) -> Any:
+        week = (params or {}).get("scoringPeriodId")
+        path = self.request_path(scope, params, headers, extend)
+
+        entry = self._memo.get(path) or _read(path)
+        if entry is not None:
+            age = time.time() - float(entry.get("fetched_at", 0))
+            if _offline() or self._is_final(week) or age < _live_ttl():
+                self._memo[path] = entry
+                tracing.incr("espn.cache_hits")
+                return entry["response"]
+        if _offline():
+            raise EspnCacheMiss(f"No recorded ESPN response at {path}")
+
+        tracing.incr("espn.requests")
+        with tracing.span("espn.request", endpoint=os.path.basename(path)):
+            response = fetch()
+        self._memo[path] = _write(path, response)
+        return response
+
+    def _note_current_week(self, response: Any) -> None:
+        if isinstance(response, dict) and "status" in response and "scoringPeriodId" in response:
+            self.current_week = response["scoringPeriodId"]
+
+    def league_get(self, params: dict = None, headers: dict = None, extend: str = ''):
+        response = self._cached(
+            self.scope, params, headers, extend,
+            lambda: super(CachedEspnRequests, self).league_get(params=params, headers=headers, extend=extend),
+        )
+        self._note_current_week(response)
+        return response
+
+    def get(self, params: dict = None, headers: dict = None, extend: str = ''):
+        # Pro schedule / pro players are per-season, not per-league: share them.
+        return self._cached(
+            "_espn", params, headers, extend,
+            lambda: super(CachedEspnRequests, self).get(params=params, headers=headers, extend=extend),
+        )
+
+
+# ===============================
+# Public API
+# ===============================
+def _invalidate_scope(root: str, current_week: Optional[int]) -> int:
+    if not os.path.isdir(root):
+        return 0
+    removed = 0
+    for name in os.listdir(root):
+        live = name == "season" or (
+            name.startswith("w") and name[1:].isdigit()
+            and (current_week is None or int(name[1:]) >= int(current_week))
+        )
+        if live:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+            removed += 1
+    return removed
+
+def invalidate_live(league_id: int, year: int, current_week: Optional[int] = None) -> int:
+    """
+    Drop the recorded responses that can still change: whole-season views and weeks
+    from `current_week` on (all weeks if unknown). Finished seasons are left alone.
+    Applies to every credential scope of the league. Returns the number of directories removed.
+    """
+    if season_is_final(year) or not os.path.isdir(_cache_dir()):
+        return 0
+    removed = 0
+    for scope in os.listdir(_cache_dir()):
+        if scope == str(league_id) or scope.startswith(f"{league_id}-"):
+            removed += _invalidate_scope(os.path.join(_cache_dir(), scope, str(year)), current_week)
+    return removed
+
+def load_league(league_id: int, year: int, espn_s2: str | None = None, swid: str | None = None,
+                fetch: bool = True) -> League:
+    """
+    `League(...)` with its ESPN traffic routed through the on-disk cache.
+    `fetch=False` skips the bootstrap (the caller runs `league.fetch_league()`).
+    """
+    league = League(league_id=league_id, year=year, espn_s2=espn_s2, swid=swid, fetch_league=False)
+    if not _disabled():
+        league.espn_request = CachedEspnRequests(league.espn_request)
+    if fetch:
+        with tracing.span("espn.league_bootstrap", league=league_id, year=year):
+            league.fetch_league()
+    return league
+
+
+# ===============================
+# League registry (process-wide pool of bootstrapped leagues)
+# ===============================
+LeagueKey = Tuple[int, int, str]
+
+def _league_key(league_id: int, year: int, espn_s2: str | None, swid: str | None) -> LeagueKey:
+    # Credentials are part of the key (hashed), so a private league is only shared with the same cookies.
+    creds = credentials_digest(espn_s2, swid)[:16]
+    return int(league_id), int(year), creds
+
+
+class _PooledLeague:
+    __slots__ = ("league", "created", "last_used", "final")
+
+    def __init__(self, league: League, year: int, now: float):
+        self.league = league
+        self.created = now
+        self.last_used = now
+        self.final = season_is_final(year)
+
+
+class LeagueRegistry:
+    """
+    Thread-safe LRU of bootstrapped `League` objects keyed by (league_id, year, credentials).
+
+    Entries go away after `idle_ttl` seconds unused. An in-season league also expires
+    `_live_ttl()` seconds after it was built, so standings and current_week don't go stale.
+    Concurrent callers asking for the same key wait for a single bootstrap.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, idle_ttl: Optional[float] = None,
+                 loader: Callable[..., League] = load_league):
+        self.max_size = max_size if max_size is not None else _pool_size()
+        self.idle_ttl = idle_ttl if idle_ttl is not None else _idle_ttl()
+        self.loader = loader
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[LeagueKey, _PooledLeague]" = OrderedDict()
+        self._building: Dict[LeagueKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _expired(self, entry: _PooledLeague, now: float) -> bool:
+        if now - entry.last_used > self.idle_ttl:
+            return True
+        return not entry.final and now - entry.created > _live_ttl()
+
+    def _lookup(self, key: LeagueKey, now: float) -> Optional[League]:
+        # caller holds self._lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry, now):
+            del self._entries[key]
+            return None
+        entry.last_used = now
+        self._entries.move_to_end(key)
+        return entry.league
+
+    def get(self, league_id: int, year: int, espn_s2: str | None = None, swid: str | None = None) -> League:
+        key = _league_key(league_id, year, espn_s2, swid)
+        with self._lock:
+            league = self._lookup(key, time.monotonic())
+            if league is not None:
+                self.hits += 1
+                return league
+            build_lock = self._building.setdefault(key, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                league = self._lookup(key, time.monotonic())  # built while we waited
+                if league is not None:
+                    self.hits += 1
+                    return league
+            league = self.loader(league_id, year, espn_s2=espn_s2, swid=swid)
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = _PooledLeague(league, year, time.monotonic())
+                self._entries.move_to_end(key)
+                while len(self._entries) > max(self.max_size, 0):
+                    self._entries.popitem(last=False)
+                self._building.pop(key, None)
+        return league
+
+    def forget(self, league_id: int, year: int) -> int:
+        """Drop every pooled instance of (league_id, year), whatever the credentials."""
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == int(league_id) and k[1] == int(year)]
+            for k in stale:
+                del self._entries[k]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_registry = LeagueRegistry()
+
+def get_league(league_id: int, year: int, espn_s2: str | None = None, swid: str | None = None) -> League:
+    """Pooled `load_league`: returns the shared, already-bootstrapped League when there is one."""
+    return _registry.get(league_id, year, espn_s2=espn_s2, swid=swid)
+
+def forget_league(league_id: int, year: int) -> int:
+    return _registry.forget(league_id, year)
@@ -1,18 +1,101 @@
-from typing import List, Dict, Any
-from espn_api.football import League
+import os
+import sqlite3
+from typing import Callable, List, Dict, Any, Optional
 
-def get_week_matchups(league_id: int, year: int, week: int) -> List[Dict[str, Any]]:
+import history_db
+import tracing
+from espn_cache import get_league
+
+# A source returns the week's matchups, or None when it can't serve them (next source is tried).
+# Sources are called as source(league_id, year, week, league=<already-loaded League or None>).
+# Every source returns the same list for the same week: one entry per head-to-head game, in ESPN's
+# schedule order, and no entry for a bye (a team without an opponent that week).
+MatchupSource = Callable[..., Optional[List[Dict[str, Any]]]]
+
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", history_db.DB_PATH)
+SCHEMA_VERSION_WITH_POSITIONS = 4  # player_scores.slot (3) and matchups.position (4) exist from here on
+
+
+def _matchup_dict(week: int, home_name: str, home_score: float, away_name: str, away_score: float,
+                  home_starters: List[Dict[str, Any]], away_starters: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # Starters in one order whichever source served them (ties in the seeded top-3 pick depend on it).
+    def ordered(starters: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return sorted(starters, key=lambda p: (-(p.get("points") or 0), p.get("name") or ""))
+
+    home_score = round(home_score or 0, 2)
+    away_score = round(away_score or 0, 2)
+    m = {
+        "week": week,
+        "matchup": {
+            "home_team": home_name,
+            "home_score": home_score,
+            "away_team": away_name,
+            "away_score": away_score,
+            "margin": round(home_score - away_score, 2),
+        },
+        "home_starters": ordered(home_starters),
+        "away_starters": ordered(away_starters),
+    }
+    if home_score != away_score:
+        m["matchup"]["winner"] = home_name if home_score > away_score else away_name
+    return m
+
+
+# ===============================
+# Sources
+# ===============================
+def history_db_source(league_id: int, year: int, week: int, league: Any = None) -> Optional[List[Dict[str, Any]]]:
     """
-    Returns a list of matchup dicts for the given week:
-    - matchup: home/away team names, scores, winner, margin
-    - home_starters / away_starters: [{name, slot, points}, ...]
-    NOTE: This version does NOT require ESPN_S2 or SWID. It will only work for
-    leagues that are public or otherwise readable without auth.
+    Serve a completed week from fantasy_league.db (filled by import_espn_history.py).
+    Only weeks that sync_state marks as complete, with lineup slots and ESPN schedule positions
+    recorded, are served, in ESPN's order (a full re-import fills positions for older rows).
     """
-    league = League(league_id=league_id, year=year)
+    if not os.path.exists(HISTORY_DB_PATH):
+        return None
+    conn = sqlite3.connect(f"file:{HISTORY_DB_PATH}?mode=ro", uri=True)
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION_WITH_POSITIONS:
+            return None
+        synced = history_db.last_synced_week(conn, league_id, year)
+        if synced is None or week > synced:
+            return None
+
+        games = conn.execute("""
+            SELECT m.team_a_id, COALESCE(ta.name, 'TBD'), m.score_a,
+                   m.team_b_id, COALESCE(tb.name, 'TBD'), m.score_b, m.position
+            FROM matchups m
+            LEFT JOIN teams ta ON ta.league_id = m.league_id AND ta.year = m.year AND ta.team_id = m.team_a_id
+            LEFT JOIN teams tb ON tb.league_id = m.league_id AND tb.year = m.year AND tb.team_id = m.team_b_id
+            WHERE m.league_id = ? AND m.year = ? AND m.week = ?
+            ORDER BY m.position, m.team_a_id""", (league_id, year, week)).fetchall()
+        if not games or any(position is None for *_, position in games):
+            return None
+
+        starters: Dict[int, List[Dict[str, Any]]] = {}
+        for team_id, name, slot, points in conn.execute("""
+            SELECT fantasy_team_id, player_name, slot, points
+            FROM player_scores
+            WHERE league_id = ? AND year = ? AND week = ? AND slot IS NOT NULL AND slot NOT IN ('BE', 'IR')
+            ORDER BY fantasy_team_id, points DESC, player_name""", (league_id, year, week)):
+            starters.setdefault(team_id, []).append({"name": name, "slot": slot, "points": round(points or 0, 2)})
+
+        # A week imported without lineups (pre-2019 seasons, older imports) is incomplete: let ESPN serve it.
+        if any(team_a not in starters or team_b not in starters for team_a, _, _, team_b, _, _, _ in games):
+            return None
+
+        return [
+            _matchup_dict(week, home_name, home_score, away_name, away_score, starters[home_id], starters[away_id])
+            for home_id, home_name, home_score, away_id, away_name, away_score, _ in games
+        ]
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
 
-    boxes = league.box_scores(week)
-    matchups: List[Dict[str, Any]] = []
+
+def espn_source(league_id: int, year: int, week: int, league: Any = None) -> List[Dict[str, Any]]:
+    """Live ESPN box scores (through the on-disk response cache and the shared League pool)."""
+    league = league or get_league(league_id, year)
 
     def starters(lineup):
         return [
@@ -21,30 +104,54 @@ def get_week_matchups(league_id: int, year: int, week: int) -> List[Dict[str, An
             if p.slot_position not in ("BE", "IR")
         ]
 
-    for b in boxes:
-        home = b.home_team
-        away = b.away_team
-        home_name = getattr(home, "team_name", "TBD")
-        away_name = getattr(away, "team_name", "TBD")
-        home_score = round(b.home_score or 0, 2)
-        away_score = round(b.away_score or 0, 2)
-
-        m = {
-            "week": week,
-            "matchup": {
-                "home_team": home_name,
-                "home_score": home_score,
-                "away_team": away_name,
-                "away_score": away_score,
-                "margin": round(home_score - away_score, 2),
-            },
-            "home_starters": starters(b.home_lineup),
-            "away_starters": starters(b.away_lineup),
-        }
-
-        if home_score != away_score:
-            m["matchup"]["winner"] = home_name if home_score > away_score else away_name
-
-        matchups.append(m)
-
-    return matchups
+    with tracing.span("espn.box_scores", week=week):
+        boxes = league.box_scores(week)
+    # espn_api gives a bye's away side as 0 rather than a Team; byes are skipped (see MatchupSource).
+    return [
+        _matchup_dict(
+            week,
+            getattr(b.home_team, "team_name", "TBD"), b.home_score,
+            getattr(b.away_team, "team_name", "TBD"), b.away_score,
+            starters(b.home_lineup), starters(b.away_lineup),
+        )
+        for b in boxes
+        if hasattr(b.home_team, "team_id") and hasattr(b.away_team, "team_id")
+    ]
+
+
+SOURCES: Dict[str, MatchupSource] = {
+    "db": history_db_source,
+    "espn": espn_source,
+}
+
+
+def _source_order() -> List[str]:
+    # MATCHUP_SOURCES=espn skips the local store; default tries the DB first.
+    names = [s.strip() for s in os.getenv("MATCHUP_SOURCES", "db,espn").split(",") if s.strip()]
+    unknown = [n for n in names if n not in SOURCES]
+    if unknown:
+        raise ValueError(f"MATCHUP_SOURCES: unknown source(s) {', '.join(unknown)} "
+                         f"(expected a comma-separated list of: {', '.join(SOURCES)})")
+    return names
+
+
+# ===============================
+# Public API
+# ===============================
+def get_week_matchups(league_id: int, year: int, week: int, league: Any = None) -> List[Dict[str, Any]]:
+    """
+    Returns a list of matchup dicts for the given week:
+    - matchup: home/away team names, scores, winner, margin
+    - home_starters / away_starters: [{name, slot, points}, ...]
+    Byes are left out.
+    Sources are tried in MATCHUP_SOURCES order (default: local history DB, then ESPN).
+    Pass `league` to reuse an already-loaded League instead of building one.
+    NOTE: The ESPN source does NOT require ESPN_S2 or SWID. It will only work for
+    leagues that are public or otherwise readable without auth.
+    """
+    for name in _source_order():
+        with tracing.span(f"matchups.{name}", league=league_id, week=week):
+            matchups = SOURCES[name](league_id, year, week, league=league)
+        if matchups is not None:
+            return matchups
+    return espn_source(league_id, year, week, league=league)
@@ -1,12 +1,40 @@
 # gpt_summarizer.py
 import os
+import json
+import time
+import queue
 import random
-from typing import List, Dict, Any
-from openai import OpenAI
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, Tuple
+
+import llm_cache
+import tracing
 
 # ====== Model / Client ======
 MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """
+    The OpenAI client, created on first use: importing `openai` is the slowest part of a
+    cold start, and cached recaps never need it. Honors OPENAI_BASE_URL (e.g., a local fake server).
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+# ====== Concurrency / Backoff ======
+MAX_WORKERS = int(os.getenv("RECAP_MAX_WORKERS", "4"))  # 1 = sequential
+MAX_RETRIES = int(os.getenv("RECAP_MAX_RETRIES", "5"))
+BACKOFF_BASE_SECONDS = float(os.getenv("RECAP_BACKOFF_BASE", "1.0"))
+_backoff_rng = random.Random()  # separate from the per-week joke RNGs (see _week_rng)
+BATCHED = os.getenv("RECAP_BATCHED", "") == "1"  # one structured request per week instead of one per matchup
 
 # ====== Style Configuration ======
 COMEDY_PERSONAS = [
@@ -72,14 +100,21 @@ POP_CULTURE_BANK = [
     "an Apple keynote ‘one more thing’",
 ]
 
-def _maybe_pun_name(name: str) -> str:
+def _week_rng(league_id: int, year: int, week: int) -> random.Random:
+    """
+    The joke RNG for one week: the same seed always gives the same prompts (and LLM cache hits).
+    Local to the call, so leagues generated on concurrent threads don't interleave their draws.
+    """
+    return random.Random(f"{league_id}-{year}-{week}")
+
+def _maybe_pun_name(name: str, rng: random.Random) -> str:
     base = name.strip()
     if not base:
         return name
 
     # If we have a seed pun, pick one ~60% of the time.
-    if base in PUN_SEEDS and random.random() < 0.6:
-        return random.choice(PUN_SEEDS[base])
+    if base in PUN_SEEDS and rng.random() < 0.6:
+        return rng.choice(PUN_SEEDS[base])
 
     parts = base.split()
     first = parts[0]
@@ -89,21 +124,21 @@ def _maybe_pun_name(name: str) -> str:
 
     options = [
         # e.g., "Patrick 'The Nuke' Mahomes" (last may be empty for single names)
-        f"{first} 'The {random.choice(nick_bank)}' {last}".strip(),
+        f"{first} 'The {rng.choice(nick_bank)}' {last}".strip(),
         # e.g., "PatrickM-zilla" when last exists
         f"{first}{(last[0] if last else '')}-zilla",
         f"{first}-nator",
     ]
-    return random.choice(options)
+    return rng.choice(options)
 
-def _team_pun(name: str) -> str:
+def _team_pun(name: str, rng: random.Random) -> str:
     name = name or "Team"
-    if random.random() < 0.5:
-        return f"{name} {random.choice(TEAM_PUN_SUFFIXES)}"
+    if rng.random() < 0.5:
+        return f"{name} {rng.choice(TEAM_PUN_SUFFIXES)}"
     return name
 
-def _pick_pop_culture_ref() -> str:
-    return random.choice(POP_CULTURE_BANK)
+def _pick_pop_culture_ref(rng: random.Random) -> str:
+    return rng.choice(POP_CULTURE_BANK)
 
 def _top_three(starters: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     # Sort by points descending and take top 3
@@ -118,40 +153,76 @@ def _format_player_list(players: List[Dict[str, Any]]) -> str:
         out.append(f"- {name} ({slot}) — {pts} pts")
     return "\n".join(out) if out else "- (no notable starters found)"
 
-def _craft_prompt(matchup: Dict[str, Any]) -> str:
-    m = matchup["matchup"]
-    home = m["home_team"]
-    away = m["away_team"]
-    home_score = m["home_score"]
-    away_score = m["away_score"]
-    winner = m.get("winner", "TBD")
-    margin = m.get("margin", 0)
+RECAP_INSTRUCTIONS = """Now write a markdown recap with:
+- A quick cold-open zinger (1 sentence).
+- **Turning Point**: one short paragraph (1–3 sentences).
+- **Studs & Duds**: 3–6 bullets total (mix of praise/roast).
+- **Takeaway**: one single-line verdict.
+- ~150–220 words total.
+"""
+
+# ====== Prompt Format ======
+# "compact" (default): everything static (STYLE_PRIMER, the recap rules, how to read the FACTS)
+# is one identical system prompt, so it forms a cacheable prefix; the user message is just a
+# dense FACTS table. "verbose" is the original free-form FACTS prompt (kept for comparison).
+PROMPT_FORMAT = os.getenv("RECAP_PROMPT_FORMAT", "compact")
+PROMPT_BUDGET = int(os.getenv("RECAP_PROMPT_BUDGET", "0"))  # max tokens per compact FACTS table (0 = no limit)
+PROMPT_CACHE_MIN_TOKENS = 1024  # OpenAI only caches prompt prefixes at least this long
+
+# STYLE_PRIMER + RECAP_INSTRUCTIONS + the old per-matchup lever text, without the overlap between them
+SYSTEM_PROMPT = f"""You are a seasoned fantasy-football humor columnist: sharp analysis, stand-up delivery.
+Personas: {'; '.join(COMEDY_PERSONAS)}.
+
+Write each recap in markdown, ~150–220 words:
+- Cold open: a one-sentence zinger or quick roast.
+- **Turning Point**: 1–3 sentences on the moment that swung it.
+- **Studs & Duds**: 3–6 bullets mixing praise and roast; cite player lines.
+- **Takeaway**: a single-line verdict with a wink.
+Use 1–2 vivid analogies, the pop-culture nod if apt, and 1–3 tasteful puns on player/team names.
+
+FACTS: line 1 = home score – away score, winner, margin; line 2 = persona and nod;
+then starters as side|player|slot|pts|alt (H home, A away, alt = optional pun name).
+"""
 
-    home_pun = _team_pun(home)
-    away_pun = _team_pun(away)
 
-    top_home = _top_three(matchup.get("home_starters", []))
-    top_away = _top_three(matchup.get("away_starters", []))
+def _levers(matchup: Dict[str, Any], rng: random.Random) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], str, str]:
+    """
+    The random draws behind a FACTS block, in their original order (team puns, pun
+    names for the top starters, pop-culture ref, persona) so seeded runs pick the same jokes.
+    """
+    m = matchup["matchup"]
+    _team_pun(m["home_team"], rng)
+    _team_pun(m["away_team"], rng)
 
-    # Pun some names inline for flavor (don’t overdo it)
     def enrich(players):
         enriched = []
         for p in players:
             newp = dict(p)
-            if random.random() < 0.5:
-                newp["alt"] = _maybe_pun_name(p.get("name", ""))
+            if rng.random() < 0.5:
+                newp["alt"] = _maybe_pun_name(p.get("name", ""), rng)
             enriched.append(newp)
         return enriched
 
-    top_home = enrich(top_home)
-    top_away = enrich(top_away)
+    top_home = enrich(_top_three(matchup.get("home_starters", [])))
+    top_away = enrich(_top_three(matchup.get("away_starters", [])))
+    culture = _pick_pop_culture_ref(rng)
+    persona = rng.choice(COMEDY_PERSONAS)
+    return top_home, top_away, culture, persona
+
+def _verbose_facts(matchup: Dict[str, Any], rng: random.Random) -> str:
+    """Per-matchup FACTS + starters + creative levers (draws from `rng`)."""
+    m = matchup["matchup"]
+    home = m["home_team"]
+    away = m["away_team"]
+    home_score = m["home_score"]
+    away_score = m["away_score"]
+    winner = m.get("winner", "TBD")
+    margin = m.get("margin", 0)
 
+    top_home, top_away, culture, persona = _levers(matchup, rng)
     home_top_md = _format_player_list(top_home)
     away_top_md = _format_player_list(top_away)
 
-    culture = _pick_pop_culture_ref()
-    persona = random.choice(COMEDY_PERSONAS)
-
     # Provide structured facts + comedic levers to the model
     user_content = f"""
 FACTS:
@@ -172,41 +243,345 @@ Creative levers you can use:
 - Use 1–3 playful puns on team/player names (from the lists above, or invent tasteful ones).
 - Keep it specific: reference at least one decisive play or performance from the lists.
 
-Now write a markdown recap with:
-- A quick cold-open zinger (1 sentence).
-- **Turning Point**: one short paragraph (1–3 sentences).
-- **Studs & Duds**: 3–6 bullets total (mix of praise/roast).
-- **Takeaway**: one single-line verdict.
-- ~150–220 words total.
 """
 
     return user_content
 
-# ====== Public API ======
+def _num(x: Any) -> str:
+    try:
+        return f"{float(x):.2f}".rstrip("0").rstrip(".")
+    except (TypeError, ValueError):
+        return str(x)
+
+def _cell(text: Any) -> str:
+    return str(text or "").replace("|", "/").replace("\n", " ").strip()
 
-def generate_matchup_recap(matchup_dict: Dict[str, Any]) -> str:
+def _compact_facts(matchup: Dict[str, Any], rng: random.Random, budget: int | None = None) -> str:
     """
-    Returns a single spicy, funny, insightful recap in markdown (~150–220 words).
+    The same facts as `_verbose_facts` as a dense table (legend in SYSTEM_PROMPT).
+    Over `budget` tokens, alt names are dropped first, then each side keeps its top 2.
     """
-    messages = [
-        {"role": "system", "content": STYLE_PRIMER},
-        {"role": "user", "content": _craft_prompt(matchup_dict)},
+    m = matchup["matchup"]
+    top_home, top_away, culture, persona = _levers(matchup, rng)
+    head = [
+        "FACTS",
+        f"{_cell(m['home_team'])} {_num(m['home_score'])} – {_cell(m['away_team'])} {_num(m['away_score'])}"
+        f"; winner {_cell(m.get('winner', 'TBD'))}; margin {_num(m.get('margin', 0))}",
+        f"persona {persona.split('-style')[0]}; nod: {culture}",
+        "side|player|slot|pts|alt",
+    ]
+
+    def build(keep: int, alts: bool) -> str:
+        rows = [
+            f"{side}|{_cell(p.get('name', 'Unknown'))}|{_cell(p.get('slot'))}|{_num(p.get('points', 0))}"
+            f"|{_cell(p.get('alt')) if alts else ''}".rstrip("|")
+            for side, players in (("H", top_home), ("A", top_away))
+            for p in players[:keep]
+        ]
+        return "\n".join(head + rows) + "\n"
+
+    text = build(3, alts=True)
+    budget = PROMPT_BUDGET if budget is None else budget
+    if budget:
+        from token_count import count_tokens
+
+        for keep, alts in ((3, False), (2, False)):
+            if count_tokens(text, MODEL) <= budget:
+                break
+            text = build(keep, alts)
+    return text
+
+def _facts_block(matchup: Dict[str, Any], rng: random.Random, fmt: str | None = None) -> str:
+    """Per-matchup FACTS in `fmt` (default: PROMPT_FORMAT), drawing from `rng`."""
+    fmt = fmt or PROMPT_FORMAT
+    return _verbose_facts(matchup, rng) if fmt == "verbose" else _compact_facts(matchup, rng)
+
+def _craft_prompt(matchup: Dict[str, Any], rng: random.Random, fmt: str | None = None) -> str:
+    """The per-matchup (user) part of the prompt; the static rest is SYSTEM_PROMPT / STYLE_PRIMER."""
+    return _messages_from_facts(_facts_block(matchup, rng, fmt), fmt)[-1]["content"]
+
+# ====== Public API ======
+
+def _messages_from_facts(facts: str, fmt: str | None = None) -> List[Dict[str, str]]:
+    if (fmt or PROMPT_FORMAT) == "verbose":
+        return [
+            {"role": "system", "content": STYLE_PRIMER},
+            {"role": "user", "content": facts + RECAP_INSTRUCTIONS},
+        ]
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": facts},
+    ]
+
+def _recap_messages(matchup_dict: Dict[str, Any], rng: random.Random) -> List[Dict[str, str]]:
+    return _messages_from_facts(_facts_block(matchup_dict, rng))
+
+def _batched_messages(facts: List[str], fmt: str | None = None) -> List[Dict[str, str]]:
+    """Every matchup's FACTS block in one request; the style and format rules are sent once."""
+    verbose = (fmt or PROMPT_FORMAT) == "verbose"
+    sep = "" if verbose else "\n"  # verbose blocks already start with a newline
+    blocks = "\n".join(f"=== MATCHUP {i} ==={sep}{block}" for i, block in enumerate(facts, start=1))
+    rules = f"For each one:\n{RECAP_INSTRUCTIONS}" if verbose else "Follow the rules above for each one."
+    user_content = f"""Write one recap per matchup below. {rules}
+Reply with STRICT JSON ONLY: a list with one object per matchup, in order, shaped like
+{{"index": <matchup number>, "recap": "<markdown recap>"}}. No text outside the JSON.
+
+{blocks}"""
+    return [
+        {"role": "system", "content": STYLE_PRIMER if verbose else SYSTEM_PROMPT},
+        {"role": "user", "content": user_content},
     ]
 
-    resp = client.chat.completions.create(
-        model=MODEL,
-        messages=messages,
+def prompt_token_report(
+    matchups: List[Dict[str, Any]], *, league_id: int, year: int, week: int
+) -> Dict[str, Any]:
+    """
+    Locally counted prompt tokens per matchup request, verbose vs compact format
+    (same seed, so the same jokes), plus the static prefix each format repeats.
+    """
+    from token_count import count_message_tokens, count_tokens, exact
+
+    out: Dict[str, Any] = {"exact": exact(MODEL), "model": MODEL, "formats": {}}
+    for fmt in ("verbose", "compact"):
+        rng = _week_rng(league_id, year, week)
+        facts = [_facts_block(m, rng, fmt) for m in matchups]
+        per_matchup = [count_message_tokens(_messages_from_facts(f, fmt), MODEL) for f in facts]
+        static = STYLE_PRIMER if fmt == "verbose" else SYSTEM_PROMPT
+        out["formats"][fmt] = {
+            "per_matchup": per_matchup,
+            "total": sum(per_matchup),
+            "batched": count_message_tokens(_batched_messages(facts, fmt), MODEL) if facts else 0,
+            "static_prefix": count_tokens(static, MODEL),
+        }
+    return out
+
+def _parse_batched_recaps(content: str, count: int) -> List[str | None]:
+    """Recaps by matchup position; None wherever the batched reply is missing or malformed."""
+    recaps: List[str | None] = [None] * count
+    cleaned = (content or "").strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.strip("`")
+        if cleaned.lower().startswith("json"):
+            cleaned = cleaned[4:].lstrip()
+    try:
+        data = json.loads(cleaned)
+    except ValueError:
+        return recaps
+    if not isinstance(data, list):
+        return recaps
+    for pos, item in enumerate(data, start=1):
+        if not isinstance(item, dict):
+            continue
+        index, recap = item.get("index", pos), item.get("recap")
+        if isinstance(index, int) and 1 <= index <= count and isinstance(recap, str) and recap.strip():
+            if recaps[index - 1] is None:
+                recaps[index - 1] = recap.strip()
+    return recaps
+
+def _request_completion(messages: List[Dict[str, str]]) -> str:
+    """
+    One chat completion, retried with exponential backoff + jitter on rate limits.
+    """
+    from openai import RateLimitError
+
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            with tracing.span("llm.completion", model=MODEL, attempt=attempt + 1):
+                resp = get_client().chat.completions.create(
+                    model=MODEL,
+                    messages=messages,
+                )
+            tracing.add_usage(getattr(resp, "usage", None))
+            return resp.choices[0].message.content.strip()
+        except RateLimitError:
+            if attempt == MAX_RETRIES:
+                raise
+            tracing.incr("llm.retries")
+            delay = BACKOFF_BASE_SECONDS * (2 ** attempt)
+            time.sleep(delay + _backoff_rng.uniform(0, delay))
+
+def _stream_completion(messages: List[Dict[str, str]]) -> Iterator[str]:
+    """
+    Streamed chat completion, yielding content deltas as they arrive. Token usage comes in
+    the final chunk (stream_options.include_usage) and is counted like `_request_completion`'s.
+    Rate limits are retried like `_request_completion` (they're raised before the first token).
+    """
+    from openai import RateLimitError
+
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            t0 = time.perf_counter()
+            stream = get_client().chat.completions.create(
+                model=MODEL, messages=messages, stream=True, stream_options={"include_usage": True}
+            )
+            break
+        except RateLimitError:
+            if attempt == MAX_RETRIES:
+                raise
+            tracing.incr("llm.retries")
+            delay = BACKOFF_BASE_SECONDS * (2 ** attempt)
+            time.sleep(delay + _backoff_rng.uniform(0, delay))
+    first = True
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            if first:
+                tracing.record("llm.first_token", time.perf_counter() - t0, model=MODEL)
+                first = False
+            yield chunk.choices[0].delta.content
+        tracing.add_usage(getattr(chunk, "usage", None))  # set on the last chunk only
+    tracing.record("llm.stream", time.perf_counter() - t0, model=MODEL)
+
+def _complete(messages: List[Dict[str, str]], regenerate: bool = False) -> str:
+    """Completion served from the LLM cache when the exact prompt was seen before."""
+    return llm_cache.cached_completion(
+        MODEL, messages, lambda: _request_completion(messages), regenerate=regenerate
     )
-    return resp.choices[0].message.content.strip()
 
-def generate_week_recap(matchups: List[Dict[str, Any]], *, league_id: int, year: int, week: int) -> str:
+def _batched_bodies(facts: List[str], workers: int, regenerate: bool = False) -> List[str]:
+    """
+    One structured completion for the whole week. Items that come back missing or
+    malformed are regenerated with the regular per-matchup call (same prompt, same cache).
+    """
+    messages = _batched_messages(facts)
+    key = llm_cache.cache_key(MODEL, messages)
+    content = None if regenerate else llm_cache.get(key)
+    fresh = content is None
+    if fresh:
+        try:
+            content = _request_completion(messages)
+        except Exception:
+            content = ""  # every item falls back to its own call below
+
+    bodies = _parse_batched_recaps(content, len(facts))
+    if fresh and any(b is not None for b in bodies):
+        llm_cache.put(key, content, model=MODEL)
+
+    missing = [i for i, b in enumerate(bodies) if b is None]
+    if missing:
+        fallback = lambda i: _complete(_messages_from_facts(facts[i]), regenerate)
+        if workers == 1 or len(missing) == 1:
+            redone = [fallback(i) for i in missing]
+        else:
+            with ThreadPoolExecutor(max_workers=min(workers, len(missing))) as pool:
+                redone = list(pool.map(fallback, missing))
+        for i, body in zip(missing, redone):
+            bodies[i] = body
+    return bodies
+
+def generate_matchup_recap(matchup_dict: Dict[str, Any], regenerate: bool = False) -> str:
+    """
+    Returns a single spicy, funny, insightful recap in markdown (~150–220 words).
+    `regenerate=True` bypasses the LLM cache.
+    """
+    return _complete(_recap_messages(matchup_dict, random.Random()), regenerate=regenerate)
+
+def _week_header(league_id: int, year: int, week: int) -> str:
+    return f"# Weekly Recap – League {league_id}, {year} Week {week}\n"
+
+def _matchup_title(i: int, matchup: Dict[str, Any]) -> str:
+    return f"## Matchup {i}: {matchup['matchup']['home_team']} vs {matchup['matchup']['away_team']}"
+
+def generate_week_recap(
+    matchups: List[Dict[str, Any]],
+    *,
+    league_id: int,
+    year: int,
+    week: int,
+    max_workers: int | None = None,
+    regenerate: bool = False,
+    batched: bool | None = None,
+) -> str:
     """
     Builds a single markdown doc for all matchups in a week.
+    Prompts are built in order under the per-week seed, then the completions
+    run on up to `max_workers` threads; output order always matches `matchups`.
+    `batched=True` (default: RECAP_BATCHED=1) asks for the whole week in one
+    JSON request instead, falling back to per-matchup calls for bad items.
+    Reruns are served from the LLM cache unless `regenerate=True`.
     """
-    parts = [f"# Weekly Recap – League {league_id}, {year} Week {week}\n"]
-    random.seed(f"{league_id}-{year}-{week}")  # stable-ish jokes per run
-    for i, m in enumerate(matchups, start=1):
-        title = f"## Matchup {i}: {m['matchup']['home_team']} vs {m['matchup']['away_team']}"
-        body = generate_matchup_recap(m)
-        parts.append(f"{title}\n\n{body}\n")
+    parts = [_week_header(league_id, year, week)]
+    rng = _week_rng(league_id, year, week)  # stable-ish jokes per run
+    facts = [_facts_block(m, rng) for m in matchups]
+    prompts = [_messages_from_facts(f) for f in facts]
+
+    workers = max(1, min(max_workers or MAX_WORKERS, len(prompts) or 1))
+    if (BATCHED if batched is None else batched) and len(prompts) > 1:
+        bodies = _batched_bodies(facts, workers, regenerate)
+    elif workers == 1:
+        bodies = [_complete(msgs, regenerate) for msgs in prompts]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            bodies = list(pool.map(lambda msgs: _complete(msgs, regenerate), prompts))
+
+    for i, (m, body) in enumerate(zip(matchups, bodies), start=1):
+        parts.append(f"{_matchup_title(i, m)}\n\n{body}\n")
     return "\n---\n".join(parts)
+
+def stream_week_recap(
+    matchups: List[Dict[str, Any]],
+    *,
+    league_id: int,
+    year: int,
+    week: int,
+    max_workers: int | None = None,
+    regenerate: bool = False,
+) -> Iterator[str]:
+    """
+    Streaming `generate_week_recap`: yields markdown chunks (header, per-matchup titles)
+    and the recap tokens as they arrive. Joined, the chunks form the same document.
+
+    All matchups stream concurrently (up to `max_workers`) into per-matchup buffers;
+    matchup 1 is yielded live while later ones fill up behind it, so the first words
+    show after one round-trip and the total time matches the non-streaming path.
+    Cache hits are yielded whole; finished streams are stored in the LLM cache.
+    """
+    rng = _week_rng(league_id, year, week)  # same prompts as generate_week_recap
+    prompts = [_recap_messages(m, rng) for m in matchups]
+    buffers: List["queue.Queue"] = [queue.Queue() for _ in prompts]
+    done = object()
+
+    def produce(index: int) -> None:
+        out, messages = buffers[index], prompts[index]
+        try:
+            key = llm_cache.cache_key(MODEL, messages)
+            hit = None if regenerate else llm_cache.get(key)
+            if hit is not None:
+                out.put(hit)
+            else:
+                pieces: List[str] = []
+                pending = ""  # trailing whitespace is held back so the body ends up stripped
+                for delta in _stream_completion(messages):
+                    text = pending + delta
+                    if not pieces:
+                        text = text.lstrip()
+                    body = text.rstrip()
+                    pending = text[len(body):]
+                    if body:
+                        pieces.append(body)
+                        out.put(body)
+                llm_cache.put(key, "".join(pieces).strip(), model=MODEL)
+            out.put(done)
+        except Exception as e:
+            out.put(e)
+
+    yield _week_header(league_id, year, week)
+    if not prompts:
+        return
+
+    workers = max(1, min(max_workers or MAX_WORKERS, len(prompts)))
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for i in range(len(prompts)):
+            pool.submit(produce, i)
+        for i, m in enumerate(matchups, start=1):
+            yield f"\n---\n{_matchup_title(i, m)}\n\n"
+            while True:
+                item = buffers[i - 1].get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+            yield "\n"
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,286 @@
+# history_db.py
+"""
+Schema + migrations for fantasy_league.db.
+
+BASE_SCHEMA is the original layout (created only if missing). MIGRATIONS are
+applied in order on top of it and tracked with PRAGMA user_version, so
+`connect()` brings any existing file up to date.
+"""
+import sqlite3
+from typing import Optional
+
+DB_PATH = "fantasy_league.db"
+
+BASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leagues (
+    id INTEGER PRIMARY KEY,
+    year INTEGER,
+    name TEXT
+);
+CREATE TABLE IF NOT EXISTS teams (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    owner TEXT,
+    league_id INTEGER,
+    FOREIGN KEY (league_id) REFERENCES leagues(id)
+);
+CREATE TABLE IF NOT EXISTS matchups (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    week INTEGER,
+    team_a_id INTEGER,
+    team_b_id INTEGER,
+    score_a REAL,
+    score_b REAL,
+    winner_id INTEGER,
+    league_id INTEGER,
+    FOREIGN KEY (team_a_id) REFERENCES teams(id),
+    FOREIGN KEY (team_b_id) REFERENCES teams(id),
+    FOREIGN KEY (winner_id) REFERENCES teams(id),
+    FOREIGN KEY (league_id) REFERENCES leagues(id)
+);
+CREATE TABLE IF NOT EXISTS weekly_stats (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    team_id INTEGER,
+    week INTEGER,
+    total_points REAL,
+    top_player TEXT,
+    flop_player TEXT,
+    league_id INTEGER,
+    FOREIGN KEY (team_id) REFERENCES teams(id),
+    FOREIGN KEY (league_id) REFERENCES leagues(id)
+);
+CREATE TABLE IF NOT EXISTS player_scores (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    player_name TEXT,
+    player_id TEXT,
+    team_id INTEGER,
+    fantasy_team_id INTEGER,
+    week INTEGER,
+    points REAL,
+    position TEXT,
+    league_id INTEGER,
+    FOREIGN KEY (fantasy_team_id) REFERENCES teams(id),
+    FOREIGN KEY (league_id) REFERENCES leagues(id)
+);
+CREATE TABLE IF NOT EXISTS standings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    team_id INTEGER,
+    week INTEGER,
+    wins INTEGER,
+    losses INTEGER,
+    ties INTEGER,
+    points_for REAL,
+    points_against REAL,
+    rank INTEGER,
+    league_id INTEGER,
+    FOREIGN KEY (team_id) REFERENCES teams(id),
+    FOREIGN KEY (league_id) REFERENCES leagues(id)
+);
+"""
+
+MIGRATIONS = [
+    # 1: season column + natural keys, so re-imports upsert instead of duplicating rows;
+    #    sync_state remembers the last completed week imported per (league, year).
+    #    Legacy rows keep year NULL, which never collides in a UNIQUE index.
+    """
+    ALTER TABLE matchups ADD COLUMN year INTEGER;
+    ALTER TABLE player_scores ADD COLUMN year INTEGER;
+    ALTER TABLE standings ADD COLUMN year INTEGER;
+    CREATE UNIQUE INDEX ux_matchups_natural ON matchups (league_id, year, week, team_a_id, team_b_id);
+    CREATE UNIQUE INDEX ux_player_scores_natural ON player_scores (league_id, year, week, fantasy_team_id, player_id);
+    CREATE UNIQUE INDEX ux_standings_natural ON standings (league_id, year, week, team_id);
+    CREATE TABLE sync_state (
+        league_id INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        last_week INTEGER NOT NULL,
+        updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (league_id, year)
+    );
+    """,
+    # 2: season/league-scoped keys. teams.id used to be the bare ESPN team_id and leagues.id the bare
+    #    league id, so seasons and leagues overwrote each other. Every table is rebuilt WITHOUT ROWID,
+    #    clustered on its natural key, so (league, year, week) reads are a range scan of the table
+    #    itself; secondary indexes cover "fantasy team across seasons" and "player across seasons".
+    #    Legacy rows without a year take their league's first imported season (the row the old
+    #    INSERT OR IGNORE kept); rows that still can't be placed are dropped.
+    """
+    CREATE TABLE leagues_v2 (
+        id INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        name TEXT,
+        PRIMARY KEY (id, year)
+    ) WITHOUT ROWID;
+    INSERT OR IGNORE INTO leagues_v2 (id, year, name)
+        SELECT id, year, name FROM leagues WHERE year IS NOT NULL;
+
+    CREATE TABLE teams_v2 (
+        league_id INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        team_id INTEGER NOT NULL,
+        name TEXT,
+        owner TEXT,
+        PRIMARY KEY (league_id, year, team_id),
+        FOREIGN KEY (league_id, year) REFERENCES leagues (id, year)
+    ) WITHOUT ROWID;
+    INSERT OR IGNORE INTO teams_v2 (league_id, year, team_id, name, owner)
+        SELECT t.league_id, (SELECT MIN(l.year) FROM leagues l WHERE l.id = t.league_id), t.id, t.name, t.owner
+        FROM teams t
+        WHERE (SELECT MIN(l.year) FROM leagues l WHERE l.id = t.league_id) IS NOT NULL;
+
+    CREATE TABLE matchups_v2 (
+        league_id INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        week INTEGER NOT NULL,
+        team_a_id INTEGER NOT NULL,
+        team_b_id INTEGER NOT NULL,
+        score_a REAL,
+        score_b REAL,
+        winner_id INTEGER,
+        PRIMARY KEY (league_id, year, week, team_a_id, team_b_id),
+        FOREIGN KEY (league_id, year, team_a_id) REFERENCES teams (league_id, year, team_id),
+        FOREIGN KEY (league_id, year, team_b_id) REFERENCES teams (league_id, year, team_id)
+    ) WITHOUT ROWID;
+    INSERT OR IGNORE INTO matchups_v2 (league_id, year, week, team_a_id, team_b_id, score_a, score_b, winner_id)
+        SELECT league_id, COALESCE(year, (SELECT MIN(l.year) FROM leagues l WHERE l.id = m.league_id)),
+               week, team_a_id, team_b_id, score_a, score_b, winner_id
+        FROM matchups m
+        WHERE COALESCE(year, (SELECT MIN(l.year) FROM leagues l WHERE l.id = m.league_id)) IS NOT NULL
+          AND league_id IS NOT NULL AND week IS NOT NULL AND team_a_id IS NOT NULL AND team_b_id IS NOT NULL;
+
+    CREATE TABLE player_scores_v2 (
+        league_id INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        week INTEGER NOT NULL,
+        fantasy_team_id INTEGER NOT NULL,
+        player_id TEXT NOT NULL,
+        player_name TEXT,
+        team_id INTEGER,
+        points REAL,
+        position TEXT,
+        PRIMARY KEY (league_id, year, week, fantasy_team_id, player_id),
+        FOREIGN KEY (league_id, year, fantasy_team_id) REFERENCES teams (league_id, year, team_id)
+    ) WITHOUT ROWID;
+    INSERT OR IGNORE INTO player_scores_v2
+        (league_id, year, week, fantasy_team_id, player_id, player_name, team_id, points, position)
+        SELECT league_id, COALESCE(year, (SELECT MIN(l.year) FROM leagues l WHERE l.id = p.league_id)),
+               week, fantasy_team_id, player_id, player_name, team_id, points, position
+        FROM player_scores p
+        WHERE COALESCE(year, (SELECT MIN(l.year) FROM leagues l WHERE l.id = p.league_id)) IS NOT NULL
+          AND league_id IS NOT NULL AND week IS NOT NULL AND fantasy_team_id IS NOT NULL AND player_id IS NOT NULL;
+
+    CREATE TABLE standings_v2 (
+        league_id INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        week INTEGER NOT NULL,
+        team_id INTEGER NOT NULL,
+        wins INTEGER,
+        losses INTEGER,
+        ties INTEGER,
+        points_for REAL,
+        points_against REAL,
+        rank INTEGER,
+        PRIMARY KEY (league_id, year, week, team_id),
+        FOREIGN KEY (league_id, year, team_id) REFERENCES teams (league_id, year, team_id)
+    ) WITHOUT ROWID;
+    INSERT OR IGNORE INTO standings_v2
+        (league_id, year, week, team_id, wins, losses, ties, points_for, points_against, rank)
+        SELECT league_id, COALESCE(year, (SELECT MIN(l.year) FROM leagues l WHERE l.id = s.league_id)),
+               week, team_id, wins, losses, ties, points_for, points_against, rank
+        FROM standings s
+        WHERE COALESCE(year, (SELECT MIN(l.year) FROM leagues l WHERE l.id = s.league_id)) IS NOT NULL
+          AND league_id IS NOT NULL AND week IS NOT NULL AND team_id IS NOT NULL;
+
+    CREATE TABLE weekly_stats_v2 (
+        league_id INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        week INTEGER NOT NULL,
+        team_id INTEGER NOT NULL,
+        total_points REAL,
+        top_player TEXT,
+        flop_player TEXT,
+        PRIMARY KEY (league_id, year, week, team_id),
+        FOREIGN KEY (league_id, year, team_id) REFERENCES teams (league_id, year, team_id)
+    ) WITHOUT ROWID;
+    INSERT OR IGNORE INTO weekly_stats_v2
+        (league_id, year, week, team_id, total_points, top_player, flop_player)
+        SELECT league_id, (SELECT MIN(l.year) FROM leagues l WHERE l.id = w.league_id),
+               week, team_id, total_points, top_player, flop_player
+        FROM weekly_stats w
+        WHERE (SELECT MIN(l.year) FROM leagues l WHERE l.id = w.league_id) IS NOT NULL
+          AND league_id IS NOT NULL AND week IS NOT NULL AND team_id IS NOT NULL;
+
+    DROP TABLE matchups;
+    DROP TABLE player_scores;
+    DROP TABLE standings;
+    DROP TABLE weekly_stats;
+    DROP TABLE teams;
+    DROP TABLE leagues;
+    ALTER TABLE leagues_v2 RENAME TO leagues;
+    ALTER TABLE teams_v2 RENAME TO teams;
+    ALTER TABLE matchups_v2 RENAME TO matchups;
+    ALTER TABLE player_scores_v2 RENAME TO player_scores;
+    ALTER TABLE standings_v2 RENAME TO standings;
+    ALTER TABLE weekly_stats_v2 RENAME TO weekly_stats;
+
+    -- fantasy team across seasons (a team can be on either side of a matchup)
+    CREATE INDEX idx_matchups_team_a ON matchups (league_id, team_a_id, year, week, score_a, score_b, winner_id);
+    CREATE INDEX idx_matchups_team_b ON matchups (league_id, team_b_id, year, week, score_a, score_b, winner_id);
+    CREATE INDEX idx_player_scores_team ON player_scores (league_id, fantasy_team_id, year, week, points);
+    CREATE INDEX idx_standings_team ON standings (league_id, team_id, year, week, wins, losses, ties, rank);
+    -- player across seasons
+    CREATE INDEX idx_player_scores_player ON player_scores (player_id, year, week, points, position);
+    """,
+    # 3: lineup slot of each player line (QB, RB, FLEX, BE, ...), so a stored week can be replayed as
+    #    starters vs bench. NULL for rows imported from season-end rosters.
+    """
+    ALTER TABLE player_scores ADD COLUMN slot TEXT;
+    """,
+    # 4: the matchup's position in ESPN's schedule for its week, so the local store serves a week's
+    #    matchups in the same order as ESPN (recap numbering and seeded draws follow list order).
+    #    NULL for rows imported before this column existed.
+    """
+    ALTER TABLE matchups ADD COLUMN position INTEGER;
+    """,
+]
+
+
+def migrate(conn: sqlite3.Connection, target: Optional[int] = None) -> int:
+    """
+    Create the base schema if needed and apply pending migrations (up to `target`, default all).
+    Returns the schema version.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version == 0:
+        conn.executescript(BASE_SCHEMA)
+    target = len(MIGRATIONS) if target is None else target
+    for number, script in enumerate(MIGRATIONS[version:target], start=version + 1):
+        try:
+            conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {number};")
+            # Raises on a foreign key that points at a missing table/key ("foreign key mismatch").
+            # Rows that violate a key (legacy data imported with enforcement off) are only returned.
+            conn.execute("PRAGMA foreign_key_check").fetchall()
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        version = number
+    return version
+
+
+def connect(path: str = DB_PATH, pragmas: tuple = ()) -> sqlite3.Connection:
+    """
+    Open (and migrate) the history DB in autocommit mode; callers issue BEGIN/COMMIT themselves.
+    """
+    conn = sqlite3.connect(path, isolation_level=None)
+    for pragma in pragmas:
+        conn.execute(pragma)
+    migrate(conn)
+    return conn
+
+
+def last_synced_week(conn: sqlite3.Connection, league_id: int, year: int) -> Optional[int]:
+    row = conn.execute(
+        "SELECT last_week FROM sync_state WHERE league_id = ? AND year = ?", (league_id, year)
+    ).fetchone()
+    return row[0] if row else None
@@ -1,80 +1,398 @@
+"""
+Backfill fantasy_league.db from ESPN.
 
-from espn_api.football import League
-import sqlite3
+    python import_espn_history.py --league-id 97124817 --start-year 2020 --end-year 2024 --workers 8
+    python import_espn_history.py --league-id 97124817 --start-year 2024 --end-year 2024 --sync
+
+Seasons are fetched on a worker pool. Within a season, box scores for every week
+are fetched concurrently through espn_async (aiohttp, in requirements.txt), with
+--workers requests in flight; without aiohttp the weeks fan out on a thread
+pool of --workers instead. Every fetched season is handed to a single writer
+thread that owns the SQLite connection, so writes stay serialized.
+
+Every write is an upsert on natural keys, so re-running never duplicates rows.
+--sync additionally skips what sync_state says is already complete: finished
+seasons are not fetched at all, and the current season only fetches weeks after
+the last completed one.
+"""
 import os
+import time
+import queue
+import sqlite3
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, Executor
+from typing import Dict, List, Optional, Tuple
 
-# === CONFIGURATION ===
-LEAGUE_ID = 97124817  # Replace with your league ID
-START_YEAR = 2020   # Replace with the earliest year you want
-END_YEAR = 2024     # Replace with the latest year you want
+import history_db
+from espn_cache import get_league, season_is_final
+
+try:  # optional: concurrent box score fetching (needs aiohttp)
+    import espn_async
+except ImportError:
+    espn_async = None
+
+# === DEFAULTS (override on the command line) ===
+DEFAULT_LEAGUE_ID = int(os.getenv("LEAGUE_ID", "97124817"))
+DEFAULT_START_YEAR = 2020
+DEFAULT_END_YEAR = 2024
+DEFAULT_WORKERS = 4
+DB_PATH = history_db.DB_PATH
 SWID = os.getenv("ESPN_SWID")  # ESPN SWID cookie
 ESPN_S2 = os.getenv("ESPN_S2")  # ESPN S2 cookie
 
+# === UPSERT STATEMENTS (one buffer per table; natural keys from history_db) ===
+INSERT_SQL: Dict[str, str] = {
+    "leagues": """
+        INSERT INTO leagues (id, year, name) VALUES (?, ?, ?)
+        ON CONFLICT (id, year) DO UPDATE SET name = excluded.name""",
+    "teams": """
+        INSERT INTO teams (team_id, name, owner, league_id, year) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (league_id, year, team_id) DO UPDATE SET name = excluded.name, owner = excluded.owner""",
+    "matchups": """
+        INSERT INTO matchups (week, team_a_id, team_b_id, score_a, score_b, winner_id, league_id, year, position)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (league_id, year, week, team_a_id, team_b_id) DO UPDATE SET
+            score_a = excluded.score_a, score_b = excluded.score_b, winner_id = excluded.winner_id,
+            position = excluded.position""",
+    "player_scores": """
+        INSERT INTO player_scores
+            (player_name, player_id, team_id, fantasy_team_id, week, points, position, league_id, year, slot)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (league_id, year, week, fantasy_team_id, player_id) DO UPDATE SET
+            player_name = excluded.player_name, team_id = excluded.team_id,
+            points = excluded.points, position = excluded.position, slot = excluded.slot""",
+    "standings": """
+        INSERT INTO standings (team_id, week, wins, losses, ties, points_for, points_against, rank, league_id, year)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (league_id, year, week, team_id) DO UPDATE SET
+            wins = excluded.wins, losses = excluded.losses, ties = excluded.ties,
+            points_for = excluded.points_for, points_against = excluded.points_against, rank = excluded.rank""",
+    "sync_state": """
+        INSERT INTO sync_state (league_id, year, last_week) VALUES (?, ?, ?)
+        ON CONFLICT (league_id, year) DO UPDATE SET
+            last_week = excluded.last_week, updated_at = CURRENT_TIMESTAMP""",
+}
+
+# Bulk-load tuning: WAL + relaxed fsync while we own the file.
+LOAD_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",  # ~64 MB page cache
+)
+
+WEEKS = range(1, 18)  # Max 17 regular season weeks
+BOX_SCORE_MIN_YEAR = 2019  # espn_api only has box scores (weekly lineups) from 2019 on
+
+
 # === DATABASE CONNECTION ===
-conn = sqlite3.connect("fantasy_league.db")
-cursor = conn.cursor()
+def connect(path: str) -> sqlite3.Connection:
+    # autocommit: we issue BEGIN/COMMIT ourselves (one transaction per season)
+    return history_db.connect(path, pragmas=LOAD_PRAGMAS)
+
+
+# === FETCH: build row buffers for one season ===
+def _roster_rows(team, week: int, league_id: int, year: int) -> List[Tuple]:
+    """Pre-2019 fallback: season-end roster with that week's points; the lineup slot is unknown."""
+    rows = []
+    for player in team.roster:
+        stats = player.stats.get(week, {})
+        rows.append((player.name, player.playerId, player.proTeam, team.team_id, week,
+                     stats.get("points", 0), player.position, league_id, year, None))
+    return rows
+
+def _lineup_rows(team_id: int, lineup, week: int, league_id: int, year: int) -> List[Tuple]:
+    """The week's actual lineup from a box score, including each player's slot."""
+    return [
+        (player.name, player.playerId, player.proTeam, team_id, week,
+         player.points or 0, player.position, league_id, year, player.slot_position)
+        for player in lineup
+    ]
 
-# === MAIN IMPORT FUNCTION ===
-def import_league_data(year):
-    print(f"Importing data for {year}...")
-    league = League(league_id=LEAGUE_ID, year=year, swid=SWID, espn_s2=ESPN_S2)
+def standings_rows(
+    weekly_results: List[List[Tuple[int, int, float, float]]],
+    league_id: int,
+    year: int,
+    since_week: int = 1,
+) -> List[Tuple]:
+    """
+    Cumulative standings "as of week N", in one pass over the weeks.
+    weekly_results[i] holds (team_a_id, team_b_id, score_a, score_b) for week i+1.
+    Rank: wins desc, then ties desc, then points_for desc.
+    Earlier weeks still feed the running totals, but only weeks >= since_week are emitted.
+    """
+    table: Dict[int, Dict[str, float]] = {}
+    rows: List[Tuple] = []
+    for week, results in enumerate(weekly_results, start=1):
+        if not results:
+            continue
+        for team_a, team_b, score_a, score_b in results:
+            for team_id, pf, pa in ((team_a, score_a, score_b), (team_b, score_b, score_a)):
+                rec = table.setdefault(team_id, {"wins": 0, "losses": 0, "ties": 0, "pf": 0.0, "pa": 0.0})
+                rec["pf"] += pf or 0
+                rec["pa"] += pa or 0
+                if pf > pa:
+                    rec["wins"] += 1
+                elif pf < pa:
+                    rec["losses"] += 1
+                else:
+                    rec["ties"] += 1
 
-    # Insert league record
-    cursor.execute("INSERT OR IGNORE INTO leagues (id, year, name) VALUES (?, ?, ?)",
-                   (LEAGUE_ID, year, f"League {year}"))
+        if week < since_week:
+            continue
+        ordered = sorted(table.items(), key=lambda kv: (-kv[1]["wins"], -kv[1]["ties"], -kv[1]["pf"]))
+        for rank, (team_id, rec) in enumerate(ordered, start=1):
+            rows.append((team_id, week, rec["wins"], rec["losses"], rec["ties"],
+                         round(rec["pf"], 2), round(rec["pa"], 2), rank, league_id, year))
+    return rows
+
+def _week_matches(league, week: int) -> List[Tuple]:
+    """
+    (home_team, away_team, home_score, away_score, position) for every non-bye matchup of the week;
+    position is the matchup's index in ESPN's schedule for the week.
+    """
+    matches = []
+    for position, match in enumerate(league.scoreboard(week=week)):
+        if not (hasattr(match, "home_team") and hasattr(match, "away_team")):
+            continue  # bye
+        matches.append((match.home_team, match.away_team, match.home_score, match.away_score, position))
+    return matches
+
+def _results(matches: List[Tuple]) -> List[Tuple[int, int, float, float]]:
+    # unplayed weeks don't count toward standings
+    return [(a.team_id, b.team_id, sa, sb) for a, b, sa, sb, _ in matches if sa or sb]
+
+def fetch_week_rows(league, week: int, league_id: int, year: int, boxes: Optional[list] = None) -> Dict[str, List[Tuple]]:
+    """
+    Matchups + player scores for one week, plus the raw results the standings stage needs.
+    `boxes` are the week's already-fetched box scores, if any.
+    """
+    rows: Dict[str, List[Tuple]] = {"matchups": [], "player_scores": [], "results": []}
+
+    matches = _week_matches(league, week)
+    for team_a, team_b, score_a, score_b, position in matches:
+        winner = team_a if score_a > score_b else team_b
+
+        rows["matchups"].append(
+            (week, team_a.team_id, team_b.team_id, score_a, score_b, winner.team_id, league_id, year, position))
+
+    if year >= BOX_SCORE_MIN_YEAR:
+        for box in boxes if boxes is not None else league.box_scores(week):
+            for team, lineup in ((box.home_team, box.home_lineup), (box.away_team, box.away_lineup)):
+                if hasattr(team, "team_id"):  # byes have no away team
+                    rows["player_scores"].extend(_lineup_rows(team.team_id, lineup, week, league_id, year))
+    else:
+        for team_a, team_b, _, _, _ in matches:
+            rows["player_scores"].extend(_roster_rows(team_a, week, league_id, year))
+            rows["player_scores"].extend(_roster_rows(team_b, week, league_id, year))
+    rows["results"] = _results(matches)
+    return rows
+
+def completed_through(league, year: int) -> int:
+    """Last week of the season whose scores are final."""
+    if season_is_final(year):
+        return WEEKS[-1]
+    return max(0, min(int(league.current_week) - 1, WEEKS[-1]))
+
+def fetch_season_rows(
+    league_id: int,
+    year: int,
+    espn_s2: Optional[str] = None,
+    swid: Optional[str] = None,
+    week_pool: Optional[Executor] = None,
+    since_week: int = 1,
+    workers: Optional[int] = None,
+) -> Dict[str, List[Tuple]]:
+    """
+    Row buffers for one season, covering weeks since_week..current week.
+    Earlier weeks only contribute scoreboard results to the running standings.
+    `workers` caps concurrent box score requests (espn_async); `week_pool` is the
+    fallback when aiohttp isn't installed.
+    """
+    league = get_league(league_id, year, espn_s2=espn_s2, swid=swid)
+    rows: Dict[str, List[Tuple]] = {table: [] for table in INSERT_SQL}
+
+    rows["leagues"].append((league_id, year, f"League {year}"))
 
-    
-    # Insert teams
     for team in league.teams:
-        #print(dir(team))
-        cursor.execute("INSERT OR IGNORE INTO teams (id, name, owner, league_id) VALUES (?, ?, ?, ?)",
-                       (team.team_id, team.team_name, str(team.owners), LEAGUE_ID))
-
-    # Insert weekly matchups and player scores
-    for week in range(1, 18):  # Max 17 regular season weeks
-        scoreboard = league.scoreboard(week=week)
-        standings = league.standings()
-
-        for match in scoreboard:
-            team_a = match.home_team
-            team_b = match.away_team
-            score_a = match.home_score
-            score_b = match.away_score
-            winner = team_a if score_a > score_b else team_b
-
-            cursor.execute("""
-            INSERT INTO matchups (week, team_a_id, team_b_id, score_a, score_b, winner_id, league_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?)""",
-            (week, team_a.team_id, team_b.team_id, score_a, score_b, winner.team_id, LEAGUE_ID))
-
-            # Player scores
-            print(team_a.roster)
-            for player, stats in team_a.roster():
-                cursor.execute("""
-                INSERT INTO player_scores (player_name, player_id, team_id, fantasy_team_id, week, points, position, league_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                (player.name, player.playerId, player.proTeam, team_a.team_id, week, stats['points'], player.position, LEAGUE_ID))
-
-            for player, stats in team_b.roster():
-                cursor.execute("""
-                INSERT INTO player_scores (player_name, player_id, team_id, fantasy_team_id, week, points, position, league_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                (player.name, player.playerId, player.proTeam, team_b.team_id, week, stats['points'], player.position, LEAGUE_ID))
-
-        # Insert standings
-        for standing in standings:
-            cursor.execute("""
-            INSERT INTO standings (team_id, week, wins, losses, ties, points_for, points_against, rank, league_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (standing.team_id, week, standing.wins, standing.losses, standing.ties,
-             standing.points_for, standing.points_against, standing.rank, LEAGUE_ID))
+        rows["teams"].append((team.team_id, team.team_name, str(team.owners), league_id, year))
 
-# === RUN IMPORT FOR ALL YEARS ===
-for year in range(START_YEAR, END_YEAR + 1):
+    last_week = WEEKS[-1] if season_is_final(year) else min(int(league.current_week), WEEKS[-1])
+    weeks = [w for w in WEEKS if since_week <= w <= last_week]
+
+    # Results for already-synced weeks come from the (shared, cached) season scoreboard.
+    # This also pulls the season schedule once before the fan-out below.
+    earlier = [_results(_week_matches(league, w)) for w in WEEKS if w < since_week and w <= last_week]
+
+    # Weekly matchups and player scores: with espn_async every week's box scores are fetched
+    # concurrently up front (`workers` in flight); otherwise weeks fan out on the pool (map keeps week order).
+    if espn_async is not None and year >= BOX_SCORE_MIN_YEAR and weeks:
+        boxes = espn_async.prefetch_box_scores(league, weeks, concurrency=workers)
+        weekly = [fetch_week_rows(league, w, league_id, year, boxes=boxes[w]) for w in weeks]
+    elif week_pool is not None and weeks:
+        first = fetch_week_rows(league, weeks[0], league_id, year)  # warms the schedule cache
+        weekly = [first] + list(week_pool.map(lambda w: fetch_week_rows(league, w, league_id, year), weeks[1:]))
+    else:
+        weekly = [fetch_week_rows(league, w, league_id, year) for w in weeks]
+
+    for week_rows in weekly:
+        rows["matchups"].extend(week_rows["matchups"])
+        rows["player_scores"].extend(week_rows["player_scores"])
+
+    # Standings stage: computed from the scoreboards above, no extra ESPN calls
+    rows["standings"] = standings_rows(
+        earlier + [w["results"] for w in weekly], league_id, year, since_week=since_week
+    )
+    rows["sync_state"].append((league_id, year, completed_through(league, year)))
+    return rows
+
+
+# === WRITE: one transaction per season ===
+def write_season_rows(conn: sqlite3.Connection, rows: Dict[str, List[Tuple]], stats: Dict[str, List[float]]) -> None:
+    """executemany per table inside a single BEGIN/COMMIT; accumulates (rows, seconds) per table."""
+    conn.execute("BEGIN")
     try:
-        import_league_data(year)
-        conn.commit()
-    except Exception as e:
-        print(f"Failed to import {year}: {e}")
+        for table, sql in INSERT_SQL.items():
+            batch = rows.get(table, [])
+            if not batch:
+                continue
+            t0 = time.perf_counter()
+            conn.executemany(sql, batch)
+            tally = stats.setdefault(table, [0, 0.0])
+            tally[0] += len(batch)
+            tally[1] += time.perf_counter() - t0
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+class SeasonWriter(threading.Thread):
+    """The only thread that touches SQLite: drains fetched seasons from a queue, one transaction each."""
+
+    _STOP = object()
+
+    def __init__(self, db_path: str):
+        super().__init__(name="sqlite-writer", daemon=True)
+        self.db_path = db_path
+        self.queue: "queue.Queue" = queue.Queue()
+        self.stats: Dict[str, List[float]] = {}
+
+    def submit(self, year: int, rows: Dict[str, List[Tuple]]) -> None:
+        self.queue.put((year, rows))
+
+    def close(self) -> None:
+        self.queue.put(self._STOP)
+        self.join()
+
+    def run(self) -> None:
+        conn = connect(self.db_path)
+        try:
+            while True:
+                item = self.queue.get()
+                if item is self._STOP:
+                    break
+                year, rows = item
+                try:
+                    write_season_rows(conn, rows, self.stats)
+                except Exception as e:
+                    print(f"Failed to write {year}: {e}")
+        finally:
+            conn.close()
+
+
+def print_throughput(stats: Dict[str, List[float]], fetch_seconds: float, wall_seconds: float) -> None:
+    print("\n=== Import throughput ===")
+    print(f"{'table':<15}{'rows':>10}{'seconds':>10}{'rows/sec':>12}")
+    for table, (count, seconds) in stats.items():
+        rate = count / seconds if seconds > 0 else float("inf")
+        print(f"{table:<15}{count:>10}{seconds:>10.3f}{rate:>12.0f}")
+    print(f"(ESPN fetch time, summed over seasons: {fetch_seconds:.1f}s; wall clock: {wall_seconds:.1f}s)")
+
+
+# === RUN IMPORT FOR ALL YEARS ===
+def backfill(
+    league_id: int,
+    start_year: int,
+    end_year: int,
+    workers: int = DEFAULT_WORKERS,
+    db_path: str = DB_PATH,
+    espn_s2: Optional[str] = ESPN_S2,
+    swid: Optional[str] = SWID,
+    incremental: bool = False,
+) -> Dict[str, List[float]]:
+    years = list(range(start_year, end_year + 1))
+    workers = max(1, workers)
+
+    # Where each season starts (migrates the file before the writer opens it).
+    since: Dict[int, int] = {year: 1 for year in years}
+    if incremental:
+        conn = history_db.connect(db_path)
+        try:
+            for year in years:
+                done = history_db.last_synced_week(conn, league_id, year) or 0
+                if done >= WEEKS[-1]:
+                    print(f"{year}: up to date (through week {done}), skipping")
+                    del since[year]
+                else:
+                    since[year] = done + 1
+        finally:
+            conn.close()
+    years = list(since)
+
+    writer = SeasonWriter(db_path)
+    writer.start()
+    fetch_seconds = 0.0
+    wall_start = time.perf_counter()
+
+    # Two pools so a season task waiting on its weeks can never starve the week workers
+    # (the week pool only does work when aiohttp is missing; threads are started on first use).
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="espn-week") as week_pool, \
+         ThreadPoolExecutor(max_workers=min(workers, len(years)) or 1, thread_name_prefix="espn-season") as season_pool:
+
+        def import_season(year: int) -> float:
+            print(f"Importing data for {year} (from week {since[year]})...")
+            t0 = time.perf_counter()
+            rows = fetch_season_rows(
+                league_id, year, espn_s2=espn_s2, swid=swid, week_pool=week_pool, since_week=since[year],
+                workers=workers,
+            )
+            writer.submit(year, rows)
+            return time.perf_counter() - t0
+
+        try:
+            futures = {year: season_pool.submit(import_season, year) for year in years}
+            for year, fut in futures.items():
+                try:
+                    fetch_seconds += fut.result()
+                except Exception as e:
+                    print(f"Failed to import {year}: {e}")
+        finally:
+            writer.close()
+
+    print_throughput(writer.stats, fetch_seconds, time.perf_counter() - wall_start)
+    return writer.stats
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Backfill fantasy_league.db from ESPN.")
+    parser.add_argument("--league-id", type=int, default=DEFAULT_LEAGUE_ID)
+    parser.add_argument("--start-year", type=int, default=DEFAULT_START_YEAR)
+    parser.add_argument("--end-year", type=int, default=DEFAULT_END_YEAR)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Concurrent ESPN fetches (seasons, and box score requests within a season).")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite file to write.")
+    parser.add_argument("--sync", action="store_true",
+                        help="Incremental: only fetch weeks after the last completed week already imported.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = _parse_args(argv)
+    backfill(args.league_id, args.start_year, args.end_year, workers=args.workers, db_path=args.db,
+             incremental=args.sync)
+
 
-conn.close()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+# job_queue.py
+"""
+Durable weekly-recap job queue (SQLite), so a failed or interrupted run resumes
+instead of starting over.
+
+A job is one (league_id, year, week) with its recipients. It runs the
+batch_runner stages in order, and each completed stage is checkpointed
+together with its output:
+
+    fetch -> fetched   generate -> generated   render -> rendered   deliver -> sent
+
+A job that fails is retried from its last checkpoint with exponential backoff
+until JOB_MAX_ATTEMPTS, then marked failed. Re-enqueueing it (e.g. by the next
+run) resets the attempt count. Enqueueing a job that already exists is a no-op,
+so a rerun only picks up unfinished work. N worker threads claim due jobs until
+the queue is drained. Partly delivered jobs remember who was already sent to.
+
+    python job_queue.py status
+    python job_queue.py retry-failed
+
+Environment:
+- JOB_QUEUE_PATH     queue file (default: ./.job_queue.sqlite)
+- JOB_WORKERS        concurrent workers (default: 4)
+- JOB_MAX_ATTEMPTS   tries per job before it is marked failed (default: 4)
+- JOB_BACKOFF_BASE   seconds before the first retry, doubled each time (default: 30)
+- JOB_LEASE_SECONDS  a running job whose worker vanished is requeued after this (default: 1800)
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import sqlite3
+import argparse
+import threading
+import traceback
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+import tracing
+from batch_runner import STAGES, Job, fetch_stage, generate_stage, make_deliver_stage, render_stage, resolve_week
+
+CHECKPOINTS: Dict[str, str] = dict(zip(STAGES, ("fetched", "generated", "rendered", "sent")))
+STATES = ("queued", "running", "done", "failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    league_id INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    recipients TEXT NOT NULL DEFAULT '[]',
+    state TEXT NOT NULL DEFAULT 'queued',
+    checkpoint TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_run_at REAL NOT NULL DEFAULT 0,
+    lease_until REAL,
+    worker TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (league_id, year, week)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs (state, next_run_at);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    job_id INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (job_id, stage)
+) WITHOUT ROWID;
+"""
+
+
+# ===============================
+# Configuration
+# ===============================
+def _queue_path() -> str:
+    return os.getenv("JOB_QUEUE_PATH", ".job_queue.sqlite")
+
+def _max_attempts() -> int:
+    return int(os.getenv("JOB_MAX_ATTEMPTS", "4"))
+
+def _backoff_base() -> float:
+    return float(os.getenv("JOB_BACKOFF_BASE", "30"))
+
+def _lease_seconds() -> float:
+    return float(os.getenv("JOB_LEASE_SECONDS", "1800"))
+
+DEFAULT_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+
+
+# ===============================
+# Storage
+# ===============================
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    conn = sqlite3.connect(path or _queue_path(), timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+@dataclass
+class QueuedJob:
+    id: int
+    job: Job
+    state: str
+    checkpoint: Optional[str]
+    attempts: int
+    next_run_at: float
+    last_error: Optional[str]
+
+    @classmethod
+    def from_row(cls, row) -> "QueuedJob":
+        id_, league_id, year, week, recipients, state, checkpoint, attempts, next_run_at, last_error = row
+        return cls(id_, Job(league_id, year, week, json.loads(recipients)), state, checkpoint, attempts,
+                   next_run_at, last_error)
+
+_COLUMNS = "id, league_id, year, week, recipients, state, checkpoint, attempts, next_run_at, last_error"
+
+
+def enqueue(conn: sqlite3.Connection, jobs: List[Job]) -> List[int]:
+    """
+    Add jobs (week resolved first). Existing jobs are left alone, except failed
+    ones, which are requeued with a fresh attempt budget. Recipients are updated
+    on anything not yet sent.
+    """
+    now = time.time()
+    ids = []
+    for job in jobs:
+        resolve_week(job)
+        conn.execute("""
+            INSERT INTO jobs (league_id, year, week, recipients, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (league_id, year, week) DO UPDATE SET
+                recipients = CASE WHEN jobs.state = 'done' THEN jobs.recipients ELSE excluded.recipients END,
+                state = CASE WHEN jobs.state = 'failed' THEN 'queued' ELSE jobs.state END,
+                attempts = CASE WHEN jobs.state = 'failed' THEN 0 ELSE jobs.attempts END,
+                next_run_at = CASE WHEN jobs.state = 'failed' THEN 0 ELSE jobs.next_run_at END,
+                updated_at = excluded.updated_at
+        """, (job.league_id, job.year, job.week, json.dumps(job.recipients), now, now))
+        ids.append(conn.execute("SELECT id FROM jobs WHERE league_id = ? AND year = ? AND week = ?",
+                                (job.league_id, job.year, job.week)).fetchone()[0])
+    return ids
+
+def requeue_expired(conn: sqlite3.Connection) -> int:
+    """Running jobs whose lease ran out (their worker died) go back to the queue."""
+    cur = conn.execute("""
+        UPDATE jobs SET state = 'queued', worker = NULL, lease_until = NULL, updated_at = ?
+        WHERE state = 'running' AND lease_until < ?""", (time.time(), time.time()))
+    return cur.rowcount
+
+def retry_failed(conn: sqlite3.Connection) -> int:
+    cur = conn.execute("""
+        UPDATE jobs SET state = 'queued', attempts = 0, next_run_at = 0, updated_at = ?
+        WHERE state = 'failed'""", (time.time(),))
+    return cur.rowcount
+
+def _not_in(ids: Iterable[int]) -> str:
+    return f" AND id NOT IN ({','.join(str(int(i)) for i in ids)})" if ids else ""
+
+def claim(conn: sqlite3.Connection, worker: str, skip: Iterable[int] = ()) -> Optional[QueuedJob]:
+    """Atomically take the next due job (oldest first), ignoring the ids in `skip`."""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(f"""
+            SELECT {_COLUMNS} FROM jobs
+            WHERE state = 'queued' AND next_run_at <= ?{_not_in(skip)}
+            ORDER BY next_run_at, id LIMIT 1""", (now,)).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute("""
+            UPDATE jobs SET state = 'running', worker = ?, lease_until = ?, attempts = attempts + 1, updated_at = ?
+            WHERE id = ?""", (worker, now + _lease_seconds(), now, row[0]))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    queued = QueuedJob.from_row(row)
+    queued.state, queued.attempts = "running", queued.attempts + 1
+    return queued
+
+def load_checkpoints(conn: sqlite3.Connection, job_id: int) -> Dict[str, Any]:
+    """Stage outputs saved so far, merged in stage order (the job's context dict)."""
+    rows = dict(conn.execute("SELECT stage, data FROM checkpoints WHERE job_id = ?", (job_id,)).fetchall())
+    ctx: Dict[str, Any] = {}
+    for stage in STAGES:
+        if stage in rows:
+            ctx.update(json.loads(rows[stage]))
+    return ctx
+
+def save_checkpoint(conn: sqlite3.Connection, job_id: int, stage: str, data: Dict[str, Any], done: bool) -> None:
+    """Store a stage's output; `done` also advances the job's checkpoint (partial progress doesn't)."""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute("""
+        INSERT INTO checkpoints (job_id, stage, data, created_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT (job_id, stage) DO UPDATE SET data = excluded.data, created_at = excluded.created_at
+    """, (job_id, stage, json.dumps(data), now))
+    if done:
+        conn.execute("UPDATE jobs SET checkpoint = ?, updated_at = ? WHERE id = ?", (CHECKPOINTS[stage], now, job_id))
+    conn.execute("COMMIT")
+
+def finish(conn: sqlite3.Connection, queued: QueuedJob, error: Optional[str] = None, release: bool = False) -> None:
+    """
+    Mark the job done, or schedule its retry (failed once attempts run out).
+    `release` puts it back as queued without counting the attempt (a dry run, which sends nothing).
+    """
+    now = time.time()
+    if release:
+        conn.execute("""UPDATE jobs SET state = 'queued', attempts = attempts - 1, worker = NULL,
+                        lease_until = NULL, updated_at = ? WHERE id = ?""", (now, queued.id))
+    elif error is None:
+        conn.execute("""UPDATE jobs SET state = 'done', worker = NULL, lease_until = NULL, last_error = NULL,
+                        updated_at = ? WHERE id = ?""", (now, queued.id))
+    elif queued.attempts >= _max_attempts():
+        tracing.incr("jobs.failed")
+        conn.execute("""UPDATE jobs SET state = 'failed', worker = NULL, lease_until = NULL, last_error = ?,
+                        updated_at = ? WHERE id = ?""", (error, now, queued.id))
+    else:
+        tracing.incr("jobs.retries")
+        delay = _backoff_base() * (2 ** (queued.attempts - 1))
+        conn.execute("""UPDATE jobs SET state = 'queued', worker = NULL, lease_until = NULL, last_error = ?,
+                        next_run_at = ?, updated_at = ? WHERE id = ?""",
+                     (error, now + delay + random.uniform(0, delay / 4), now, queued.id))
+
+def list_jobs(conn: sqlite3.Connection, ids: Optional[List[int]] = None) -> List[QueuedJob]:
+    where = f"WHERE id IN ({','.join('?' * len(ids))})" if ids else ""
+    rows = conn.execute(f"SELECT {_COLUMNS} FROM jobs {where} ORDER BY id", ids or []).fetchall()
+    return [QueuedJob.from_row(r) for r in rows]
+
+
+# ===============================
+# Workers
+# ===============================
+StageFn = Callable[[Job, Dict[str, Any]], None]
+
+def _stage_output(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in after.items() if k not in before or before[k] != v}
+
+def run_job(conn: sqlite3.Connection, queued: QueuedJob, stages: Dict[str, StageFn], dry_run: bool = False) -> None:
+    """
+    Run the stages after the job's checkpoint, checkpointing each; errors go to `finish`.
+    With dry_run the (non-sending) deliver stage runs but isn't checkpointed, so the job
+    stays queued at 'rendered' for the real run.
+    """
+    ctx = load_checkpoints(conn, queued.id)
+    done = list(CHECKPOINTS.values()).index(queued.checkpoint) + 1 if queued.checkpoint else 0
+    stage = STAGES[min(done, len(STAGES) - 1)]
+    try:
+        for stage in STAGES[done:]:
+            before = dict(ctx)
+            try:
+                with tracing.span(f"stage.{stage}", job=queued.job.label, attempt=queued.attempts):
+                    stages[stage](queued.job, ctx)
+            except Exception:
+                partial = _stage_output(before, ctx)
+                if partial:  # e.g. recipients reached before delivery failed
+                    save_checkpoint(conn, queued.id, stage, partial, done=False)
+                raise
+            if dry_run and stage == STAGES[-1]:
+                finish(conn, queued, release=True)
+                return
+            save_checkpoint(conn, queued.id, stage, _stage_output(before, ctx), done=True)
+    except Exception as e:
+        finish(conn, queued, error=f"{stage}: {type(e).__name__}: {e}")
+        traceback.print_exc()
+        return
+    finish(conn, queued)
+
+
+def _pending(conn: sqlite3.Connection, skip: Iterable[int] = ()) -> Optional[float]:
+    """Seconds until the next queued job is due (0 = now), or None when nothing is queued or running."""
+    row = conn.execute(f"SELECT MIN(next_run_at) FROM jobs WHERE state = 'queued'{_not_in(skip)}").fetchone()
+    if row[0] is not None:
+        return max(0.0, row[0] - time.time())
+    running = conn.execute("SELECT COUNT(*) FROM jobs WHERE state = 'running'").fetchone()[0]
+    return 1.0 if running else None
+
+def run_workers(
+    workers: int = DEFAULT_WORKERS,
+    stages: Optional[Dict[str, StageFn]] = None,
+    dry_run: bool = False,
+    out_dir: Optional[str] = None,
+    path: Optional[str] = None,
+    max_wait: float = 300.0,
+) -> None:
+    """
+    Work the queue with `workers` threads until nothing is queued or running.
+    Retries due within `max_wait` seconds are waited for; later ones are left for the next run.
+    With dry_run nothing is sent and jobs stay queued at 'rendered'; each is worked once.
+    """
+    stages = stages or {
+        "fetch": fetch_stage,
+        "generate": generate_stage,
+        "render": render_stage,
+        "deliver": make_deliver_stage(dry_run=dry_run, out_dir=out_dir),
+    }
+    seen: Set[int] = set()  # dry run: released jobs are queued again, don't pick them twice
+    lock = threading.Lock()
+    conn = connect(path)
+    requeue_expired(conn)
+    conn.close()
+    host = f"{socket.gethostname()}:{os.getpid()}"
+
+    def work(n: int) -> None:
+        conn = connect(path)
+        try:
+            while True:
+                with lock:
+                    skip = set(seen) if dry_run else ()
+                queued = claim(conn, f"{host}/{n}", skip=skip)
+                if queued is not None:
+                    with lock:
+                        seen.add(queued.id)
+                    run_job(conn, queued, stages, dry_run=dry_run)
+                    continue
+                wait = _pending(conn, skip=skip)
+                if wait is None or wait > max_wait:
+                    return
+                time.sleep(min(max(wait, 0.05), 1.0))
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=work, args=(n,), name=f"job-worker-{n}") for n in range(max(1, workers))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+# ===============================
+# Reporting / CLI
+# ===============================
+def format_status(jobs: List[QueuedJob]) -> str:
+    counts = {s: sum(j.state == s for j in jobs) for s in STATES}
+    lines = [" ".join(f"{s}={n}" for s, n in counts.items())]
+    for q in jobs:
+        line = f"- #{q.id} {q.job.label}: {q.state} at {q.checkpoint or 'start'} (attempt {q.attempts})"
+        if q.state == "queued" and q.next_run_at > time.time():
+            line += f", retry in {q.next_run_at - time.time():.0f}s"
+        if q.last_error and q.state != "done":
+            line += f" — {q.last_error}"
+        lines.append(line)
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect or reset the recap job queue (main.py fills and works it).")
+    parser.add_argument("command", choices=("status", "retry-failed"))
+    parser.add_argument("--db", default=None, help="queue file (default: JOB_QUEUE_PATH)")
+    args = parser.parse_args(argv)
+    conn = connect(args.db)
+    if args.command == "retry-failed":
+        print(f"{retry_failed(conn)} failed job(s) requeued")
+    print(format_status(list_jobs(conn)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+# llm_cache.py
+"""
+Content-addressed cache for LLM completions.
+
+Key = sha256 of (model, system prompt, user prompt, temperature). Recaps are
+seeded per week, so a rerun of the same league/year/week produces the same
+prompts and is served from here instead of paying for new completions.
+
+Stored in a small SQLite file (the project already ships SQLite), bounded to
+LLM_CACHE_MAX_ENTRIES rows with least-recently-used eviction.
+
+Environment:
+- LLM_CACHE_PATH         cache file (default: ./.llm_cache.sqlite)
+- LLM_CACHE_MAX_ENTRIES  size bound (default: 2000)
+- LLM_CACHE_DISABLED=1   bypass the cache entirely
+"""
+from __future__ import annotations
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import tracing
+
+_init_lock = threading.Lock()
+_initialized: set[str] = set()
+
+
+# ===============================
+# Configuration
+# ===============================
+def _cache_path() -> str:
+    return os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite")
+
+def _max_entries() -> int:
+    return int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+
+def _disabled() -> bool:
+    return os.getenv("LLM_CACHE_DISABLED", "") == "1"
+
+
+# ===============================
+# Storage
+# ===============================
+def _connect() -> sqlite3.Connection:
+    path = _cache_path()
+    conn = sqlite3.connect(path, timeout=30)
+    with _init_lock:
+        if path not in _initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_last_used ON completions (last_used)")
+            conn.commit()
+            _initialized.add(path)
+    return conn
+
+def cache_key(model: str, messages: List[Dict[str, str]], temperature: Optional[float] = None,
+              params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Key for one request: everything sent besides the messages that shapes the reply
+    (temperature, max_tokens, penalties, ...) goes in `params`, so changing a setting misses.
+    """
+    system = "\n".join(m["content"] for m in messages if m.get("role") == "system")
+    user = "\n".join(m["content"] for m in messages if m.get("role") != "system")
+    key = [model, system, user, temperature]
+    if params:
+        key.append(params)
+    raw = json.dumps(key, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def get(key: str) -> Optional[str]:
+    if _disabled():
+        return None
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT content FROM completions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            tracing.incr("llm.cache_misses")
+            return None
+        tracing.incr("llm.cache_hits")
+        conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key))
+        conn.commit()
+        return row[0]
+    finally:
+        conn.close()
+
+def put(key: str, content: str, model: str = "") -> None:
+    if _disabled():
+        return
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO completions (key, model, content, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+            (key, model, content, now, now),
+        )
+        # Size bound: drop the least-recently-used rows beyond the limit.
+        conn.execute("""
+        DELETE FROM completions WHERE key IN (
+            SELECT key FROM completions ORDER BY last_used DESC LIMIT -1 OFFSET ?
+        )""", (_max_entries(),))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# ===============================
+# Public helper
+# ===============================
+def cached_completion(
+    model: str,
+    messages: List[Dict[str, str]],
+    fetch: Callable[[], str],
+    temperature: Optional[float] = None,
+    regenerate: bool = False,
+) -> str:
+    """
+    Return the cached completion for this prompt, or call `fetch()` and store it.
+    `regenerate=True` skips the lookup and overwrites the stored entry.
+    """
+    key = cache_key(model, messages, temperature)
+    if not regenerate:
+        hit = get(key)
+        if hit is not None:
+            return hit
+    content = fetch()
+    put(key, content, model=model)
+    return content
@@ -1,21 +1,111 @@
 # main.py
+"""
+Weekly recap batch run.
+
+    python main.py --jobs jobs.json            # [{"league_id": 1, "year": 2024, "week": 5, "recipients": [...]}, ...]
+    python main.py --league-id 97124817 --year 2024 --week 5 --to a@x.com,b@y.com
+    python main.py --jobs jobs.json --dry-run --out out/
+
+Without --jobs, a single job is built from the flags, falling back to LEAGUE_ID,
+RECAP_YEAR, RECAP_WEEK and RECAP_RECIPIENTS. The default year is the current
+season, and the default week is the last completed one.
+
+Jobs go through the durable queue in job_queue.py: rerunning after a failure
+only does the unfinished work (a recap already sent is not sent again), and a
+--dry-run leaves each job rendered and ready to send. --no-queue runs the
+in-memory pipeline instead, with per-stage pool sizes.
+
+Every run prints a timing summary (see tracing.py). --report (or RUN_REPORT_PATH)
+also writes the full per-run JSON report: spans, ESPN/LLM/SMTP counters, job states.
+"""
 import os
-import config
+import sys
+import json
+import argparse
+from typing import List, Optional
+
 from dotenv import load_dotenv
-from espn_fetcher import get_matchup_starters
-from gpt_summarizer import generate_recap
 
 load_dotenv(dotenv_path='.env')
 
-def main():
-    #league_id = os.environ["LEAGUE_ID"]
-    #league_id = os.getenv("LEAGUE_ID")
-    #print(f"Sent emails for league {league_id}")
-    #print(get_matchup_starters(league_id, 2021, 17, 11))
-    recap = generate_recap(league_id=97124817, year=2020, week=16, team_id=10)
-    print(recap)
+from batch_runner import STAGES, Job, current_season, format_report, run_jobs  # noqa: E402
+import job_queue  # noqa: E402
+import pdf_export  # noqa: E402
+import tracing  # noqa: E402
 
 
-if __name__ == "__main__":
-    main()
+def _split(recipients: Optional[str]) -> List[str]:
+    return [r.strip() for r in (recipients or "").split(",") if r.strip()]
+
+def load_jobs(path: str) -> List[Job]:
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    jobs = []
+    for item in raw:
+        recipients = item.get("recipients") or []
+        if isinstance(recipients, str):
+            recipients = _split(recipients)
+        jobs.append(Job(
+            league_id=int(item["league_id"]),
+            year=int(item.get("year") or current_season()),
+            week=int(item["week"]) if item.get("week") is not None else None,
+            recipients=list(recipients),
+        ))
+    return jobs
 
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate and email weekly recaps for one or more leagues.")
+    parser.add_argument("--jobs", help="JSON file with a list of jobs")
+    parser.add_argument("--league-id", type=int, default=os.getenv("LEAGUE_ID"))
+    parser.add_argument("--year", type=int, default=os.getenv("RECAP_YEAR"))
+    parser.add_argument("--week", type=int, default=os.getenv("RECAP_WEEK"))
+    parser.add_argument("--to", default=os.getenv("RECAP_RECIPIENTS"), help="comma-separated recipients")
+    parser.add_argument("--dry-run", action="store_true", help="render everything but don't send email")
+    parser.add_argument("--out", help="also write each recap (.md/.html) to this directory")
+    parser.add_argument("--workers", type=int, default=job_queue.DEFAULT_WORKERS, help="concurrent queue workers")
+    parser.add_argument("--no-queue", action="store_true", help="run in memory, without checkpoints or retries")
+    parser.add_argument("--report", default=os.getenv("RUN_REPORT_PATH"), help="write the run's JSON timing report here")
+    for stage in STAGES:
+        parser.add_argument(f"--{stage}-workers", type=int, default=None)
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if args.jobs:
+        jobs = load_jobs(args.jobs)
+    elif args.league_id:
+        jobs = [Job(int(args.league_id), int(args.year or current_season()),
+                    int(args.week) if args.week else None, _split(args.to))]
+    else:
+        print("Nothing to do: pass --jobs or --league-id (or set LEAGUE_ID).")
+        return 2
+
+    tracing.reset()
+    pdf_export.warm_up()  # detect PDF backends while the fetch/generate stages run
+    if args.no_queue:
+        workers = {s: getattr(args, f"{s}_workers") for s in STAGES if getattr(args, f"{s}_workers")}
+        results, stats, wall = run_jobs(jobs, workers=workers, dry_run=args.dry_run, out_dir=args.out)
+        print(format_report(results, stats, wall))
+        ok = all(r.ok for r in results)
+        outcome = [{"job": r.job.label, "failed_stage": r.failed_stage, "error": r.error} for r in results]
+    else:
+        conn = job_queue.connect()
+        ids = job_queue.enqueue(conn, jobs)
+        job_queue.run_workers(workers=args.workers, dry_run=args.dry_run, out_dir=args.out)
+        queued = job_queue.list_jobs(conn, ids)
+        conn.close()  # folds the WAL back into the queue file the workflow caches
+        print(job_queue.format_status(queued))
+        # a dry run leaves jobs queued at 'rendered'; a real run should finish them (or they retry next run)
+        ok = all(q.state != "failed" if args.dry_run else q.state == "done" for q in queued)
+        outcome = [{"job": q.job.label, "state": q.state, "checkpoint": q.checkpoint,
+                    "attempts": q.attempts, "error": q.last_error} for q in queued]
+
+    print("\n" + tracing.format_report())
+    if args.report:
+        tracing.write_report(args.report, {"dry_run": args.dry_run, "ok": ok, "jobs": outcome})
+        print(f"run report: {args.report}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
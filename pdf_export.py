@@ -0,0 +1,220 @@
+# pdf_export.py
+"""
+Markdown -> PDF for downloads (WeasyPrint for emoji support, xhtml2pdf as a fallback).
+
+`PdfRenderer` does the expensive setup once: the backend is detected up front
+(a broken WeasyPrint install is found once, not on every export), emoji fonts
+are located once, and the stylesheet is parsed once and reused.
+`md_to_pdf_bytes` uses one shared renderer per process (`warm_up()` builds it in
+the background at startup); `render_many` spreads a batch of documents over a
+process pool. WeasyPrint's stylesheet and FontConfiguration are kept per thread,
+since they are not safe to share between threads.
+
+Environment:
+- PDF_BACKEND  auto | weasyprint | xhtml2pdf (default: auto = WeasyPrint if it loads)
+- PDF_WORKERS  processes for render_many (default: CPU count)
+"""
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import tracing
+
+EMOJI_FONT_CANDIDATES = [
+    "./fonts/NotoEmoji-Regular.ttf",
+    "./fonts/NotoColorEmoji.ttf",
+    "/usr/share/fonts/truetype/noto/NotoColorEmoji.ttf",
+    "/System/Library/Fonts/Apple Color Emoji.ttf",
+    "C:/Windows/Fonts/seguiemj.ttf",
+]
+
+BASE_CSS = """
+@page { size: letter; margin: 0.6in; }
+body {
+  font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Helvetica, Arial,
+               'LocalEmoji', 'Noto Color Emoji', 'Apple Color Emoji', 'Segoe UI Emoji', 'Noto Emoji',
+               'Noto Sans Symbols 2', sans-serif;
+  line-height: 1.35; color: #111; word-break: break-word;
+}
+h1, h2, h3 { color: #0b3558; margin-top: 0.8em; }
+h1 { font-size: 22pt; }
+h2 { font-size: 16pt; }
+h3 { font-size: 13pt; }
+p  { font-size: 11pt; margin: 0.4em 0; }
+ul, ol { margin: 0.3em 0 0.5em 1.2em; }
+li { margin: 0.15em 0; }
+code, pre { background: #f6f8fa; font-size: 10pt; }
+blockquote { color: #444; border-left: 3px solid #ddd; margin: 0.5em 0; padding: 0.1em 0 0.1em 0.8em; }
+hr { border: none; border-top: 1px solid #ddd; margin: 0.8em 0; }
+strong { color: #0b3558; }
+table { border-collapse: collapse; width: 100%; margin: 0.4em 0; }
+th, td { border: 1px solid #ddd; padding: 6px 8px; font-size: 10pt; }
+th { background: #f2f4f7; text-align: left; }
+"""
+
+
+def build_pdf_html(md_text: str, title: str) -> str:
+    from markdown import markdown as md_to_html
+    body_html = md_to_html(md_text or "", extensions=["tables", "fenced_code"])
+    return f"""<!doctype html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+</head>
+<body>
+{body_html}
+</body>
+</html>"""
+
+@lru_cache(maxsize=1)
+def emoji_css() -> str:
+    """
+    Font stack tries native color emoji on each OS, then falls back to Noto Emoji if present.
+    You can vendor a TTF (e.g., ./fonts/NotoEmoji-Regular.ttf or ./fonts/NotoColorEmoji.ttf).
+    Fonts are looked up once per process.
+    """
+    faces = [
+        f"@font-face {{ font-family: 'LocalEmoji'; src: url('file://{os.path.abspath(candidate)}'); }}"
+        for candidate in EMOJI_FONT_CANDIDATES
+        if os.path.exists(candidate)
+    ]
+    return "\n".join(faces) + BASE_CSS
+
+
+# ===============================
+# Backends
+# ===============================
+def _weasyprint_available() -> bool:
+    try:
+        import weasyprint  # noqa: F401  (raises OSError when pango/cairo are missing)
+        return True
+    except Exception:
+        return False
+
+def _xhtml2pdf_available() -> bool:
+    try:
+        from xhtml2pdf import pisa  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+def detect_backends() -> List[str]:
+    """Usable backends in preference order (honours PDF_BACKEND)."""
+    wanted = os.getenv("PDF_BACKEND", "auto").strip().lower()
+    found = []
+    if wanted in ("auto", "weasyprint") and _weasyprint_available():
+        found.append("weasyprint")
+    if wanted in ("auto", "xhtml2pdf") and _xhtml2pdf_available():
+        found.append("xhtml2pdf")
+    return found
+
+
+class PdfRenderer:
+    """Reusable Markdown -> PDF renderer; see module docstring."""
+
+    def __init__(self, backends: Optional[Sequence[str]] = None):
+        self.backends = list(backends) if backends is not None else detect_backends()
+        self._css = emoji_css()
+        self._local = threading.local()  # .weasy = (HTML, [stylesheet], FontConfiguration), per thread
+
+    @property
+    def backend(self) -> Optional[str]:
+        return self.backends[0] if self.backends else None
+
+    def _weasy_parts(self):
+        parts = getattr(self._local, "weasy", None)
+        if parts is None:
+            from weasyprint import CSS, HTML
+            from weasyprint.text.fonts import FontConfiguration
+            fonts = FontConfiguration()
+            parts = self._local.weasy = (HTML, [CSS(string=self._css, font_config=fonts)], fonts)
+        return parts
+
+    def _render_weasyprint(self, html: str) -> bytes:
+        HTML, stylesheets, fonts = self._weasy_parts()
+        return HTML(string=html, base_url=".").write_pdf(stylesheets=stylesheets, font_config=fonts)
+
+    def _render_xhtml2pdf(self, html: str) -> bytes:
+        from xhtml2pdf import pisa
+
+        out = io.BytesIO()
+        pisa_status = pisa.CreatePDF(src=html.replace("</head>", f"<style>{self._css}</style></head>"), dest=out)
+        if pisa_status.err:
+            raise RuntimeError(
+                "xhtml2pdf failed to create PDF. Emojis may require WeasyPrint or an embedded emoji font."
+            )
+        return out.getvalue()
+
+    def render_html(self, html: str, backend: Optional[str] = None) -> bytes:
+        """PDF bytes for a full HTML document; a failing backend falls through to the next one."""
+        backends = [backend] if backend else self.backends
+        if not backends:
+            raise RuntimeError(
+                "Neither WeasyPrint nor xhtml2pdf is available. Install weasyprint>=61 or xhtml2pdf>=0.2.13."
+            )
+        for i, name in enumerate(backends):
+            try:
+                with tracing.span("render.pdf", backend=name):
+                    return getattr(self, f"_render_{name}")(html)
+            except Exception:
+                if i == len(backends) - 1:
+                    raise
+                tracing.incr("pdf.fallbacks")
+
+    def render(self, md_text: str, title: str = "Weekly Preview", backend: Optional[str] = None) -> bytes:
+        return self.render_html(build_pdf_html(md_text, title), backend=backend)
+
+
+_renderer: Optional[PdfRenderer] = None
+_renderer_lock = threading.Lock()
+_warm_thread: Optional[threading.Thread] = None
+
+def get_renderer() -> PdfRenderer:
+    """The process-wide renderer (created on first use)."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = PdfRenderer()
+        return _renderer
+
+def warm_up() -> None:
+    """
+    Build the process-wide renderer on a background thread (call once at startup), so
+    backend detection overlaps other work; an export that arrives first waits for it.
+    """
+    global _warm_thread
+    with _renderer_lock:
+        if _renderer is not None or _warm_thread is not None:
+            return
+        _warm_thread = threading.Thread(target=get_renderer, name="pdf-warm-up", daemon=True)
+        _warm_thread.start()
+
+
+# ===============================
+# Public API
+# ===============================
+def md_to_pdf_bytes(md_text: str, title: str = "Weekly Preview") -> bytes:
+    """
+    Prefer WeasyPrint for emoji support; fall back to xhtml2pdf if unavailable.
+    """
+    return get_renderer().render(md_text, title)
+
+def _render_in_worker(doc: Tuple[str, str], backend: Optional[str] = None) -> bytes:
+    md_text, title = doc
+    return get_renderer().render(md_text, title, backend=backend)
+
+def render_many(
+    docs: Sequence[Tuple[str, str]],
+    workers: Optional[int] = None,
+    backend: Optional[str] = None,
+) -> List[bytes]:
+    """PDF bytes for each (markdown, title), rendered in a process pool (in-process for 0-1 workers/docs)."""
+    workers = min(workers or int(os.getenv("PDF_WORKERS", "0")) or os.cpu_count() or 1, len(docs))
+    if workers <= 1:
+        return [_render_in_worker(doc, backend) for doc in docs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_in_worker, docs, [backend] * len(docs)))
@@ -4,11 +4,15 @@ from __future__ import annotations
 import os
 import json
 import re
+import time
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Any
+from typing import Dict, Iterator, List, Tuple, Any
 
 # Data fetch
 from espn_api.football import League
+from espn_cache import get_league
+import llm_cache
+import tracing
 
 
 # ===============================
@@ -45,7 +49,7 @@ class TeamWeekProjection:
 # ESPN helpers
 # ===============================
 def _load_league(league_id: int, year: int, espn_s2: str | None, swid: str | None) -> League:
-    return League(league_id=league_id, year=year, espn_s2=espn_s2, swid=swid)
+    return get_league(league_id, year, espn_s2=espn_s2, swid=swid)
 
 def _get_team_meta(league: League) -> Dict[int, TeamMeta]:
     meta: Dict[int, TeamMeta] = {}
@@ -80,42 +84,48 @@ def _is_starter_slot(slot_value: Any) -> bool:
     except Exception:
         return True  # fallback to True unless we can prove it's bench
 
-def _get_team_week_projection(league: League, week: int, team_id: int, meta: Dict[int, TeamMeta]) -> TeamWeekProjection:
-    """
-    Build a team projection for THIS WEEK from STARTERS ONLY.
-    - Sum projected points for starters only (bench excluded)
-    - Top players = top 4 starters by projected points
-    """
-    box_scores = league.box_scores(week=week)
-    projected_points = 0.0
+def _starter_projections(lineup: List[Any]) -> List[PlayerProj]:
+    """Projected STARTERS ONLY for one lineup (bench excluded)."""
     starters: List[PlayerProj] = []
-
-    for box in box_scores:
-        lineup = None
-        if getattr(box, "home_team", None) and getattr(box.home_team, "team_id", None) == team_id:
-            lineup = getattr(box, "home_lineup", None)
-        elif getattr(box, "away_team", None) and getattr(box.away_team, "team_id", None) == team_id:
-            lineup = getattr(box, "away_lineup", None)
-        if lineup is None:
+    for p in lineup:
+        proj = getattr(p, "projected_points", None)
+        if proj is None:
             continue
 
-        for p in lineup:
-            proj = getattr(p, "projected_points", None)
-            if proj is None:
+        slot = getattr(p, "slot_position", getattr(p, "position", ""))
+        if not _is_starter_slot(slot):
+            continue  # 🚫 BENCH EXCLUDED COMPLETELY
+
+        starters.append(PlayerProj(
+            player_id=str(getattr(p, "playerId", getattr(p, "id", "")) or ""),
+            name=str(getattr(p, "name", "Player")),
+            position=str(slot),
+            projected_points=float(proj),
+            is_starter=True,
+        ))
+    return starters
+
+def _index_lineups_by_team(box_scores: List[Any]) -> Dict[int, List[Any]]:
+    """Map team_id -> lineup for every side of every box score in the week."""
+    lineups: Dict[int, List[Any]] = {}
+    for box in box_scores:
+        for side in ("home", "away"):
+            team = getattr(box, f"{side}_team", None)
+            team_id = getattr(team, "team_id", None) if team else None
+            lineup = getattr(box, f"{side}_lineup", None)
+            if team_id is None or lineup is None:
                 continue
+            lineups.setdefault(team_id, []).extend(lineup)
+    return lineups
 
-            slot = getattr(p, "slot_position", getattr(p, "position", ""))
-            if not _is_starter_slot(slot):
-                continue  # 🚫 BENCH EXCLUDED COMPLETELY
-
-            starters.append(PlayerProj(
-                player_id=str(getattr(p, "playerId", getattr(p, "id", "")) or ""),
-                name=str(getattr(p, "name", "Player")),
-                position=str(slot),
-                projected_points=float(proj),
-                is_starter=True,
-            ))
-            projected_points += float(proj)
+def _projection_from_lineup(team_id: int, lineup: List[Any], meta: Dict[int, TeamMeta]) -> TeamWeekProjection:
+    """
+    Build a team projection for THIS WEEK from STARTERS ONLY.
+    - Sum projected points for starters only (bench excluded)
+    - Top players = top 4 starters by projected points
+    """
+    starters = _starter_projections(lineup)
+    projected_points = sum(p.projected_points for p in starters)
 
     starters.sort(key=lambda x: -x.projected_points)
     top_players = starters[:4]  # ⬅️ top 4 starters
@@ -128,6 +138,25 @@ def _get_team_week_projection(league: League, week: int, team_id: int, meta: Dic
         meta=tm,
     )
 
+def _get_week_projections(league: League, week: int, meta: Dict[int, TeamMeta]) -> Dict[int, TeamWeekProjection]:
+    """
+    Week-level projection engine: ONE box-score pull for the whole week,
+    lineups indexed by team_id, then every TeamWeekProjection built from that index.
+    """
+    lineups = _index_lineups_by_team(league.box_scores(week=week))
+    return {
+        team_id: _projection_from_lineup(team_id, lineups.get(team_id, []), meta)
+        for team_id in meta
+    }
+
+def _get_team_week_projection(league: League, week: int, team_id: int, meta: Dict[int, TeamMeta]) -> TeamWeekProjection:
+    """
+    Single-team projection (kept for compatibility).
+    Prefer `_get_week_projections` when you need more than one team — this pulls box scores each call.
+    """
+    lineups = _index_lineups_by_team(league.box_scores(week=week))
+    return _projection_from_lineup(team_id, lineups.get(team_id, []), meta)
+
 
 # ===============================
 # Build "cards" for UI + quotes
@@ -137,16 +166,19 @@ def build_weekly_preview_cards(
     year: int,
     week: int,
     espn_s2: str | None = None,
-    swid: str | None = None
+    swid: str | None = None,
+    league: League | None = None,
 ) -> List[Dict[str, Any]]:
-    league = _load_league(league_id, year, espn_s2, swid)
+    """Pass `league` to reuse an already-loaded League (e.g. the app's shared one)."""
+    league = league or _load_league(league_id, year, espn_s2, swid)
     meta = _get_team_meta(league)
     pairs = _get_week_pairs(league, week)
+    projections = _get_week_projections(league, week, meta) if pairs else {}
 
     cards: List[Dict[str, Any]] = []
     for home_id, away_id in pairs:
-        h = _get_team_week_projection(league, week, home_id, meta)
-        a = _get_team_week_projection(league, week, away_id, meta)
+        h = projections[home_id]
+        a = projections[away_id]
 
         # ✅ Edge & featured strictly from STARTERS ONLY
         margin = round(h.projected_points - a.projected_points, 2)
@@ -310,6 +342,47 @@ def _format_quote_text(text: str, team: str) -> str:
     base = base + " ,"
     return f"\"{base}\" The {team} coach says."
 
+def _quote_messages(league_id: int, year: int, week: int, cards: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    payload = _quotes_prompt_payload(league_id, year, week, cards)
+    return [
+        {"role": "system", "content": (
+            "You are LLM-Commissioner. "
+            "Reply with STRICT JSON ONLY. No preamble, no code fences unless necessary for JSON validity."
+        )},
+        {"role": "user", "content": json.dumps(payload, ensure_ascii=False)}
+    ]
+
+def _fallback_record(card: Dict[str, Any]) -> Dict[str, str]:
+    """Quotes from the local pool, used when the LLM reply is unusable."""
+    h = card["matchup"]["home"]["team_name"]
+    a = card["matchup"]["away"]["team_name"]
+    return {
+        "home_team": h,
+        "away_team": a,
+        "home_quote": _fallback_quote_for(h, salt=1),
+        "away_quote": _fallback_quote_for(a, salt=2),
+        "closer": "This one could turn into a fireworks show — bring popcorn! 🍿",
+    }
+
+def _clean_quote(card: Dict[str, Any], rec: Dict[str, Any]) -> Dict[str, str]:
+    """Enforce distinctness & final formatting for one matchup's LLM record."""
+    m = card["matchup"]
+    h = m["home"]["team_name"]
+    a = m["away"]["team_name"]
+
+    hq_raw = rec.get("home_quote") or _fallback_quote_for(h, salt=3)
+    aq_raw = rec.get("away_quote") or _fallback_quote_for(a, salt=4)
+    closer = rec.get("closer") or "Whistles ready — this has the makings of a highlight reel. 🎬"
+
+    hq_raw, aq_raw = _ensure_distinct(hq_raw, aq_raw, h, a)
+    return {
+        "home_team": h,
+        "away_team": a,
+        "home_quote": _format_quote_text(hq_raw, h),
+        "away_quote": _format_quote_text(aq_raw, a),
+        "closer": closer,
+    }
+
 def _get_quotes_for_matchups(
     cards: List[Dict[str, Any]],
     league_id: int,
@@ -317,72 +390,115 @@ def _get_quotes_for_matchups(
     week: int,
     temperature: float = 0.7,
     max_tokens: int = 1000,
+    presence_penalty: float = 0.0,
+    frequency_penalty: float = 0.0,
+    regenerate: bool = False,
 ) -> List[Dict[str, str]]:
     """
     Ask the LLM for quotes + closers only, as JSON aligned with the order of `cards`.
     Ensures distinct quotes and formats attribution exactly once.
+    Valid responses are kept in the LLM cache; `regenerate=True` bypasses it.
     """
-    client = _openai_client()
     model = _default_model()
+    messages = _quote_messages(league_id, year, week, cards)
+    params = {"temperature": temperature, "max_tokens": max_tokens,
+              "presence_penalty": presence_penalty, "frequency_penalty": frequency_penalty}
 
-    payload = _quotes_prompt_payload(league_id, year, week, cards)
-    messages = [
-        {"role": "system", "content": (
-            "You are LLM-Commissioner. "
-            "Reply with STRICT JSON ONLY. No preamble, no code fences unless necessary for JSON validity."
-        )},
-        {"role": "user", "content": json.dumps(payload, ensure_ascii=False)}
-    ]
+    cache_key = llm_cache.cache_key(model, messages, params=params)
+    cached = None if regenerate else llm_cache.get(cache_key)
+    client = _openai_client() if cached is None else None
 
     try:
-        resp = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-        )
-        content = resp.choices[0].message.content
+        if cached is not None:
+            content = cached
+        else:
+            with tracing.span("llm.preview_quotes", model=model, matchups=len(cards)):
+                resp = client.chat.completions.create(model=model, messages=messages, **params)
+            tracing.add_usage(getattr(resp, "usage", None))
+            content = resp.choices[0].message.content
         data = _force_json(content)
         if not isinstance(data, list):
             raise ValueError("Expected a JSON list.")
+        if cached is None:
+            llm_cache.put(cache_key, content, model=model)  # only cache parseable replies
     except Exception:
         # Fallback: build quotes from pool
-        data = []
-        for c in cards:
-            h = c["matchup"]["home"]["team_name"]
-            a = c["matchup"]["away"]["team_name"]
-            data.append({
-                "home_team": h,
-                "away_team": a,
-                "home_quote": _fallback_quote_for(h, salt=1),
-                "away_quote": _fallback_quote_for(a, salt=2),
-                "closer": "This one could turn into a fireworks show — bring popcorn! 🍿",
-            })
-
-    # Enforce distinctness & final formatting
-    cleaned: List[Dict[str, str]] = []
-    for i, c in enumerate(cards):
-        m = c["matchup"]
-        h = m["home"]["team_name"]
-        a = m["away"]["team_name"]
-        rec = data[i] if i < len(data) else {}
-
-        hq_raw = rec.get("home_quote") or _fallback_quote_for(h, salt=3)
-        aq_raw = rec.get("away_quote") or _fallback_quote_for(a, salt=4)
-        closer = rec.get("closer") or "Whistles ready — this has the makings of a highlight reel. 🎬"
-
-        hq_raw, aq_raw = _ensure_distinct(hq_raw, aq_raw, h, a)
-        hq = _format_quote_text(hq_raw, h)
-        aq = _format_quote_text(aq_raw, a)
-
-        cleaned.append({
-            "home_team": h,
-            "away_team": a,
-            "home_quote": hq,
-            "away_quote": aq,
-            "closer": closer,
-        })
-    return cleaned
+        tracing.incr("preview.fallback_quotes")
+        data = [_fallback_record(c) for c in cards]
+
+    return [_clean_quote(c, data[i] if i < len(data) else {}) for i, c in enumerate(cards)]
+
+
+# ===============================
+# LLM: streamed quotes (one JSON list element at a time)
+# ===============================
+def _iter_json_list_items(chunks: Iterator[str]) -> Iterator[Any]:
+    """
+    Incrementally parse a streamed top-level JSON list, yielding each element
+    as soon as its closing brace arrives. Text before the '[' (e.g. a ```json fence) is ignored.
+    """
+    buf: List[str] = []
+    depth = 0
+    in_string = escaped = False
+    start = None
+    for chunk in chunks:
+        for ch in chunk:
+            if depth >= 1:
+                buf.append(ch)
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+                continue
+            if ch == '"' and depth >= 1:
+                in_string = True
+            elif ch in "[{":
+                if depth == 0:
+                    if ch == "{":
+                        return  # not a list; the caller falls back
+                    buf = []
+                elif depth == 1:
+                    start = len(buf) - 1
+                depth += 1
+            elif ch in "]}":
+                depth -= 1
+                if depth == 1 and start is not None:
+                    yield json.loads("".join(buf[start:]))
+                    start = None
+                elif depth == 0:
+                    return
+
+def _stream_quote_records(
+    client, model: str, messages: List[Dict[str, str]], raw: List[str], **params
+) -> Iterator[Any]:
+    """
+    Yield parsed quote records while the completion streams; the full reply text lands in `raw`.
+    Token usage arrives in the final chunk (stream_options.include_usage).
+    """
+    t0 = time.perf_counter()
+    stream = client.chat.completions.create(
+        model=model, messages=messages, stream=True, stream_options={"include_usage": True}, **params
+    )
+
+    def deltas() -> Iterator[str]:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if not raw:
+                    tracing.record("llm.first_token", time.perf_counter() - t0, model=model)
+                raw.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+            tracing.add_usage(getattr(chunk, "usage", None))  # set on the last chunk only
+        tracing.record("llm.preview_quotes", time.perf_counter() - t0, model=model, stream=True)
+
+    def records() -> Iterator[Any]:
+        chunks = deltas()
+        yield from _iter_json_list_items(chunks)
+        for _ in chunks:  # the parser stops at the closing ']': read the rest and the usage chunk
+            pass
+    return records()
 
 
 # ===============================
@@ -403,6 +519,68 @@ def _edge_line(favorite: str, edge: float) -> str:
         return "_Edge:_ **Pick'em**"
     return f"_Edge:_ **{favorite} by {edge}**"
 
+def _featured_first(cards: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    featured = [c for c in cards if c["matchup"].get("is_featured")]
+    others = [c for c in cards if not c["matchup"].get("is_featured")]
+    return featured + others
+
+def _empty_preview(week: int) -> str:
+    return f"# Weekly Preview (Week {week})\n\n_No matchups found for this week._"
+
+def _header_lines(week: int, has_featured: bool) -> List[str]:
+    lines = [f"# WEEK {week} PREVIEW: LET'S RUMBLE! 🏈🔥", ""]
+    if has_featured:
+        lines.append("## ⭐ Matchup of the Week")
+        lines.append("")
+    return lines
+
+def _matchup_lines(c: Dict[str, Any], q: Dict[str, str], source: str) -> List[str]:
+    m = c["matchup"]
+    home = m["home"]; away = m["away"]
+    lines: List[str] = []
+
+    # Header WITHOUT logos; include records next to team names
+    lines.append(
+        f"## {'⭐ ' if m.get('is_featured') else ''}Matchup: "
+        f"{home['team_name']} ({home['record']}) vs {away['team_name']} ({away['record']})"
+    )
+    lines.append(_edge_line(m['favorite'], m['edge_points']))
+    lines.append("")
+
+    # Separate top-starters lines for each team
+    lines.append(f"**Top starters — {home['team_name']}:** {_fmt_players_inline(home['top_players_list'])}")
+    lines.append(f"**Top starters — {away['team_name']}:** {_fmt_players_inline(away['top_players_list'])}")
+    lines.append("")
+
+    # Flavor paragraphs mentioning each side's top projected starter if present
+    h_top = home['top_players_list'][0] if home['top_players_list'] else None
+    a_top = away['top_players_list'][0] if away['top_players_list'] else None
+    if h_top:
+        lines.append(
+            f"Based on projections from {source}, {home['team_name']} can expect a **{h_top['proj']}** point spark from "
+            f"**{h_top['name']}** ({h_top['position']}) — if they keep the chains moving, "
+            f"the scoreboard might light up like a pinball machine. ⚡️📈"
+        )
+    else:
+        lines.append(f"Based on projections from {source}, {home['team_name']} will lean on their starters to set the tone. ⚡️")
+    lines.append(q["home_quote"])
+    lines.append("")
+
+    if a_top:
+        lines.append(
+            f"Based on projections from {source}, {away['team_name']} can expect **{a_top['proj']}** shiny points from "
+            f"**{a_top['name']}** ({a_top['position']}) — clean pockets and crisp routes could turn drives into paydirt. 🔥🚀"
+        )
+    else:
+        lines.append(f"Based on projections from {source}, {away['team_name']} needs rhythm early to stay on schedule. 🔥")
+    lines.append(q["away_quote"])
+
+    # Closer
+    lines.append("")
+    lines.append(f"*Final whistle:* {q['closer']}")
+    lines.append("")
+    return lines
+
 
 # ===============================
 # Build final preview (deterministic structure; NO LOGOS)
@@ -415,22 +593,45 @@ def generate_week_preview(
     swid: str | None = None,
     temperature: float = 0.7,
     max_tokens: int = 1000,
+    regenerate: bool = False,
 ) -> str:
     """
     Deterministic structure (records/top-4/edge) + LLM quotes/closers.
     Returns a single Markdown document. No logos are displayed.
     """
     cards = build_weekly_preview_cards(league_id, year, week, espn_s2=espn_s2, swid=swid)
-    if not cards:
-        return f"# Weekly Preview (Week {week})\n\n_No matchups found for this week._"
+    return generate_week_preview_from_cards(
+        cards, league_id, year, week,
+        temperature=temperature, max_tokens=max_tokens, regenerate=regenerate,
+    )
 
-    # Get quotes/closers in the same order
-    quotes = _get_quotes_for_matchups(cards, league_id, year, week, temperature=temperature, max_tokens=max_tokens)
 
-    # Reorder so featured appears first
-    featured = [c for c in cards if c["matchup"].get("is_featured")]
-    others = [c for c in cards if not c["matchup"].get("is_featured")]
-    ordered = featured + others
+def generate_week_preview_from_cards(
+    cards: List[Dict[str, Any]],
+    league_id: int,
+    year: int,
+    week: int,
+    temperature: float = 0.7,
+    max_tokens: int = 1000,
+    presence_penalty: float = 0.0,
+    frequency_penalty: float = 0.0,
+    regenerate: bool = False,
+) -> str:
+    """
+    Same document as `generate_week_preview`, but from cards you already built
+    with `build_weekly_preview_cards` (no League construction, no box-score pulls).
+    """
+    if not cards:
+        return _empty_preview(week)
+
+    # Featured first; quotes are requested in the same (render) order
+    ordered = _featured_first(cards)
+    quotes = _get_quotes_for_matchups(
+        ordered, league_id, year, week,
+        temperature=temperature, max_tokens=max_tokens,
+        presence_penalty=presence_penalty, frequency_penalty=frequency_penalty,
+        regenerate=regenerate,
+    )
 
     # Map quotes by (home,away)
     qmap: Dict[Tuple[str, str], Dict[str, str]] = {}
@@ -438,72 +639,22 @@ def generate_week_preview(
         qmap[(q["home_team"], q["away_team"])] = q
 
     source = _projection_source()
-
-    lines: List[str] = []
-    lines.append(f"# WEEK {week} PREVIEW: LET'S RUMBLE! 🏈🔥")
-    lines.append("")
-
-    if featured:
-        lines.append("## ⭐ Matchup of the Week")
-        lines.append("")
+    lines = _header_lines(week, has_featured=ordered[0]["matchup"].get("is_featured", False))
 
     # Render each matchup (featured first)
     for c in ordered:
-        m = c["matchup"]
-        home = m["home"]; away = m["away"]
-        key = (home["team_name"], away["team_name"])
-        q = qmap.get(key, {
+        home = c["matchup"]["home"]; away = c["matchup"]["away"]
+        q = qmap.get((home["team_name"], away["team_name"]), {
             "home_quote": _format_quote_text("Win the down, win the day", home["team_name"]),
             "away_quote": _format_quote_text("Play fast, play smart, finish", away["team_name"]),
             "closer": "This one could turn into a fireworks show — bring popcorn! 🍿"
         })
-
-        # Header WITHOUT logos; include records next to team names
-        lines.append(
-            f"## {'⭐ ' if m.get('is_featured') else ''}Matchup: "
-            f"{home['team_name']} ({home['record']}) vs {away['team_name']} ({away['record']})"
-        )
-        lines.append(_edge_line(m['favorite'], m['edge_points']))
-        lines.append("")
-
-        # Separate top-starters lines for each team
-        lines.append(f"**Top starters — {home['team_name']}:** {_fmt_players_inline(home['top_players_list'])}")
-        lines.append(f"**Top starters — {away['team_name']}:** {_fmt_players_inline(away['top_players_list'])}")
-        lines.append("")
-
-        # Flavor paragraphs mentioning each side's top projected starter if present
-        h_top = home['top_players_list'][0] if home['top_players_list'] else None
-        a_top = away['top_players_list'][0] if away['top_players_list'] else None
-        if h_top:
-            lines.append(
-                f"Based on projections from {source}, {home['team_name']} can expect a **{h_top['proj']}** point spark from "
-                f"**{h_top['name']}** ({h_top['position']}) — if they keep the chains moving, "
-                f"the scoreboard might light up like a pinball machine. ⚡️📈"
-            )
-        else:
-            lines.append(f"Based on projections from {source}, {home['team_name']} will lean on their starters to set the tone. ⚡️")
-        lines.append(q["home_quote"])
-        lines.append("")
-
-        if a_top:
-            lines.append(
-                f"Based on projections from {source}, {away['team_name']} can expect **{a_top['proj']}** shiny points from "
-                f"**{a_top['name']}** ({a_top['position']}) — clean pockets and crisp routes could turn drives into paydirt. 🔥🚀"
-            )
-        else:
-            lines.append(f"Based on projections from {source}, {away['team_name']} needs rhythm early to stay on schedule. 🔥")
-        lines.append(q["away_quote"])
-
-        # Closer
-        lines.append("")
-        lines.append(f"*Final whistle:* {q['closer']}")
-        lines.append("")
+        lines.extend(_matchup_lines(c, q, source))
 
     return "\n".join(lines)
 
 
-# (Optional) Compatibility shim if other code calls this name:
-def generate_week_preview_from_cards(
+def stream_week_preview_from_cards(
     cards: List[Dict[str, Any]],
     league_id: int,
     year: int,
@@ -512,6 +663,55 @@ def generate_week_preview_from_cards(
     max_tokens: int = 1000,
     presence_penalty: float = 0.0,
     frequency_penalty: float = 0.0,
-) -> str:
-    # Render through the single entry point to ensure consistent layout.
-    return generate_week_preview(league_id, year, week, temperature=temperature, max_tokens=max_tokens)
+    regenerate: bool = False,
+) -> Iterator[str]:
+    """
+    Streaming `generate_week_preview_from_cards`: yields the header, then each
+    matchup's markdown section as soon as its quote record has streamed in.
+    Quotes are JSON, so the unit of streaming is a matchup rather than a token.
+    """
+    if not cards:
+        yield _empty_preview(week)
+        return
+
+    ordered = _featured_first(cards)
+    source = _projection_source()
+    yield "\n".join(_header_lines(week, has_featured=ordered[0]["matchup"].get("is_featured", False))) + "\n"
+
+    model = _default_model()
+    messages = _quote_messages(league_id, year, week, ordered)
+    params = {"temperature": temperature, "max_tokens": max_tokens,
+              "presence_penalty": presence_penalty, "frequency_penalty": frequency_penalty}
+    cache_key = llm_cache.cache_key(model, messages, params=params)
+    cached = None if regenerate else llm_cache.get(cache_key)
+    client = _openai_client() if cached is None else None
+
+    raw: List[str] = []
+    emitted = 0
+    failed = False
+    try:
+        if cached is not None:
+            records = _force_json(cached)
+            if not isinstance(records, list):
+                raise ValueError("Expected a JSON list.")
+        else:
+            records = _stream_quote_records(client, model, messages, raw, **params)
+        for rec in records:
+            if emitted >= len(ordered):
+                break
+            q = _clean_quote(ordered[emitted], rec if isinstance(rec, dict) else {})
+            yield "\n".join(_matchup_lines(ordered[emitted], q, source)) + "\n"
+            emitted += 1
+        if cached is None:
+            data = _force_json("".join(raw))
+            if not isinstance(data, list):
+                raise ValueError("Expected a JSON list.")
+            llm_cache.put(cache_key, "".join(raw), model=model)  # only cache parseable replies
+    except Exception:
+        failed = True
+        tracing.incr("preview.fallback_quotes")
+
+    # Whatever the stream didn't cover: pool quotes on failure, per-item defaults on a short list
+    for c in ordered[emitted:]:
+        q = _clean_quote(c, _fallback_record(c) if failed else {})
+        yield "\n".join(_matchup_lines(c, q, source)) + "\n"
@@ -0,0 +1,57 @@
+# token_count.py
+"""
+Local prompt token counts, so prompt size can be measured without calling the API.
+
+Uses tiktoken when it is installed (exact for OpenAI models). Otherwise it falls
+back to an estimate that splits on words and punctuation, which is usually
+within ~10% of the real count for English prose.
+"""
+import re
+import math
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+MESSAGE_OVERHEAD = 3  # tokens per chat message (role + separators)
+REPLY_PRIMING = 3     # every reply is primed with <|start|>assistant<|message|>
+
+_PIECES = re.compile(r"\s*[A-Za-z]+|\s*\d{1,3}|\s*[^\sA-Za-z\d]|\s+")
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: Optional[str]):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model or "")
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:  # encodings are downloaded on first use: offline without a cached copy
+        return None
+
+def exact(model: Optional[str] = None) -> bool:
+    """True when counts come from tiktoken rather than the estimate."""
+    return _encoding(model) is not None
+
+def _estimate(text: str) -> int:
+    # a word is ~1 token per 4-5 letters, numbers split every 3 digits, each symbol is its own token
+    count = 0
+    for piece in _PIECES.findall(text):
+        letters = len(piece.strip())
+        count += max(1, math.ceil(letters / 5)) if letters else 0
+    return count
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    enc = _encoding(model)
+    if enc is not None:
+        return len(enc.encode(text or "", disallowed_special=()))
+    return _estimate(text or "")
+
+def count_message_tokens(messages: List[Dict[str, str]], model: Optional[str] = None) -> int:
+    """Prompt tokens a chat request with these messages is billed for."""
+    total = REPLY_PRIMING
+    for m in messages:
+        total += MESSAGE_OVERHEAD + count_tokens(m.get("content", ""), model) + count_tokens(m.get("role", ""), model)
+    return total
@@ -0,0 +1,217 @@
+# tracing.py
+"""
+Lightweight run tracing: timed spans, counters, and a JSON run report.
+
+    with tracing.span("llm.completion", model=MODEL) as attrs:
+        resp = client.chat.completions.create(...)
+        attrs["tokens"] = resp.usage.total_tokens
+    tracing.incr("llm.prompt_tokens", resp.usage.prompt_tokens)
+
+Spans are aggregated by name (count, total/mean/p95/max ms, errors). The most
+recent TRACE_MAX_SPANS spans are also kept one by one, with their parent span
+(nesting is tracked per thread / asyncio task) and attributes. Everything lives
+in one process-wide recorder: main.py resets it per run and writes the report,
+and the Streamlit app shows it in the Diagnostics expander.
+
+Span names used across the project:
+    espn.league_bootstrap  espn.request  espn.box_scores  matchups.<db|espn>
+    llm.completion  llm.first_token  llm.stream  llm.preview_quotes
+    render.html  render.pdf  smtp.connect  smtp.deliver  stage.<fetch|generate|render|deliver>
+    app.<fetch_matchups|recap|preview_cards|preview|refresh>
+Counters: espn.requests, espn.cache_hits, llm.cache_hits/misses, llm.prompt_tokens,
+llm.completion_tokens, llm.cached_prompt_tokens, llm.retries, artifacts.hits/renders,
+pdf.fallbacks, smtp.messages, smtp.failed, smtp.reconnects, jobs.retries, jobs.failed.
+
+Environment:
+- TRACING_DISABLED=1   record nothing
+- TRACE_MAX_SPANS      individual spans kept for the report (default: 500)
+"""
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+_DURATIONS_KEPT = 1000  # per span name, for percentiles
+
+_parent: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_parent", default=None)
+
+
+# ===============================
+# Configuration
+# ===============================
+def _disabled() -> bool:
+    return os.getenv("TRACING_DISABLED", "") == "1"
+
+def _max_spans() -> int:
+    return int(os.getenv("TRACE_MAX_SPANS", "500"))
+
+
+# ===============================
+# Recorder
+# ===============================
+class _SpanStats:
+    __slots__ = ("count", "errors", "total", "max", "durations")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.durations: deque = deque(maxlen=_DURATIONS_KEPT)
+
+    def add(self, seconds: float, error: bool) -> None:
+        self.count += 1
+        self.errors += int(error)
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.durations.append(seconds)
+
+    def as_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.durations)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": round(self.total * 1000, 1),
+            "mean_ms": round(self.total / self.count * 1000, 1) if self.count else 0.0,
+            "p95_ms": round(p95 * 1000, 1),
+            "max_ms": round(self.max * 1000, 1),
+        }
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.run_id = uuid.uuid4().hex[:12]
+            self.started_at = datetime.now(timezone.utc)
+            self._t0 = time.perf_counter()
+            self.stats: Dict[str, _SpanStats] = {}
+            self.counters: Dict[str, float] = {}
+            self.spans: deque = deque(maxlen=_max_spans())
+
+    def record(self, name: str, seconds: float, start: Optional[float] = None, parent: Optional[str] = None,
+               error: Optional[str] = None, attrs: Optional[Dict[str, Any]] = None) -> None:
+        start = time.perf_counter() - seconds if start is None else start
+        with self._lock:
+            self.stats.setdefault(name, _SpanStats()).add(seconds, error is not None)
+            entry = {"name": name, "start_ms": round((start - self._t0) * 1000, 1), "ms": round(seconds * 1000, 1)}
+            if parent:
+                entry["parent"] = parent
+            if error:
+                entry["error"] = error
+            if attrs:
+                entry["attrs"] = attrs
+            self.spans.append(entry)
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                "started_at": self.started_at.isoformat(timespec="seconds"),
+                "wall_seconds": round(time.perf_counter() - self._t0, 3),
+                "spans": {name: st.as_dict() for name, st in sorted(self.stats.items())},
+                "counters": dict(sorted(self.counters.items())),
+                "recent_spans": list(self.spans),
+            }
+
+
+_recorder = Recorder()
+
+
+# ===============================
+# Public API
+# ===============================
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """Time the block as `name`; the yielded dict collects attributes (e.g. token counts)."""
+    if _disabled():
+        yield attrs
+        return
+    token = _parent.set(name)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield attrs
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _parent.reset(token)
+        _recorder.record(name, time.perf_counter() - start, start=start, parent=_parent.get(),
+                         error=error, attrs={k: v for k, v in attrs.items() if v is not None})
+
+def traced(name: str) -> Callable:
+    """Decorator form of `span`."""
+    def wrap(fn: Callable) -> Callable:
+        @wraps(fn)
+        def inner(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+def record(name: str, seconds: float, **attrs: Any) -> None:
+    """A span measured by the caller (e.g. a stream's time to first token)."""
+    if not _disabled():
+        _recorder.record(name, seconds, parent=_parent.get(), attrs=attrs or None)
+
+def incr(name: str, value: float = 1) -> None:
+    if not _disabled() and value:
+        _recorder.incr(name, value)
+
+def add_usage(usage: Any) -> None:
+    """An OpenAI response's `usage` -> llm.prompt_tokens / completion_tokens / cached_prompt_tokens."""
+    if usage is None:
+        return
+    incr("llm.prompt_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+    incr("llm.completion_tokens", getattr(usage, "completion_tokens", 0) or 0)
+    details = getattr(usage, "prompt_tokens_details", None)
+    incr("llm.cached_prompt_tokens", getattr(details, "cached_tokens", 0) or 0)
+
+def reset() -> None:
+    """Start a new run (clears spans and counters)."""
+    _recorder.reset()
+
+def report() -> Dict[str, Any]:
+    return _recorder.report()
+
+def write_report(path: str, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Write the run report (plus `extra` top-level keys) as JSON; returns it."""
+    data = {**report(), **(extra or {})}
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, default=str)
+    return data
+
+def span_rows(data: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Per-span-name rows, slowest total first (for tables)."""
+    data = data or report()
+    rows = [{"span": name, **st} for name, st in data["spans"].items()]
+    return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+def format_report(data: Optional[Dict[str, Any]] = None) -> str:
+    data = data or report()
+    lines = [f"run {data['run_id']}: {data['wall_seconds']:.2f}s wall",
+             f"{'span':<24}{'count':>7}{'total ms':>11}{'mean':>9}{'p95':>9}{'max':>9}{'err':>5}"]
+    for r in span_rows(data):
+        lines.append(f"{r['span']:<24}{r['count']:>7}{r['total_ms']:>11.1f}{r['mean_ms']:>9.1f}"
+                     f"{r['p95_ms']:>9.1f}{r['max_ms']:>9.1f}{r['errors']:>5}")
+    if data["counters"]:
+        lines.append("counters: " + ", ".join(f"{k}={v:g}" for k, v in data["counters"].items()))
+    return "\n".join(lines)